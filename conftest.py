@@ -1,36 +1,333 @@
+import os
+from dataclasses import replace
 import pytest
 import allure
 from selene.support.shared import browser
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from helpers.attachments import attach_all_artifacts
+from helpers import attachments
+from helpers.api_helpers import BASE_URL_ENV, get_base_url
+from helpers.account_pool import AccountPool
+from helpers.auth_cache import LoginCache
+from helpers.browser_auth import seed_cart, transfer_session
+from helpers.browser_pool import BrowserPool
+from helpers.cassette import CASSETTE_ENV, CASSETTE_MODE_ENV, CASSETTE_MODES, Cassette
+from helpers.profiling import section
+from helpers.response_cache import CacheStats, ResponseCache, configure_response_cache, get_response_cache
+from helpers.stub_server import DemoWebShopStub, StubConfig
+from helpers.test_accounts import ensure_registered, unique_user, worker_user
+from helpers.transport import configure_transport, get_transport_config
 
 
-@pytest.fixture(scope="function", autouse=True)
-def allure_report():
-    try:
-        allure.attach.file("allure-results/latest-report.json", 
-                          name="Отчет о тестировании",
-                          attachment_type=allure.attachment_type.JSON)
-    except FileNotFoundError:
-        pass  # Игнорируем ошибку, если файл не найден
+pytest_plugins = [
+    "helpers.http_metrics_plugin",
+    "helpers.case_selection_plugin",
+    "helpers.duration_scheduler_plugin",
+    "helpers.run_report_plugin",
+    "helpers.profiling_plugin",
+]
 
-@pytest.fixture(scope="function", autouse=True)
-def browser_management():
-    browser.config.window_width = 1920
-    browser.config.window_height = 1080
-    browser.config.timeout = 10
-    browser.config.base_url = 'https://demowebshop.tricentis.com'
-    
+def pytest_addoption(parser):
+    group = parser.getgroup("demowebshop")
+    group.addoption("--webshop-url", default=None,
+                    help=f"Адрес магазина (по умолчанию переменная {BASE_URL_ENV} или demowebshop.tricentis.com)")
+    group.addoption("--stub-server", action="store_true", default=False,
+                    help="Запустить локальный заменитель DemoWebShop и гонять тесты против него")
+    group.addoption("--cassette", default=None,
+                    help="Файл кассеты для записи и воспроизведения HTTP-ответов DemoWebShopAPI")
+    group.addoption("--cassette-mode", choices=CASSETTE_MODES, default="auto",
+                    help="record - записать заново, replay - только из кассеты, auto - дописать недостающее")
+    group.addoption("--http-pool-size", type=int, default=None,
+                    help="Размер общего пула соединений API-помощника на хост")
+    group.addoption("--http-get-retries", type=int, default=None,
+                    help="Количество повторов GET-запросов при сбоях и 502/503/504")
+    group.addoption("--http-no-keep-alive", action="store_true", default=False,
+                    help="Не переиспользовать соединения между запросами")
+    group.addoption("--auth-cache-ttl", type=float, default=1800,
+                    help="Время жизни закэшированной авторизации в секундах")
+    group.addoption("--auth-cache-shared", action="store_true", default=False,
+                    help="Хранить авторизованные сессии в .pytest_cache, общем для xdist-воркеров")
+    group.addoption("--response-cache", action="store_true", default=False,
+                    help="Кэшировать GET-ответы каталога и поиска (ETag/Last-Modified, TTL по маршрутам)")
+    group.addoption("--response-cache-size", type=int, default=256,
+                    help="Предельное число ответов в кэше, дальше вытесняются давно не использованные")
+    group.addoption("--account-pool-size", type=int, default=2,
+                    help="Сколько заранее зарегистрированных аккаунтов держать в пуле на воркер")
+    group.addoption("--browser-pool", type=int, default=0,
+                    help="Количество прогретых браузеров на воркер (0 - новый браузер на каждый тест)")
+    group.addoption("--attach-policy", choices=attachments.ATTACH_MODES, default="always",
+                    help="Когда добавлять вложения в Allure: always, on-failure или never "
+                         "(в on-failure вложения прикладываются к тесту, а не к шагам)")
+    group.addoption("--attach-max-bytes", type=int, default=None,
+                    help="Максимальный размер текстового вложения, середина обрезается")
+    group.addoption("--attach-gzip-over", type=int, default=None,
+                    help="Сжимать текстовые вложения больше указанного размера в .gz")
+    group.addoption("--attach-no-dedup", action="store_true", default=False,
+                    help="Не заменять повторяющиеся вложения ссылкой на первое")
+    group.addoption("--artifact-workers", type=int, default=2,
+                    help="Потоки фоновой подготовки артефактов браузера (скриншот, логи, HTML)")
+    group.addoption("--artifact-queue-size", type=int, default=16,
+                    help="Сколько артефактов браузера может ждать обработки, дальше teardown ждет")
+    group.addoption("--screenshot-scale", type=float, default=0.5,
+                    help="Масштаб скриншота браузера в отчете (1 - исходный размер)")
+    group.addoption("--screenshot-quality", type=int, default=60,
+                    help="Качество JPEG-скриншота браузера (1-100)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "ui: тест работает через браузер (тесты в tests/UI отмечаются автоматически)")
+    config.addinivalue_line("markers", "seed_cart(*items): товары (id или (id, количество)) в корзине для logged_in_browser")
+    transport = get_transport_config()
+    configure_transport(replace(
+        transport,
+        pool_maxsize=config.getoption("http_pool_size") or transport.pool_maxsize,
+        get_retries=(transport.get_retries if config.getoption("http_get_retries") is None
+                     else config.getoption("http_get_retries")),
+        keep_alive=transport.keep_alive and not config.getoption("http_no_keep_alive"),
+    ))
+    if config.getoption("response_cache"):
+        configure_response_cache(ResponseCache(max_entries=config.getoption("response_cache_size")))
+    attachments.configure(
+        mode=config.getoption("attach_policy"),
+        max_bytes=config.getoption("attach_max_bytes"),
+        gzip_over=config.getoption("attach_gzip_over"),
+        dedup=not config.getoption("attach_no_dedup"),
+        workers=config.getoption("artifact_workers"),
+        queue_size=config.getoption("artifact_queue_size"),
+        screenshot_scale=config.getoption("screenshot_scale"),
+        screenshot_quality=config.getoption("screenshot_quality"),
+    )
+
+
+def pytest_sessionfinish(session):
+    # Остановка фоновых потоков, готовящих артефакты браузера
+    attachments.flush_artifacts()
+    cache = get_response_cache()
+    if cache is not None and hasattr(session.config, "workeroutput"):
+        session.config.workeroutput["response_cache"] = cache.stats.as_dict()
+
+
+# Статистика кэша ответов от воркеров xdist: у каждого воркера свой кэш
+_worker_cache_stats = []
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    stats = getattr(node, "workeroutput", {}).get("response_cache")
+    if stats:
+        _worker_cache_stats.append(CacheStats(**stats))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    cache = get_response_cache()
+    if cache is None or hasattr(config, "workeroutput"):
+        return
+    stats = sum(_worker_cache_stats, cache.stats)
+    if stats.hits + stats.revalidated + stats.misses:
+        terminalreporter.write_sep("-", (
+            f"кэш ответов: доля попаданий {stats.hit_rate:.0%} "
+            f"(свежих {stats.hits}, после 304 {stats.revalidated}, промахов {stats.misses}, "
+            f"мимо кэша {stats.bypassed}, вытеснено {stats.evictions})"
+        ))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    attachments.start_test(item)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    # Отложенные вложения выгружаются или отбрасываются, когда известен результат фазы
+    attachments.on_phase_report(report.when, report.failed, item)
+
+
+def pytest_collection_modifyitems(config, items):
+    ui_dir = config.rootpath / "tests" / "UI"
+    for item in items:
+        if ui_dir in item.path.parents:
+            item.add_marker(pytest.mark.ui)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def webshop_base_url(request):
+    """
+    Адрес магазина на весь прогон
+
+    Адрес публикуется в переменную окружения, поэтому DemoWebShopAPI(),
+    созданный прямо в тесте, тоже идет по нему.
+    """
+    previous = os.environ.get(BASE_URL_ENV)
+    stub = None
+    if request.config.getoption("stub_server"):
+        stub = DemoWebShopStub(config=StubConfig.from_env()).start()
+        os.environ[BASE_URL_ENV] = stub.base_url
+    elif request.config.getoption("webshop_url"):
+        os.environ[BASE_URL_ENV] = request.config.getoption("webshop_url")
+
+    yield get_base_url()
+
+    if stub:
+        stub.stop()
+    if previous is None:
+        os.environ.pop(BASE_URL_ENV, None)
+    else:
+        os.environ[BASE_URL_ENV] = previous
+
+
+@pytest.fixture(scope="session", autouse=True)
+def http_cassette(request):
+    """Кассета HTTP-ответов на весь прогон, включается опцией --cassette"""
+    path = request.config.getoption("cassette")
+    if not path:
+        yield None
+        return
+    os.environ[CASSETTE_ENV] = path
+    os.environ[CASSETTE_MODE_ENV] = request.config.getoption("cassette_mode")
+    yield Cassette.open(path, os.environ[CASSETTE_MODE_ENV])
+    Cassette.close_all()
+    os.environ.pop(CASSETTE_ENV, None)
+    os.environ.pop(CASSETTE_MODE_ENV, None)
+
+
+@pytest.fixture(scope="session")
+def login_cache(request):
+    """Кэш авторизованных сессий на весь прогон (или воркер xdist)"""
+    store_path = None
+    if request.config.getoption("auth_cache_shared") and getattr(request.config, "cache", None):
+        store_path = str(request.config.cache.mkdir("auth_cache") / "sessions.json")
+    return LoginCache(ttl=request.config.getoption("auth_cache_ttl"), store_path=store_path)
+
+
+@pytest.fixture(scope="session")
+def test_user(webshop_base_url, http_cassette):
+    """
+    Аккаунт текущего воркера xdist на основе TestData.TEST_USER
+
+    Регистрируется один раз на воркер, корзина и список желаний в начале прогона очищаются.
+    """
+    user = worker_user()
+    api = ensure_registered(user)
+    api.clear_cart()
+    api.clear_wishlist()
+    return user
+
+
+@pytest.fixture
+def new_user(request, http_cassette):
+    """
+    Данные пользователя, которого еще нет в магазине
+
+    С кассетой email строится из nodeid теста, чтобы запрос регистрации
+    при воспроизведении совпал с записанным.
+    """
+    return unique_user(seed=request.node.nodeid if http_cassette is not None else None)
+
+
+@pytest.fixture(scope="session")
+def account_pool(request, webshop_base_url, http_cassette):
+    """Пул аккаунтов воркера, регистрация идет в фоне с первого обращения"""
+    size = request.config.getoption("account_pool_size")
+    pool = AccountPool(size=size, concurrency=size).fill()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def pooled_account(account_pool):
+    """Зарегистрированный и авторизованный аккаунт из пула с пустыми корзиной и списком желаний"""
+    with allure.step("Берем аккаунт из пула"):
+        account = account_pool.acquire()
+    yield account
+    account_pool.release(account)
+
+
+@pytest.fixture
+def authenticated_api(login_cache, test_user):
+    """Клиент API, уже авторизованный под аккаунтом воркера; корзина после теста очищается"""
+    with allure.step("Получаем авторизованную сессию из кэша"):
+        api = login_cache.get_api(
+            email=test_user["email"],
+            password=test_user["password"]
+        )
+    yield api
+    with allure.step("Очищаем корзину тестового аккаунта"):
+        api.clear_cart()
+
+
+def _chrome_options() -> Options:
     options = Options()
     options.add_argument('--headless')  # опционально для запуска в фоновом режиме (проверить на разных браузерах)
     # Тут можно добавить другие опции для браузера
-    browser.config.driver_options = options
-    
-    browser.open('')
+    return options
+
+
+@pytest.fixture(scope="session")
+def browser_pool(request, webshop_base_url):
+    """Пул прогретых браузеров на воркер, включается опцией --browser-pool"""
+    size = request.config.getoption("browser_pool")
+    if not size:
+        yield None
+        return
+    pool = BrowserPool(size=size, factory=lambda: webdriver.Chrome(options=_chrome_options()),
+                       origins=[webshop_base_url])
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="function")
+def browser_management(browser_pool, webshop_base_url):
+    browser.config.window_width = 1920
+    browser.config.window_height = 1080
+    browser.config.timeout = 10
+    browser.config.base_url = webshop_base_url
+    browser.config.driver_options = _chrome_options()
+
+    driver = None
+    if browser_pool:
+        driver = browser_pool.acquire()
+        browser.config.driver = driver
+
+    with section("browser.open"):
+        browser.open('')
     
     yield
     
-    attach_all_artifacts(browser) # добавляю в отчет allure все артефакты
+    with section("attach_all_artifacts"):
+        attachments.attach_all_artifacts(browser) # артефакты снимаются сразу, а сжимаются в фоне
+
+    with section("browser.release" if browser_pool else "browser.quit"):
+        if browser_pool:
+            browser_pool.release(driver)  # браузер не закрываем, а очищаем и возвращаем в пул
+        else:
+            browser.quit()
+
+
+@pytest.fixture
+def logged_in_browser(request, browser_management, login_cache, test_user):
+    """
+    Браузер, авторизованный под аккаунтом воркера без формы входа
+
+    Вход выполняется через API, куки сессии переносятся в браузер. Корзина
+    наполняется через API по маркеру @pytest.mark.seed_cart(75, (31, 2)).
+    Возвращает клиент API той же сессии; корзина после теста очищается.
+    """
+    api = login_cache.get_api(email=test_user["email"], password=test_user["password"])
+    marker = request.node.get_closest_marker("seed_cart")
+    if marker and marker.args:
+        seed_cart(api, marker.args)
+    transfer_session(api, browser.driver)
+    with section("browser.open"):
+        browser.open('')
+    yield api
+    with allure.step("Очищаем корзину тестового аккаунта"):
+        api.clear_cart()
+
 
-    browser.quit()
\ No newline at end of file
+@pytest.fixture(autouse=True)
+def _browser_for_ui_tests(request):
+    """Браузер поднимается только для тестов с маркером ui"""
+    if request.node.get_closest_marker("ui"):
+        request.getfixturevalue("browser_management")
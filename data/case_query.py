@@ -0,0 +1,273 @@
+"""
+Составные запросы к каталогу тест-кейсов
+
+Каждое условие превращается в битовую маску над порядковыми номерами кейсов,
+а AND/OR/NOT - в побитовые операции, поэтому запрос не перебирает каталог.
+
+Запрос можно собрать из объектов:
+    >>> query = Q.tag("smoke") & Q.layer("API") & Q.severity("blocker", "critical") & ~Q.tag("negative")
+    >>> select(query)
+
+или записать строкой (так же работает CLI):
+    >>> select("smoke and layer=API and severity in (blocker, critical) and not negative")
+
+Регистр значений не учитывается: "API" находит кейсы с тегом api, "layer=api" - слой API.
+
+Запуск из командной строки:
+    python -m data.case_query "smoke and not layer=UI"
+"""
+
+import argparse
+import re
+from abc import ABC, abstractmethod
+from typing import List, Optional, Union
+
+from data.test_cases import TestCase, TestCaseRegistry, get_registry, print_test_cases
+
+
+ATTRIBUTES = ("tag", "id", "layer", "feature", "severity", "automated")
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class Query(ABC):
+    """Условие на тест-кейсы, вычисляется в битовую маску"""
+
+    @abstractmethod
+    def mask(self, registry: TestCaseRegistry) -> int:
+        """Битовая маска кейсов каталога, подходящих под условие"""
+
+    def __and__(self, other: "Query") -> "Query":
+        return _And(self, other)
+
+    def __or__(self, other: "Query") -> "Query":
+        return _Or(self, other)
+
+    def __invert__(self) -> "Query":
+        return _Not(self)
+
+
+class Q(Query):
+    """
+    Условие на атрибут: значение равно одному из перечисленных
+
+    Args:
+        attr: Атрибут кейса (tag, id, layer, feature, severity, automated)
+        values: Допустимые значения (для тегов - кейс содержит хотя бы один из тегов)
+    """
+
+    def __init__(self, attr: str, *values: str):
+        if attr not in ATTRIBUTES:
+            raise QuerySyntaxError(f"Неизвестный атрибут {attr!r}, доступны: {', '.join(ATTRIBUTES)}")
+        if not values:
+            raise QuerySyntaxError(f"Для атрибута {attr!r} не задано ни одного значения")
+        self.attr = attr
+        self.values = values
+
+    @classmethod
+    def tag(cls, *values: str) -> "Q":
+        return cls("tag", *values)
+
+    @classmethod
+    def id(cls, *values: str) -> "Q":
+        return cls("id", *values)
+
+    @classmethod
+    def layer(cls, *values: str) -> "Q":
+        return cls("layer", *values)
+
+    @classmethod
+    def feature(cls, *values: str) -> "Q":
+        return cls("feature", *values)
+
+    @classmethod
+    def severity(cls, *values: str) -> "Q":
+        return cls("severity", *values)
+
+    @classmethod
+    def automated(cls, value: bool = True) -> "Q":
+        return cls("automated", "true" if value else "false")
+
+    def mask(self, registry: TestCaseRegistry) -> int:
+        result = 0
+        for value in self.values:
+            result |= registry.mask(self.attr, value)
+        return result
+
+    def __repr__(self) -> str:
+        return f"Q({self.attr!r}, {', '.join(map(repr, self.values))})"
+
+
+class _And(Query):
+    def __init__(self, left: Query, right: Query):
+        self.left, self.right = left, right
+
+    def mask(self, registry: TestCaseRegistry) -> int:
+        left = self.left.mask(registry)
+        return left & self.right.mask(registry) if left else 0
+
+
+class _Or(Query):
+    def __init__(self, left: Query, right: Query):
+        self.left, self.right = left, right
+
+    def mask(self, registry: TestCaseRegistry) -> int:
+        return self.left.mask(registry) | self.right.mask(registry)
+
+
+class _Not(Query):
+    def __init__(self, query: Query):
+        self.query = query
+
+    def mask(self, registry: TestCaseRegistry) -> int:
+        return registry.all_mask & ~self.query.mask(registry)
+
+
+# --- разбор строки запроса ---
+
+_TOKEN = re.compile(r'\s*(?:(?P<punct>[(),=])|"(?P<quoted>[^"]*)"|(?P<word>[^\s(),="]+))')
+_KEYWORDS = {"and", "or", "not", "in"}
+
+
+def _tokenize(text: str) -> List[tuple]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match:
+            raise QuerySyntaxError(f"Не удалось разобрать запрос с позиции {position}: {text[position:]!r}")
+        position = match.end()
+        if match.group("punct"):
+            tokens.append(("punct", match.group("punct")))
+        elif match.group("quoted") is not None:
+            tokens.append(("value", match.group("quoted")))
+        elif match.group("word").lower() in _KEYWORDS:
+            tokens.append(("keyword", match.group("word").lower()))
+        else:
+            tokens.append(("value", match.group("word")))
+    return tokens
+
+
+class _Parser:
+    """
+    Рекурсивный спуск по грамматике:
+        expr   := term ("or" term)*
+        term   := factor ("and" factor)*
+        factor := "not" factor | "(" expr ")" | atom
+        atom   := VALUE                          (тег)
+                | ATTR "=" VALUE
+                | ATTR "in" "(" VALUE ("," VALUE)* ")"
+    """
+
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def parse(self) -> Query:
+        if not self.tokens:
+            raise QuerySyntaxError("Пустой запрос")
+        query = self._expr()
+        if self._peek() is not None:
+            raise QuerySyntaxError(f"Лишний фрагмент запроса: {self._peek()[1]!r}")
+        return query
+
+    def _peek(self) -> Optional[tuple]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _take(self, kind: str, value: Optional[str] = None) -> str:
+        token = self._peek()
+        if token is None or token[0] != kind or (value is not None and token[1] != value):
+            expected = value or kind
+            found = token[1] if token else "конец запроса"
+            raise QuerySyntaxError(f"Ожидалось {expected!r}, найдено {found!r}")
+        self.position += 1
+        return token[1]
+
+    def _accept(self, kind: str, value: str) -> bool:
+        if self._peek() == (kind, value):
+            self.position += 1
+            return True
+        return False
+
+    def _expr(self) -> Query:
+        query = self._term()
+        while self._accept("keyword", "or"):
+            query = query | self._term()
+        return query
+
+    def _term(self) -> Query:
+        query = self._factor()
+        while self._accept("keyword", "and"):
+            query = query & self._factor()
+        return query
+
+    def _factor(self) -> Query:
+        if self._accept("keyword", "not"):
+            return ~self._factor()
+        if self._accept("punct", "("):
+            query = self._expr()
+            self._take("punct", ")")
+            return query
+        return self._atom()
+
+    def _atom(self) -> Query:
+        name = self._take("value")
+        if self._accept("punct", "="):
+            return Q(name, self._take("value"))
+        if self._accept("keyword", "in"):
+            self._take("punct", "(")
+            values = [self._take("value")]
+            while self._accept("punct", ","):
+                values.append(self._take("value"))
+            self._take("punct", ")")
+            return Q(name, *values)
+        return Q.tag(name)
+
+
+def parse_query(text: str) -> Query:
+    """Разбор строки вида 'smoke and layer=API and not negative'"""
+    return _Parser(text).parse()
+
+
+def select(query: Union[Query, str], registry: Optional[TestCaseRegistry] = None) -> List[TestCase]:
+    """
+    Тест-кейсы, подходящие под запрос
+
+    Args:
+        query: Запрос (Query или строка)
+        registry: Каталог (по умолчанию - общий каталог из data.test_cases)
+
+    Returns:
+        List[TestCase]: Кейсы в порядке каталога
+    """
+    if registry is None:
+        registry = get_registry()
+    if isinstance(query, str):
+        query = parse_query(query)
+    return registry.from_mask(query.mask(registry))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Выборка тест-кейсов по составному запросу")
+    parser.add_argument("query", help='Запрос, например: "smoke and layer=API and not negative"')
+    parser.add_argument("--ids", action="store_true", help="Печатать только id кейсов")
+    parser.add_argument("--count", action="store_true", help="Печатать только количество кейсов")
+    args = parser.parse_args(argv)
+
+    try:
+        cases = select(args.query)
+    except QuerySyntaxError as error:
+        parser.error(str(error))
+    if args.count:
+        print(len(cases))
+    elif args.ids:
+        print("\n".join(case.id for case in cases))
+    else:
+        print_test_cases(cases, args.query)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Загрузка каталога тест-кейсов из внешних файлов
+
+Каждая функциональность описана в своем файле data/cases/<Раздел>.yaml
+(или .yml/.json): имя тестовой функции -> поля тест-кейса. Файл раздела
+читается только при первом обращении к разделу, а разобранное содержимое
+сохраняется в data/cases/__pycache__/<файл>.pickle. Кэш считается актуальным,
+пока не изменились mtime и размер файла; если изменились, но содержимое
+(sha256) то же самое - кэш используется без повторного разбора.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from typing import Callable, Dict, Iterator, Mapping, Optional, TypeVar
+
+CASES_DIR_ENV = "DEMOWEBSHOP_CASES_DIR"
+DEFAULT_CASES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cases")
+CACHE_DIR_NAME = "__pycache__"
+
+SOURCE_EXTENSIONS = (".yaml", ".yml", ".json")
+
+# Версия формата кэша: при изменении полей TestCase старые кэши пересобираются
+_CACHE_FORMAT = 1
+
+T = TypeVar("T")
+
+
+def get_cases_dir() -> str:
+    """Каталог с файлами тест-кейсов: переменная окружения DEMOWEBSHOP_CASES_DIR или data/cases"""
+    return os.environ.get(CASES_DIR_ENV, DEFAULT_CASES_DIR)
+
+
+class LazyCatalog(Mapping[str, Dict[str, T]]):
+    """
+    Раздел -> {имя тестовой функции: тест-кейс}, разделы загружаются по требованию
+
+    Список разделов берется из имен файлов, сами файлы не открываются,
+    пока раздел не запрошен.
+
+    Args:
+        factory: Конструктор тест-кейса из словаря полей
+        directory: Каталог с файлами разделов
+        fields: Порядок полей, в котором они хранятся в кэше
+    """
+
+    def __init__(self, factory: Callable[..., T], fields: tuple, directory: Optional[str] = None):
+        self.factory = factory
+        self.fields = fields
+        self.directory = directory or get_cases_dir()
+        self._loaded: Dict[str, Dict[str, T]] = {}
+        self._lock = threading.Lock()
+        self._sources = self._discover()
+
+    def _discover(self) -> Dict[str, str]:
+        if not os.path.isdir(self.directory):
+            return {}
+        sources = {}
+        for name in sorted(os.listdir(self.directory)):
+            feature, ext = os.path.splitext(name)
+            if ext in SOURCE_EXTENSIONS and not feature.startswith("."):
+                if feature in sources:
+                    raise ValueError(f"Раздел {feature} описан в нескольких файлах в {self.directory}")
+                sources[feature] = os.path.join(self.directory, name)
+        return sources
+
+    def __getitem__(self, feature: str) -> Dict[str, T]:
+        cases = self._loaded.get(feature)
+        if cases is not None:
+            return cases
+        path = self._sources[feature]
+        with self._lock:
+            if feature not in self._loaded:
+                rows = _load_compiled(path, self.fields)
+                self._loaded[feature] = {key: self.factory(*values) for key, values in rows}
+        return self._loaded[feature]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sources)
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def __contains__(self, feature) -> bool:
+        return feature in self._sources
+
+    def is_loaded(self, feature: str) -> bool:
+        return feature in self._loaded
+
+    def signature(self) -> list:
+        """Каталог, имена, mtime и размеры файлов разделов - меняется при любой правке каталога"""
+        result: list = [self.directory]
+        for path in self._sources.values():
+            stat = os.stat(path)
+            result.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+        return result
+
+
+def _load_compiled(path: str, fields: tuple) -> list:
+    """Строки раздела [(ключ, значения полей)] из кэша или из исходного файла"""
+    cache_path = _cache_path(path)
+    stat = os.stat(path)
+    signature = (_CACHE_FORMAT, fields, stat.st_mtime_ns, stat.st_size)
+
+    cached = _read_cache(cache_path)
+    if cached is not None and cached["signature"] == signature:
+        return cached["rows"]
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if cached is not None and cached["signature"][:2] == signature[:2] and cached["sha256"] == digest:
+        rows = cached["rows"]
+    else:
+        rows = _compile(path, raw, fields)
+    _write_cache(cache_path, {"signature": signature, "sha256": digest, "rows": rows})
+    return rows
+
+
+def _compile(path: str, raw: bytes, fields: tuple) -> list:
+    data = _parse(path, raw) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: ожидается словарь 'имя теста -> тест-кейс'")
+    rows = []
+    for key, case in data.items():
+        missing = [name for name in fields if name not in case and name != "automated"]
+        if missing:
+            raise ValueError(f"{path}: у кейса {key} не заданы поля {', '.join(missing)}")
+        unknown = set(case) - set(fields)
+        if unknown:
+            raise ValueError(f"{path}: у кейса {key} неизвестные поля {', '.join(sorted(unknown))}")
+        values = tuple(
+            tuple(value) if isinstance(value, list) else value
+            for value in (case.get(name, True) for name in fields)
+        )
+        rows.append((key, values))
+    return rows
+
+
+def _parse(path: str, raw: bytes):
+    if path.endswith(".json"):
+        return json.loads(raw.decode("utf-8"))
+    try:
+        import yaml
+    except ImportError as error:
+        raise ImportError(f"Для чтения {path} нужен PyYAML: pip install pyyaml") from error
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(raw, Loader=loader)
+
+
+def _cache_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR_NAME, name + ".pickle")
+
+
+def _read_cache(cache_path: str) -> Optional[dict]:
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    return cached if isinstance(cached, dict) and "signature" in cached else None
+
+
+def _write_cache(cache_path: str, payload: dict):
+    # Кэш - оптимизация: каталог только для чтения не мешает загрузке
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
@@ -1,201 +1,233 @@
 """
 Модуль содержит описания всех тест-кейсов проекта.
-Каждый тест-кейс описан как словарь с подробной информацией.
+Сами тест-кейсы лежат в data/cases/<Раздел>.yaml и загружаются лениво (data/catalog.py).
+
+Поиск по тест-кейсам идет через TestCaseRegistry: индексы по id, тегу,
+слою, функциональности и критичности строятся один раз при добавлении кейсов.
 """
 
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Union
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from data.catalog import LazyCatalog
 
 
-@dataclass
-class TestCase:
+class _TestCaseFields(NamedTuple):
     id: str
     title: str
     description: str
-    preconditions: List[str]
-    steps: List[str]
+    preconditions: Tuple[str, ...]
+    steps: Tuple[str, ...]
     expected_result: str
     severity: str
     layer: str  # UI/API
     feature: str
-    tags: List[str]
+    tags: Tuple[str, ...]
     automated: bool = True
 
 
-# UI тест-кейсы для раздела Регистрации
-registration_test_cases = {
-    "test_successful_registration": TestCase(
-        id="REG-001",
-        title="Успешная регистрация нового пользователя",
-        description="Проверка успешной регистрации пользователя с валидными данными",
-        preconditions=[
-            "Открыт браузер",
-            "Пользователь находится на странице регистрации"
-        ],
-        steps=[
-            "Заполнить поле Email валидным значением",
-            "Заполнить поле Password",
-            "Заполнить поле Confirm Password тем же значением",
-            "Нажать кнопку Register"
-        ],
-        expected_result="Пользователь успешно зарегистрирован и авторизован в системе",
-        severity="critical",
-        layer="UI",
-        feature="Registration",
-        tags=["smoke", "registration", "positive"],
-        automated=True
-    ),
-    
-    "test_registration_with_existing_email": TestCase(
-        id="REG-002",
-        title="Регистрация с существующим email",
-        description="Проверка невозможности регистрации с уже существующим email",
-        preconditions=[
-            "Открыт браузер",
-            "В системе уже есть зарегистрированный пользователь",
-            "Пользователь находится на странице регистрации"
-        ],
-        steps=[
-            "Заполнить поле Email существующим значением",
-            "Заполнить поле Password",
-            "Заполнить поле Confirm Password",
-            "Нажать кнопку Register"
-        ],
-        expected_result="Отображается сообщение об ошибке о существующем email",
-        severity="critical",
-        layer="UI",
-        feature="Registration",
-        tags=["registration", "negative"],
-        automated=True
-    )
-}
+class TestCase(_TestCaseFields):
+    """
+    Неизменяемое описание тест-кейса
 
-# UI тест-кейсы для раздела Логина
-login_test_cases = {
-    "test_successful_login": TestCase(
-        id="LOGIN-001",
-        title="Успешный вход в систему",
-        description="Проверка входа в систему с валидными учетными данными",
-        preconditions=[
-            "Открыт браузер",
-            "Пользователь зарегистрирован в системе"
-        ],
-        steps=[
-            "Перейти на страницу логина",
-            "Ввести валидный email",
-            "Ввести валидный пароль",
-            "Нажать кнопку Login"
-        ],
-        expected_result="Пользователь успешно авторизован",
-        severity="blocker",
-        layer="UI",
-        feature="Login",
-        tags=["smoke", "login", "positive"],
-        automated=True
-    )
-}
+    Именованный кортеж: без словаря атрибутов, сравнивается и хэшируется по
+    значениям полей. Списки (предусловия, шаги, теги) приводятся к кортежам,
+    поэтому кейс можно использовать как ключ словаря.
+    """
 
-# API тест-кейсы
-api_test_cases = {
-    "test_get_user_profile": TestCase(
-        id="API-001",
-        title="Получение профиля пользователя",
-        description="Проверка получения данных профиля авторизованного пользователя",
-        preconditions=[
-            "Пользователь авторизован",
-            "Получен валидный токен авторизации"
-        ],
-        steps=[
-            "Отправить GET запрос на эндпоинт /api/profile",
-            "Проверить статус код ответа",
-            "Проверить структуру ответа"
-        ],
-        expected_result="Получен корректный ответ с данными профиля пользователя",
-        severity="critical",
-        layer="API",
-        feature="User Profile",
-        tags=["api", "profile", "smoke"],
-        automated=True
-    )
-}
+    __test__ = False  # не тестовый класс для pytest
+    __slots__ = ()
 
-# Корзина
-cart_test_cases = {
-    "test_add_item_to_cart": TestCase(
-        id="CART-001",
-        title="Добавление товара в корзину",
-        description="Проверка добавления товара в корзину авторизованным пользователем",
-        preconditions=[
-            "Пользователь авторизован",
-            "Открыта страница с товаром"
-        ],
-        steps=[
-            "Нажать кнопку 'Add to cart'",
-            "Перейти в корзину",
-            "Проверить наличие добавленного товара"
-        ],
-        expected_result="Товар успешно добавлен в корзину",
-        severity="critical",
-        layer="UI",
-        feature="Shopping Cart",
-        tags=["cart", "smoke", "positive"],
-        automated=True
-    ),
-    
-    "test_view_cart": TestCase(
-        id="CART-002",
-        title="Просмотр содержимого корзины",
-        description="Проверка отображения содержимого корзины авторизованного пользователя",
-        preconditions=[
-            "Пользователь авторизован",
-            "В корзине есть товары"
-        ],
-        steps=[
-            "Открыть страницу корзины",
-            "Проверить загрузку страницы",
-            "Проверить отображение товаров"
-        ],
-        expected_result="Страница корзины успешно загружена, товары отображаются корректно",
-        severity="critical",
-        layer="UI",
-        feature="Shopping Cart",
-        tags=["cart", "smoke", "positive"],
-        automated=True
-    ),
-    
-    "test_add_multiple_products": TestCase(
-        id="CART-003",
-        title="Добавление нескольких товаров в корзину",
-        description="Проверка добавления нескольких разных товаров в корзину",
-        preconditions=[
-            "Пользователь авторизован",
-            "Доступны разные товары для добавления"
-        ],
-        steps=[
-            "Добавить первый товар в корзину",
-            "Проверить успешность добавления",
-            "Добавить второй товар в корзину",
-            "Проверить успешность добавления",
-            "Открыть корзину",
-            "Проверить наличие всех добавленных товаров"
-        ],
-        expected_result="Все товары успешно добавлены в корзину и отображаются в ней",
-        severity="normal",
-        layer="UI",
-        feature="Shopping Cart",
-        tags=["cart", "positive"],
-        automated=True
-    )
-}
+    def __new__(cls, id: str, title: str, description: str, preconditions: Sequence[str],
+                steps: Sequence[str], expected_result: str, severity: str, layer: str,
+                feature: str, tags: Sequence[str], automated: bool = True):
+        return super().__new__(cls, id, title, description, tuple(preconditions), tuple(steps),
+                               expected_result, severity, layer, feature, tuple(tags), automated)
+
+    def __repr__(self):
+        return f"TestCase(id={self.id!r}, title={self.title!r}, layer={self.layer!r}, severity={self.severity!r})"
+
+
+class TestCaseRegistry:
+    """
+    Каталог тест-кейсов с индексами
+
+    Кейсы хранятся в порядке добавления (порядковый номер - позиция в списке),
+    индексы и статистика покрытия обновляются при каждом добавлении.
+    Для составных запросов (data/case_query.py) каждому значению атрибута
+    сопоставлена битовая маска над порядковыми номерами кейсов.
+
+    Example:
+        >>> registry = TestCaseRegistry.from_features(all_test_cases)
+        >>> registry.get("REG-001").title
+        >>> registry.by_tag("smoke")
+    """
+
+    __test__ = False
+
+    def __init__(self):
+        self._cases: List[TestCase] = []
+        self._by_key: Dict[str, TestCase] = {}
+        self._by_id: Dict[str, TestCase] = {}
+        self._by_tag: Dict[str, List[TestCase]] = defaultdict(list)
+        self._by_layer: Dict[str, List[TestCase]] = defaultdict(list)
+        self._by_feature: Dict[str, List[TestCase]] = defaultdict(list)
+        self._by_severity: Dict[str, List[TestCase]] = defaultdict(list)
+        self._bits: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._automated = 0
+
+    @classmethod
+    def from_features(cls, features: Dict[str, Dict[str, TestCase]]) -> "TestCaseRegistry":
+        registry = cls()
+        for feature, cases in features.items():
+            registry.add_feature(feature, cases)
+        return registry
+
+    def add(self, key: str, case: TestCase, feature: Optional[str] = None):
+        """
+        Добавление тест-кейса
+
+        Args:
+            key: Имя тестовой функции, к которой относится кейс
+            case: Тест-кейс
+            feature: Раздел каталога (по умолчанию - case.feature)
+        """
+        if case.id in self._by_id:
+            raise ValueError(f"Тест-кейс с id {case.id} уже есть в каталоге")
+        if key in self._by_key:
+            raise ValueError(f"Тест {key} уже связан с кейсом {self._by_key[key].id}")
+        bit = 1 << len(self._cases)
+        self._cases.append(case)
+        self._by_key[key] = case
+        self._by_id[case.id] = case
+        for tag in dict.fromkeys(case.tags):
+            self._by_tag[tag].append(case)
+        self._by_layer[case.layer].append(case)
+        self._by_feature[feature or case.feature].append(case)
+        self._by_severity[case.severity].append(case)
+        self._automated += case.automated
+        for attr, value in self._attributes(case, feature or case.feature):
+            self._bits[attr, value.casefold()] |= bit
+
+    def add_feature(self, feature: str, cases: Dict[str, TestCase]):
+        for key, case in cases.items():
+            self.add(key, case, feature)
+
+    def get(self, test_id: str) -> Optional[TestCase]:
+        return self._by_id.get(test_id)
+
+    def for_test(self, name: str) -> Optional[TestCase]:
+        """Кейс по имени тестовой функции"""
+        return self._by_key.get(name)
 
-# Словарь всех тест-кейсов по разделам
-all_test_cases = {
-    "Registration": registration_test_cases,
-    "Login": login_test_cases,
-    "API": api_test_cases,
-    "Cart": cart_test_cases
+    def by_tag(self, tag: str) -> List[TestCase]:
+        return list(self._by_tag.get(tag, ()))
+
+    def by_layer(self, layer: str) -> List[TestCase]:
+        return list(self._by_layer.get(layer, ()))
+
+    def by_feature(self, feature: str) -> List[TestCase]:
+        return list(self._by_feature.get(feature, ()))
+
+    def by_severity(self, severity: str) -> List[TestCase]:
+        return list(self._by_severity.get(severity, ()))
+
+    def mask(self, attr: str, value: str) -> int:
+        """
+        Битовая маска кейсов, у которых атрибут attr равен value (для тегов - содержит тег)
+
+        Регистр значения не учитывается: 'API', 'api' и 'Api' - одно и то же.
+        """
+        return self._bits.get((attr, value.casefold()), 0)
+
+    @property
+    def all_mask(self) -> int:
+        return (1 << len(self._cases)) - 1
+
+    def from_mask(self, mask: int) -> List[TestCase]:
+        """Кейсы по битовой маске в порядке добавления"""
+        cases = []
+        while mask:
+            low = mask & -mask
+            cases.append(self._cases[low.bit_length() - 1])
+            mask ^= low
+        return cases
+
+    @staticmethod
+    def _attributes(case: TestCase, feature: str) -> Iterator[Tuple[str, str]]:
+        for tag in case.tags:
+            yield "tag", tag
+        yield "id", case.id
+        yield "layer", case.layer
+        yield "feature", feature
+        yield "severity", case.severity
+        yield "automated", "true" if case.automated else "false"
+
+    @property
+    def features(self) -> List[str]:
+        return list(self._by_feature)
+
+    @property
+    def tags(self) -> List[str]:
+        return list(self._by_tag)
+
+    def coverage_stats(self) -> Dict[str, Union[int, float]]:
+        total = len(self._cases)
+        return {
+            "total": total,
+            "automated": self._automated,
+            "coverage_percentage": (self._automated / total) * 100 if total else 0.0
+        }
+
+    def items(self) -> Iterable[Tuple[str, TestCase]]:
+        return self._by_key.items()
+
+    def __len__(self) -> int:
+        return len(self._cases)
+
+    def __iter__(self) -> Iterator[TestCase]:
+        return iter(self._cases)
+
+    def __contains__(self, test_id: str) -> bool:
+        return test_id in self._by_id
+
+
+# Все тест-кейсы по разделам: файлы data/cases/<Раздел>.yaml, раздел загружается при первом обращении
+all_test_cases = LazyCatalog(TestCase, TestCase._fields)
+
+_registry: Optional[TestCaseRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> TestCaseRegistry:
+    """Каталог с индексами, строится из всех разделов при первом обращении"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TestCaseRegistry.from_features(all_test_cases)
+    return _registry
+
+
+# Прежние имена словарей разделов: имя тестовой функции -> TestCase
+_FEATURE_ALIASES = {
+    "registration_test_cases": "Registration",
+    "login_test_cases": "Login",
+    "api_test_cases": "API",
+    "cart_test_cases": "Cart",
 }
 
+
+def __getattr__(name):
+    # registry остается атрибутом модуля, но строится только при обращении к нему
+    if name == "registry":
+        return get_registry()
+    # Словари разделов загружают только свой файл; копия, чтобы изменения не попали в каталог
+    if name in _FEATURE_ALIASES:
+        return dict(all_test_cases[_FEATURE_ALIASES[name]])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Получение статистики по покрытию тестами
 def get_test_coverage_stats() -> Dict[str, Union[int, float]]:
     """
@@ -228,20 +260,7 @@ def get_test_coverage_stats() -> Dict[str, Union[int, float]]:
         >>> print(f"Автоматизировано: {stats['automated']}")  # Автоматизировано: 8
         >>> print(f"Процент покрытия: {stats['coverage_percentage']}%")  # Процент покрытия: 80.0%
     """
-    total_tests = 0
-    automated_tests = 0
-    
-    for feature_tests in all_test_cases.values():
-        for test in feature_tests.values():
-            total_tests += 1
-            if test.automated:
-                automated_tests += 1
-                
-    return {
-        "total": total_tests,
-        "automated": automated_tests,
-        "coverage_percentage": (automated_tests / total_tests) * 100
-    }
+    return get_registry().coverage_stats()
 
 def get_test_case_by_id(test_id: str) -> Optional[TestCase]:
     """
@@ -253,11 +272,7 @@ def get_test_case_by_id(test_id: str) -> Optional[TestCase]:
     Returns:
         Optional[TestCase]: Найденный тест-кейс или None, если тест не найден
     """
-    for feature_tests in all_test_cases.values():
-        for test in feature_tests.values():
-            if test.id == test_id:
-                return test
-    return None
+    return get_registry().get(test_id)
 
 def get_tests_by_tag(tag: str) -> List[TestCase]:
     """
@@ -269,11 +284,7 @@ def get_tests_by_tag(tag: str) -> List[TestCase]:
     Returns:
         List[TestCase]: Список тест-кейсов с указанным тегом
     """
-    return [
-        test for tests in all_test_cases.values() 
-        for test in tests.values() 
-        if tag in test.tags
-    ]
+    return get_registry().by_tag(tag)
 
 def get_tests_by_layer(layer: str) -> List[TestCase]:
     """
@@ -285,11 +296,7 @@ def get_tests_by_layer(layer: str) -> List[TestCase]:
     Returns:
         List[TestCase]: Список тест-кейсов выбранного слоя
     """
-    return [
-        test for tests in all_test_cases.values() 
-        for test in tests.values() 
-        if test.layer == layer
-    ]
+    return get_registry().by_layer(layer)
 
 def get_tests_by_feature(feature: str) -> List[TestCase]:
     """
@@ -301,7 +308,10 @@ def get_tests_by_feature(feature: str) -> List[TestCase]:
     Returns:
         List[TestCase]: Список тест-кейсов выбранной функциональности
     """
-    return all_test_cases.get(feature, {}).values()
+    # Для одного раздела достаточно загрузить только его файл
+    if _registry is None:
+        return list(all_test_cases.get(feature, {}).values())
+    return get_registry().by_feature(feature)
 
 def get_tests_by_severity(severity: str) -> List[TestCase]:
     """
@@ -313,11 +323,7 @@ def get_tests_by_severity(severity: str) -> List[TestCase]:
     Returns:
         List[TestCase]: Список тест-кейсов выбранной критичности
     """
-    return [
-        test for tests in all_test_cases.values() 
-        for test in tests.values() 
-        if test.severity == severity
-    ]
+    return get_registry().by_severity(severity)
 
 def get_smoke_tests() -> List[TestCase]:
     """
@@ -346,7 +352,7 @@ def print_test_cases(tests: List[TestCase], title: str = "Тест-кейсы"):
         print(f"Теги: {', '.join(test.tags)}")
         print("-" * 50)
 
-# Примеры использования:
+# Примеры использования (запуск: python -m data.test_cases):
 if __name__ == "__main__":
     # Получение и вывод всех smoke-тестов
     smoke_tests = get_smoke_tests()
@@ -362,4 +368,4 @@ if __name__ == "__main__":
     
     # Получение и вывод всех тестов регистрации
     registration_tests = get_tests_by_feature("Registration")
-    print_test_cases(list(registration_tests), "Тесты регистрации") 
\ No newline at end of file
+    print_test_cases(registration_tests, "Тесты регистрации") 
\ No newline at end of file
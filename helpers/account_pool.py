@@ -0,0 +1,180 @@
+"""
+Пул заранее зарегистрированных аккаунтов
+
+Регистрация выполняется пачкой в фоновых потоках, пока идут первые тесты.
+Тест получает уже авторизованный клиент и не тратит время на POST /register.
+Аккаунт считается "грязным", если через его клиент прошел изменяющий запрос
+(добавление в корзину, оформление заказа и т.п.). Такой аккаунт перед
+повторной выдачей очищается, а если очистить не удалось - выбывает из пула
+и заменяется новым.
+
+Ошибка фоновой регистрации не теряется: acquire поднимает ее, как только
+ждать больше нечего, а не по истечении таймаута. Ошибка поднимается один раз,
+следующий acquire регистрирует аккаунт заново (временный сбой не ломает пул).
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+import allure
+
+from helpers.api_helpers import DemoWebShopAPI
+from helpers.http_metrics import RequestRecord
+from helpers.test_accounts import ensure_registered, pool_user
+
+# Запросы, которые не меняют состояние аккаунта
+_CLEAN_OPERATIONS = {"login", "get_auth_token"}
+
+
+class PooledAccount:
+    """
+    Аккаунт из пула: данные пользователя и авторизованный клиент
+
+    Attributes:
+        user: Email, пароль, имя и фамилия
+        api: Клиент, авторизованный под этим аккаунтом
+        dirty: Через клиент прошел изменяющий запрос
+        uses: Сколько раз аккаунт выдавался тестам
+    """
+
+    def __init__(self, user: dict, api: DemoWebShopAPI):
+        self.user = user
+        self.api = api
+        self.dirty = False
+        self.uses = 0
+        api.session.request_hooks.append(self._on_request)
+
+    def _on_request(self, record: RequestRecord):
+        if record.method != "GET" and record.operation not in _CLEAN_OPERATIONS:
+            self.dirty = True
+
+    def mark_dirty(self):
+        """Явная пометка, например если тест менял данные профиля через браузер"""
+        self.dirty = True
+
+    def __repr__(self) -> str:
+        return f"<PooledAccount {self.user['email']} dirty={self.dirty} uses={self.uses}>"
+
+
+class AccountPool:
+    """
+    Пул аккаунтов с фоновой регистрацией
+
+    Args:
+        size: Сколько аккаунтов держать в пуле
+        concurrency: Сколько регистраций выполнять одновременно
+        user_factory: Данные n-го аккаунта (по умолчанию test_user+pool<n>-<воркер>@...)
+        timeout: Сколько ждать свободный аккаунт, с
+
+    Example:
+        >>> pool = AccountPool(size=4).fill()
+        >>> account = pool.acquire()
+        >>> account.api.add_to_cart(product_id=75)
+        >>> pool.release(account)  # корзина будет очищена перед следующей выдачей
+    """
+
+    def __init__(self, size: int = 4, concurrency: int = 4,
+                 user_factory: Callable[[int], dict] = pool_user, timeout: float = 60):
+        self.size = size
+        self.user_factory = user_factory
+        self.timeout = timeout
+        self.discarded = 0
+        self._available: "queue.Queue[PooledAccount]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="account-pool")
+        self._pending: List[Future] = []
+        self._errors: List[Exception] = []
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def fill(self) -> "AccountPool":
+        """Запуск фоновой регистрации недостающих аккаунтов, не дожидаясь ее окончания"""
+        with self._lock:
+            missing = self.size - self._created
+            for _ in range(max(0, missing)):
+                self._register_async()
+        return self
+
+    def acquire(self) -> PooledAccount:
+        """
+        Свободный аккаунт; если все заняты - регистрируется еще один
+
+        Raises:
+            RuntimeError: Фоновая регистрация упала, а других регистраций не идет
+                (исходная ошибка - в __cause__)
+            TimeoutError: Свободный аккаунт не появился за timeout секунд
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                account = self._available.get_nowait()
+                break
+            except queue.Empty:
+                pass
+            with self._lock:
+                self._pending = [future for future in self._pending if not future.done()]
+                if not self._pending:
+                    if self._errors:
+                        # Ошибка поднимается один раз: следующий acquire снова пробует регистрацию
+                        error = self._errors[0]
+                        self._errors.clear()
+                        raise RuntimeError(f"Не удалось зарегистрировать аккаунт для пула: {error}") from error
+                    self._register_async()
+                pending = list(self._pending)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Пул не выдал аккаунт за {self.timeout} с")
+            # Короткое ожидание: аккаунт может вернуть release, не дожидаясь регистрации
+            wait(pending, timeout=min(remaining, 0.5), return_when=FIRST_COMPLETED)
+        account.uses += 1
+        return account
+
+    def release(self, account: PooledAccount):
+        """Возврат аккаунта: грязный очищается, при ошибке очистки - заменяется новым"""
+        if account.dirty:
+            try:
+                reset_account(account)
+            except Exception:
+                self.discarded += 1
+                account.api.session.close()
+                with self._lock:
+                    self._created -= 1
+                self.fill()
+                return
+        self._available.put(account)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        while not self._available.empty():
+            self._available.get_nowait().api.session.close()
+
+    def _register_async(self):
+        number = self._created
+        self._created += 1
+        future = self._executor.submit(self._register, number)
+        self._pending.append(future)
+
+    def _register(self, number: int):
+        try:
+            user = self.user_factory(number)
+            api = ensure_registered(user)
+            account = PooledAccount(user, api)
+            # Аккаунт мог остаться от прошлого прогона: пул выдает только чистые
+            reset_account(account)
+        except Exception as error:
+            with self._lock:
+                self._created -= 1
+                self._errors.append(error)
+            raise
+        self._available.put(account)
+
+
+@allure.step("Очистка аккаунта из пула")
+def reset_account(account: PooledAccount):
+    """Пустые корзина и список желаний; аккаунт снова считается чистым"""
+    for response in (account.api.clear_cart(), account.api.clear_wishlist()):
+        if not response.page.is_empty:
+            raise RuntimeError(f"Не удалось очистить аккаунт {account.user['email']}")
+    account.dirty = False
@@ -1,14 +1,50 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import allure
-from typing import Optional, Dict, Any
+from helpers.attachments import attach, attach_response
+from helpers.page_models import (
+    PageResponse, AddToCartResult, CartAddOutcome, CartBatchResult, CartPage, CustomerProfile,
+    ProductList, WishlistPage,
+    parse_add_to_cart, parse_cart, parse_profile, parse_product_list, parse_wishlist,
+)
+from helpers.streaming import MarkerScan, scan_response
+from helpers.cassette import Cassette, mount_cassette
+from helpers.http_metrics import InstrumentedSession, tracked
+from helpers.response_cache import get_response_cache, mount_response_cache
+from helpers.transport import AUTH_COOKIE_NAMES, mount_shared_transport
+from typing import Optional, Dict, Any, Sequence, Tuple
+
+
+DEFAULT_BASE_URL = "https://demowebshop.tricentis.com"
+BASE_URL_ENV = "DEMOWEBSHOP_BASE_URL"
+
+
+def get_base_url() -> str:
+    """Адрес магазина: переменная окружения DEMOWEBSHOP_BASE_URL или боевой демо-сайт"""
+    return os.environ.get(BASE_URL_ENV, DEFAULT_BASE_URL).rstrip("/")
 
 
 class DemoWebShopAPI:
-    def __init__(self):
-        self.base_url = "https://demowebshop.tricentis.com"
-        self.session = requests.Session()
+    def __init__(self, base_url: Optional[str] = None, cassette: Optional[Cassette] = None):
+        self.base_url = (base_url or get_base_url()).rstrip("/")
+        # Сессия замеряет каждый запрос, обработчики - в self.session.request_hooks
+        self.session = InstrumentedSession()
+        # Пул соединений общий для всех клиентов процесса, куки у каждого свои
+        transport = mount_shared_transport(self.session)
+        # Кассета с записанными ответами: явно или через DEMOWEBSHOP_CASSETTE
+        if cassette is None:
+            cassette = Cassette.from_env()
+        if cassette is not None:
+            mount_cassette(self.session, cassette, inner=transport)
+        # Кэш ответов каталога и поиска, общий для клиентов процесса (включается --response-cache)
+        response_cache = get_response_cache()
+        if response_cache is not None:
+            mount_response_cache(self.session, response_cache, self.base_url)
     
     @allure.step("Выполняем вход через API")
+    @tracked
     def login(self, email: str, password: str) -> requests.Response:
         data = {
             "Email": email,
@@ -22,14 +58,11 @@ class DemoWebShopAPI:
         )
         
         # Добавим отладочную информацию
-        allure.attach(
-            response.text,
-            'response.html',
-            allure.attachment_type.HTML
-        )
+        attach_response(response, 'response.html')
         return response
     
     @allure.step("Регистрация нового пользователя")
+    @tracked
     def register(self, email: str, password: str, 
                 first_name: str, last_name: str, gender: str = "M") -> requests.Response:
         return self.session.post(
@@ -45,37 +78,91 @@ class DemoWebShopAPI:
         )
     
     @allure.step("Получение токена авторизации")
+    @tracked
     def get_auth_token(self) -> Optional[str]:
         # Добавим отладочную информацию
         all_cookies = self.session.cookies.get_dict()
-        allure.attach(
-            str(all_cookies),
-            'cookies.txt',
-            allure.attachment_type.TEXT
-        )
+        attach(str(all_cookies), 'cookies.txt', allure.attachment_type.TEXT)
         # Проверяем разные варианты имени куки
-        return (self.session.cookies.get("NOPCOMMERCE.AUTH") or 
-                self.session.cookies.get(".NOPCOMMERCE.AUTH") or
-                self.session.cookies.get("Authentication"))
+        for name in AUTH_COOKIE_NAMES:
+            token = self.session.cookies.get(name)
+            if token:
+                return token
+        return None
     
     @allure.step("Добавление товара в корзину")
-    def add_to_cart(self, product_id: int, quantity: int = 1) -> requests.Response:
-        return self.session.post(
+    @tracked
+    def add_to_cart(self, product_id: int, quantity: int = 1) -> PageResponse[AddToCartResult]:
+        return self._post_add_to_cart(product_id, quantity)
+    
+    @allure.step("Пакетное добавление товаров в корзину")
+    @tracked
+    def add_many_to_cart(self, items: Sequence[Tuple[int, int]], concurrency: int = 8,
+                         verify: bool = True) -> CartBatchResult:
+        """
+        Добавление нескольких товаров в корзину параллельными запросами одной сессии
+        
+        Args:
+            items: Пары (id товара, количество); повторы одного товара складываются
+            concurrency: Максимум одновременных запросов
+            verify: Загрузить корзину после всех добавлений (один запрос)
+        
+        Returns:
+            CartBatchResult: Результат по каждому товару и итоговая корзина
+        """
+        merged: Dict[int, int] = {}
+        for product_id, quantity in items:
+            merged[product_id] = merged.get(product_id, 0) + quantity
+        
+        def add(product_id: int, quantity: int) -> CartAddOutcome:
+            response = self._post_add_to_cart(product_id, quantity)
+            result = response.page
+            return CartAddOutcome(product_id=product_id, quantity=quantity, status_code=response.status_code,
+                                  success=response.ok and result.success, message=result.message)
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(merged) or 1))) as executor:
+            # Контекст копируется, чтобы запросы в потоках учитывались как add_many_to_cart
+            futures = [executor.submit(contextvars.copy_context().run, add, product_id, quantity)
+                       for product_id, quantity in merged.items()]
+            outcomes = [future.result() for future in futures]
+        
+        batch = CartBatchResult(outcomes=outcomes)
+        if verify:
+            batch.cart = self.get_cart().page
+        attach(lambda: batch.model_dump_json(indent=2), "cart_batch.json", allure.attachment_type.JSON)
+        return batch
+    
+    def _post_add_to_cart(self, product_id: int, quantity: int) -> PageResponse[AddToCartResult]:
+        return PageResponse(self.session.post(
             f"{self.base_url}/addproducttocart/catalog/{product_id}/1",
             data={
                 "quantity": quantity
             }
-        )
+        ), parse_add_to_cart)
     
     @allure.step("Получение содержимого корзины")
-    def get_cart(self) -> requests.Response:
-        return self.session.get(f"{self.base_url}/cart")
+    @tracked
+    def get_cart(self) -> PageResponse[CartPage]:
+        return PageResponse(self.session.get(f"{self.base_url}/cart"), parse_cart)
+    
+    @allure.step("Очистка корзины")
+    @tracked
+    def clear_cart(self) -> PageResponse[CartPage]:
+        """
+        Удаление всех товаров из корзины
+
+        Returns:
+            PageResponse[CartPage]: Страница корзины после очистки (без запроса на изменение, если корзина пуста)
+        """
+        return self._remove_items("cart", self.get_cart(), parse_cart)
     
     @allure.step("Получение информации о пользователе")
-    def get_customer_info(self) -> requests.Response:
-        return self.session.get(f"{self.base_url}/customer/info")
+    @tracked
+    def get_customer_info(self) -> PageResponse[CustomerProfile]:
+        return PageResponse(self.session.get(f"{self.base_url}/customer/info"), parse_profile)
     
     @allure.step("Оформление заказа")
+    @tracked
     def checkout(self, order_data: Dict[str, Any]) -> requests.Response:
         return self.session.post(
             f"{self.base_url}/checkout",
@@ -83,45 +170,92 @@ class DemoWebShopAPI:
         )
     
     @allure.step("Получение списка товаров по категории")
-    def get_category_products(self, category: str) -> requests.Response:
-        return self.session.get(f"{self.base_url}/{category}")
+    @tracked
+    def get_category_products(self, category: str) -> PageResponse[ProductList]:
+        return PageResponse(self.session.get(f"{self.base_url}/{category}"), parse_product_list)
     
     @allure.step("Поиск товаров")
-    def search_products(self, query: str) -> requests.Response:
-        return self.session.get(
+    @tracked
+    def search_products(self, query: str) -> PageResponse[ProductList]:
+        return PageResponse(self.session.get(
             f"{self.base_url}/search",
             params={"q": query}
-        )
+        ), parse_product_list)
     
     @allure.step("Получение списка заказов")
+    @tracked
     def get_orders(self) -> requests.Response:
         return self.session.get(f"{self.base_url}/order/history")
     
+    @allure.step("Потоковый просмотр товаров категории")
+    @tracked
+    def scan_category_products(self, category: str, markers: Sequence[str], stop: str = "any") -> MarkerScan:
+        """
+        Поиск маркеров на странице категории без загрузки всей страницы
+
+        Args:
+            category: Адрес категории, например "computers"
+            markers: Искомые строки (названия товаров, тексты ошибок)
+            stop: "any" - до первого найденного маркера, "all" - до всех, "never" - до конца тела
+
+        Returns:
+            MarkerScan: Статус, заголовки и найденные маркеры
+        """
+        return scan_response(self.session.get(f"{self.base_url}/{category}", stream=True), markers, stop)
+    
+    @allure.step("Потоковый поиск товаров")
+    @tracked
+    def scan_search_results(self, query: str, markers: Sequence[str], stop: str = "any") -> MarkerScan:
+        return scan_response(self.session.get(
+            f"{self.base_url}/search",
+            params={"q": query},
+            stream=True
+        ), markers, stop)
+    
+    @allure.step("Потоковый просмотр списка заказов")
+    @tracked
+    def scan_orders(self, markers: Sequence[str], stop: str = "any") -> MarkerScan:
+        return scan_response(self.session.get(f"{self.base_url}/order/history", stream=True), markers, stop)
+    
     @allure.step("Добавление товара в список желаний")
-    def add_to_wishlist(self, product_id: int) -> requests.Response:
-        return self.session.post(
+    @tracked
+    def add_to_wishlist(self, product_id: int) -> PageResponse[AddToCartResult]:
+        return PageResponse(self.session.post(
             f"{self.base_url}/addproducttocart/details/{product_id}/2"
-        )
+        ), parse_add_to_cart)
     
     @allure.step("Получение списка желаний")
-    def get_wishlist(self) -> requests.Response:
-        return self.session.get(f"{self.base_url}/wishlist")
+    @tracked
+    def get_wishlist(self) -> PageResponse[WishlistPage]:
+        return PageResponse(self.session.get(f"{self.base_url}/wishlist"), parse_wishlist)
+    
+    @allure.step("Очистка списка желаний")
+    @tracked
+    def clear_wishlist(self) -> PageResponse[WishlistPage]:
+        return self._remove_items("wishlist", self.get_wishlist(), parse_wishlist)
+    
+    def _remove_items(self, page: str, current: PageResponse, parser) -> PageResponse:
+        # Форма корзины и списка желаний: отмеченные removefromcart + кнопка обновления
+        if current.page.is_empty:
+            return current
+        data = [("removefromcart", line.item_id) for line in current.page.lines if line.item_id is not None]
+        data.append(("updatecart", "Update shopping cart"))
+        return PageResponse(self.session.post(f"{self.base_url}/{page}", data=data), parser)
     
     @allure.step("Подписка на рассылку")
+    @tracked
     def subscribe_newsletter(self, email: str) -> requests.Response:
         return self.session.post(
             f"{self.base_url}/subscribenewsletter",
             data={"email": email}
         )
     
-    def get_profile(self) -> requests.Response:
+    @tracked
+    def get_profile(self) -> PageResponse[CustomerProfile]:
         """
         Получение данных профиля пользователя
         
         Returns:
-            requests.Response: Ответ от сервера с данными профиля
+            PageResponse[CustomerProfile]: Ответ от сервера с моделью профиля в .page
         """
-        return self.session.get(
-            url=f"{self.base_url}/customer/info",
-            headers=self._get_headers()
-        ) 
\ No newline at end of file
+        return PageResponse(self.session.get(url=f"{self.base_url}/customer/info"), parse_profile)
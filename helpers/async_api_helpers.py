@@ -0,0 +1,299 @@
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+import httpx
+import allure
+from helpers.attachments import attach, attach_response, collect_attachments
+from helpers.page_models import (
+    PageResponse, AddToCartResult, CartAddOutcome, CartBatchResult, CartPage, CustomerProfile,
+    ProductList, WishlistPage,
+    parse_add_to_cart, parse_cart, parse_profile, parse_product_list, parse_wishlist,
+)
+from helpers.streaming import MarkerScan, scan_response_async
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from helpers.api_helpers import AUTH_COOKIE_NAMES, get_base_url
+from helpers.cassette import AsyncCassetteTransport, Cassette
+
+
+# Шаги корутин, запущенных через gather_step; None - корутина выполняется сама по себе
+_gathered: ContextVar[Optional[List["_StepRecord"]]] = ContextVar("gathered_steps", default=None)
+
+
+def async_step(title: str):
+    """
+    Аналог allure.step для корутин
+
+    allure.step, повешенный на async-функцию, закрывает шаг сразу после
+    создания корутины, поэтому шаг открывается внутри самой корутины.
+
+    Allure ведет один стек шагов на поток, и под asyncio.gather шаги
+    чередующихся корутин вкладывались бы друг в друга. Поэтому одновременные
+    запросы запускаются через gather_step: там шаг корутины не открывается,
+    а записывается вместе с вложениями и выводится после завершения gather.
+
+    Args:
+        title: Название шага в отчете Allure
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            records = _gathered.get()
+            if records is None:
+                with allure.step(title):
+                    return await func(*args, **kwargs)
+            record = _StepRecord(title)
+            records.append(record)
+            started = time.perf_counter()
+            with collect_attachments() as record.attachments:
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException as error:
+                    record.error = error
+                    raise
+                finally:
+                    record.duration = time.perf_counter() - started
+        return wrapper
+    return decorator
+
+
+class _StepRecord:
+    """Шаг корутины под gather_step: название, длительность, вложения и ошибка"""
+
+    def __init__(self, title: str):
+        self.title = title
+        self.duration = 0.0
+        self.attachments: list = []
+        self.error: Optional[BaseException] = None
+
+    def emit(self):
+        """Вывод шага в отчет уже после завершения корутины"""
+        try:
+            with allure.step(f"{self.title} ({self.duration:.2f} с)"):
+                for item in self.attachments:
+                    attach(*item)
+                if self.error is not None:
+                    raise self.error  # шаг получает статус упавшего
+        except BaseException as error:
+            if error is not self.error:
+                raise
+
+
+async def gather_step(title: str, *aws, return_exceptions: bool = False) -> list:
+    """
+    asyncio.gather внутри одного шага Allure
+
+    Шаги корутин (async_step) выводятся внутри этого шага в порядке запуска
+    уже после того, как завершились все корутины, каждый со своими вложениями
+    и длительностью. Вложенные шаги корутины выводятся на том же уровне.
+    В отличие от asyncio.gather, ошибка одной корутины поднимается только
+    после завершения остальных, чтобы их шаги тоже попали в отчет.
+
+    Args:
+        title: Название общего шага
+        aws: Корутины, как в asyncio.gather
+        return_exceptions: Вернуть ошибки корутин в результатах, а не поднимать первую
+
+    Returns:
+        list: Результаты в порядке aws
+    """
+    records: List[_StepRecord] = []
+    with allure.step(title):
+        # Задачи gather копируют контекст при создании, поэтому видят список records
+        token = _gathered.set(records)
+        try:
+            results = await asyncio.gather(*aws, return_exceptions=True)
+        finally:
+            _gathered.reset(token)
+            for record in records:
+                record.emit()
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return results
+
+
+class AsyncDemoWebShopAPI:
+    """
+    Асинхронный двойник DemoWebShopAPI на httpx.AsyncClient
+
+    Повторяет методы синхронного клиента, поэтому независимые запросы
+    можно выполнять одновременно через gather_step (asyncio.gather внутри
+    шага Allure с отдельными шагами корутин).
+
+    Из инфраструктуры DemoWebShopAPI клиент использует только кассету
+    (AsyncCassetteTransport). Метрики InstrumentedSession, общий пул
+    соединений и кэш ответов построены на адаптерах requests, поэтому
+    запросы этого клиента в них не попадают.
+
+    Example:
+        >>> async with AsyncDemoWebShopAPI() as api:
+        >>>     await api.login(email, password)
+        >>>     cart, wishlist, orders = await gather_step(
+        >>>         "Параллельно запрашиваем страницы", api.get_cart(), api.get_wishlist(), api.get_orders()
+        >>>     )
+    """
+
+    def __init__(self, base_url: Optional[str] = None, cassette: Optional[Cassette] = None):
+        self.base_url = (base_url or get_base_url()).rstrip("/")
+        # Кассета с записанными ответами: явно или через DEMOWEBSHOP_CASSETTE
+        if cassette is None:
+            cassette = Cassette.from_env()
+        transport = AsyncCassetteTransport(cassette) if cassette is not None else None
+        # requests по умолчанию следует за редиректами, httpx - нет
+        self.client = httpx.AsyncClient(follow_redirects=True, transport=transport)
+
+    async def __aenter__(self) -> "AsyncDemoWebShopAPI":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Закрывает соединения клиента"""
+        await self.client.aclose()
+
+    @async_step("Выполняем вход через API")
+    async def login(self, email: str, password: str) -> httpx.Response:
+        data = {
+            "Email": email,
+            "Password": password,
+            "RememberMe": "true"
+        }
+        response = await self.client.post(f"{self.base_url}/login", data=data)
+
+        attach_response(response, 'response.html')
+        return response
+
+    @async_step("Регистрация нового пользователя")
+    async def register(self, email: str, password: str,
+                       first_name: str, last_name: str, gender: str = "M") -> httpx.Response:
+        return await self.client.post(
+            f"{self.base_url}/register",
+            data={
+                "Gender": gender,
+                "FirstName": first_name,
+                "LastName": last_name,
+                "Email": email,
+                "Password": password,
+                "ConfirmPassword": password
+            }
+        )
+
+    @allure.step("Получение токена авторизации")
+    def get_auth_token(self) -> Optional[str]:
+        # Куки читаются из jar без запроса к серверу, поэтому метод синхронный
+        all_cookies = {cookie.name: cookie.value for cookie in self.client.cookies.jar}
+        attach(str(all_cookies), 'cookies.txt', allure.attachment_type.TEXT)
+        for name in AUTH_COOKIE_NAMES:
+            if all_cookies.get(name):
+                return all_cookies[name]
+        return None
+
+    @async_step("Добавление товара в корзину")
+    async def add_to_cart(self, product_id: int, quantity: int = 1) -> PageResponse[AddToCartResult]:
+        return await self._post_add_to_cart(product_id, quantity)
+
+    @async_step("Пакетное добавление товаров в корзину")
+    async def add_many_to_cart(self, items: Sequence[Tuple[int, int]], concurrency: int = 8,
+                               verify: bool = True) -> CartBatchResult:
+        merged: Dict[int, int] = {}
+        for product_id, quantity in items:
+            merged[product_id] = merged.get(product_id, 0) + quantity
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def add(product_id: int, quantity: int) -> CartAddOutcome:
+            async with semaphore:
+                response = await self._post_add_to_cart(product_id, quantity)
+            result = response.page
+            return CartAddOutcome(product_id=product_id, quantity=quantity, status_code=response.status_code,
+                                  success=response.is_success and result.success, message=result.message)
+
+        outcomes = await asyncio.gather(*(add(product_id, quantity) for product_id, quantity in merged.items()))
+        batch = CartBatchResult(outcomes=list(outcomes))
+        if verify:
+            batch.cart = (await self.get_cart()).page
+        attach(lambda: batch.model_dump_json(indent=2), "cart_batch.json", allure.attachment_type.JSON)
+        return batch
+
+    async def _post_add_to_cart(self, product_id: int, quantity: int) -> PageResponse[AddToCartResult]:
+        return PageResponse(await self.client.post(
+            f"{self.base_url}/addproducttocart/catalog/{product_id}/1",
+            data={
+                "quantity": quantity
+            }
+        ), parse_add_to_cart)
+
+    @async_step("Получение содержимого корзины")
+    async def get_cart(self) -> PageResponse[CartPage]:
+        return PageResponse(await self.client.get(f"{self.base_url}/cart"), parse_cart)
+
+    @async_step("Получение информации о пользователе")
+    async def get_customer_info(self) -> PageResponse[CustomerProfile]:
+        return PageResponse(await self.client.get(f"{self.base_url}/customer/info"), parse_profile)
+
+    @async_step("Оформление заказа")
+    async def checkout(self, order_data: Dict[str, Any]) -> httpx.Response:
+        return await self.client.post(
+            f"{self.base_url}/checkout",
+            data=order_data
+        )
+
+    @async_step("Получение списка товаров по категории")
+    async def get_category_products(self, category: str) -> PageResponse[ProductList]:
+        return PageResponse(await self.client.get(f"{self.base_url}/{category}"), parse_product_list)
+
+    @async_step("Поиск товаров")
+    async def search_products(self, query: str) -> PageResponse[ProductList]:
+        return PageResponse(await self.client.get(
+            f"{self.base_url}/search",
+            params={"q": query}
+        ), parse_product_list)
+
+    @async_step("Получение списка заказов")
+    async def get_orders(self) -> httpx.Response:
+        return await self.client.get(f"{self.base_url}/order/history")
+
+    @async_step("Потоковый просмотр товаров категории")
+    async def scan_category_products(self, category: str, markers: Sequence[str], stop: str = "any") -> MarkerScan:
+        return await self._scan(f"{self.base_url}/{category}", markers, stop)
+
+    @async_step("Потоковый поиск товаров")
+    async def scan_search_results(self, query: str, markers: Sequence[str], stop: str = "any") -> MarkerScan:
+        return await self._scan(f"{self.base_url}/search", markers, stop, params={"q": query})
+
+    @async_step("Потоковый просмотр списка заказов")
+    async def scan_orders(self, markers: Sequence[str], stop: str = "any") -> MarkerScan:
+        return await self._scan(f"{self.base_url}/order/history", markers, stop)
+
+    async def _scan(self, url: str, markers: Sequence[str], stop: str, **kwargs) -> MarkerScan:
+        request = self.client.build_request("GET", url, **kwargs)
+        response = await self.client.send(request, stream=True)
+        return await scan_response_async(response, markers, stop)
+
+    @async_step("Добавление товара в список желаний")
+    async def add_to_wishlist(self, product_id: int) -> PageResponse[AddToCartResult]:
+        return PageResponse(await self.client.post(
+            f"{self.base_url}/addproducttocart/details/{product_id}/2"
+        ), parse_add_to_cart)
+
+    @async_step("Получение списка желаний")
+    async def get_wishlist(self) -> PageResponse[WishlistPage]:
+        return PageResponse(await self.client.get(f"{self.base_url}/wishlist"), parse_wishlist)
+
+    @async_step("Подписка на рассылку")
+    async def subscribe_newsletter(self, email: str) -> httpx.Response:
+        return await self.client.post(
+            f"{self.base_url}/subscribenewsletter",
+            data={"email": email}
+        )
+
+    async def get_profile(self) -> PageResponse[CustomerProfile]:
+        """
+        Получение данных профиля пользователя
+
+        Returns:
+            PageResponse[CustomerProfile]: Ответ от сервера с моделью профиля в .page
+        """
+        return PageResponse(await self.client.get(f"{self.base_url}/customer/info"), parse_profile)
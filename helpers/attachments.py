@@ -1,41 +1,265 @@
+import base64
+import gzip
+import hashlib
+import io
 import json
+import queue
+import threading
 import allure
+import pytest
 from allure_commons.types import AttachmentType
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 
-def add_screenshot(browser):
-    """Добавляет скриншот страницы в отчет Allure."""
-    png = browser.driver.get_screenshot_as_png()
-    allure.attach(
-        body=png,
-        name=f'screenshot_{datetime.now().strftime("%Y-%m-%d_%H-%M-%S")}',
-        attachment_type=AttachmentType.PNG,
-        extension='.png'
-    )
+ATTACH_MODES = ("always", "on-failure", "never")
 
+# Типы, которые можно обрезать и сжимать без потери читаемости
+TEXT_TYPES = (
+    AttachmentType.TEXT,
+    AttachmentType.HTML,
+    AttachmentType.JSON,
+    AttachmentType.XML,
+    AttachmentType.CSV,
+    AttachmentType.URI_LIST,
+)
 
-def add_logs(browser):
-    """Добавляет логи браузера в отчет Allure."""
-    log = "\\n".join(f'{log["level"]}: {log["message"]}' 
-                   for log in browser.driver.get_log(log_type='browser'))
-    allure.attach(
-        body=log,
-        name='browser_logs',
-        attachment_type=AttachmentType.TEXT,
-        extension='.log'
-    )
+Body = Union[str, bytes, Callable[[], Union[str, bytes]]]
 
 
-def add_html(browser):
-    """Добавляет HTML страницы в отчет Allure."""
-    html = browser.driver.page_source
-    allure.attach(
-        body=html,
-        name='page_source',
-        attachment_type=AttachmentType.HTML,
-        extension='.html'
-    )
+@dataclass
+class AttachmentPolicy:
+    """
+    Политика вложений Allure
+
+    Attributes:
+        mode: 'always' - прикладывать сразу, 'on-failure' - только для упавших тестов,
+              'never' - не прикладывать
+        max_bytes: Лимит размера текстового вложения, лишнее вырезается из середины
+        gzip_over: Текстовые вложения больше этого размера сжимаются в .gz
+        dedup: Одинаковое содержимое сохраняется один раз, повтор заменяется ссылкой
+        workers: Потоки фоновой подготовки артефактов браузера
+        queue_size: Сколько артефактов может ждать обработки, дальше teardown ждет свободное место
+        screenshot_scale: Масштаб скриншота браузера (1 - без уменьшения)
+        screenshot_quality: Качество JPEG-скриншота браузера
+    """
+    mode: str = "always"
+    max_bytes: Optional[int] = None
+    gzip_over: Optional[int] = None
+    dedup: bool = True
+    workers: int = 2
+    queue_size: int = 16
+    screenshot_scale: float = 0.5
+    screenshot_quality: int = 60
+
+
+policy = AttachmentPolicy()
+
+
+class AttachmentState:
+    """
+    Состояние вложений одного теста, хранится в item.stash
+
+    Вложения добавляют и потоки, запущенные тестом, поэтому поля меняются под lock.
+
+    Attributes:
+        failed: Упал ли тест (None - результат еще неизвестен)
+        pending: Вложения, отложенные до результата теста (режим 'on-failure')
+        seen_digests: Хэши вложений теста, повтор заменяется ссылкой на первое вложение
+        artifacts: Артефакты браузера, которые готовятся в фоновых потоках
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.failed: Optional[bool] = None
+        self.pending: List[Tuple[Body, str, Any, Optional[str]]] = []
+        self.seen_digests: Dict[str, str] = {}
+        self.artifacts: List[Tuple["Future[bytes]", str, Any, Optional[str]]] = []
+
+
+state_key = pytest.StashKey[AttachmentState]()
+
+# Состояние выполняемого теста: attach() вызывается без item, поэтому ссылка
+# на состояние из item.stash хранится здесь и заменяется целиком, а не очищается
+_current = AttachmentState()
+_writer: Optional["ArtifactWriter"] = None
+_writer_lock = threading.Lock()
+
+
+def configure(**kwargs):
+    """Изменение глобальной политики вложений (вызывается из conftest.py)"""
+    for key, value in kwargs.items():
+        setattr(policy, key, value)
+    if policy.mode not in ATTACH_MODES:
+        raise ValueError(f"Неизвестный режим вложений: {policy.mode}")
+
+
+def attach(body: Body, name: str, attachment_type=AttachmentType.TEXT, extension: Optional[str] = None):
+    """
+    Центральная точка добавления вложений в отчет Allure
+
+    body может быть функцией: тогда содержимое вычисляется только если
+    вложение действительно попадет в отчет. В режиме 'on-failure'
+    вложения откладываются до момента, когда известен результат теста.
+
+    Args:
+        body: Содержимое вложения или функция, которая его возвращает
+        name: Имя вложения в отчете
+        attachment_type: Тип вложения Allure
+        extension: Расширение файла вложения
+    """
+    if policy.mode == "never":
+        return
+    collected = _collected.get()
+    if collected is not None:
+        collected.append((body, name, attachment_type, extension))
+        return
+    state = _current
+    if policy.mode == "on-failure":
+        with state.lock:
+            if state.failed is None:
+                state.pending.append((body, name, attachment_type, extension))
+                return
+        if not state.failed:
+            return
+    _write(state, body, name, attachment_type, extension)
+
+
+# Вложения, которые собирает collect_attachments в текущем контексте (задаче asyncio)
+_collected: ContextVar[Optional[list]] = ContextVar("collected_attachments", default=None)
+
+
+@contextmanager
+def collect_attachments() -> Iterator[List[Tuple[Body, str, Any, Optional[str]]]]:
+    """
+    Перехват вложений текущего контекста вместо записи в отчет
+
+    Нужен корутинам под asyncio.gather: стек шагов Allure общий для потока,
+    поэтому вложения собираются и прикладываются позже, когда известен шаг.
+    Собранное прикладывается вызовом attach(*item) после выхода из блока.
+    """
+    collected: list = []
+    token = _collected.set(collected)
+    try:
+        yield collected
+    finally:
+        _collected.reset(token)
+
+
+def should_capture() -> bool:
+    """
+    Нужно ли сейчас снимать артефакты браузера
+
+    В режиме 'on-failure' артефакты снимаются только если тест уже упал
+    (или результат еще неизвестен) - для прошедших тестов браузер не трогаем вовсе.
+    """
+    if policy.mode == "never":
+        return False
+    return policy.mode == "always" or _current.failed is not False
+
+
+def attach_response(response, name: str):
+    """Добавляет тело HTTP-ответа как HTML, текст ответа читается только при записи"""
+    attach(lambda: response.text, name, AttachmentType.HTML)
+
+
+def start_test(item=None) -> AttachmentState:
+    """
+    Новое состояние вложений перед очередным тестом
+
+    Args:
+        item: Тест pytest, в stash которого сохраняется состояние
+
+    Returns:
+        Состояние вложений теста
+    """
+    global _current
+    state = AttachmentState()
+    if item is not None:
+        item.stash[state_key] = state
+    _current = state
+    return state
+
+
+def on_phase_report(when: str, failed: bool, item=None):
+    """
+    Обработка результата фазы теста (setup/call/teardown)
+
+    Упавшая фаза выгружает отложенные вложения, успешный вызов теста
+    их отбрасывает, так и не вычислив содержимое. После teardown к тесту
+    прикладываются артефакты браузера, подготовленные в фоне.
+
+    Отложенные вложения прикладываются к тесту целиком, а не к шагам,
+    внутри которых были добавлены: публичный API Allure не позволяет
+    дописать вложение в уже закрытый шаг.
+    """
+    state = item.stash.get(state_key, _current) if item is not None else _current
+    with state.lock:
+        pending: List[Tuple[Body, str, Any, Optional[str]]] = []
+        if failed:
+            state.failed = True
+            pending, state.pending = state.pending, []
+        elif when == "call" and state.failed is None:
+            state.failed = False
+            state.pending = []
+    for entry in pending:
+        _write(state, *entry)
+    if when == "teardown":
+        _attach_artifacts(state)
+        start_test()  # вложения между тестами не попадают в состояние завершенного теста
+
+
+def _write(state: AttachmentState, body: Body, name: str, attachment_type, extension: Optional[str]):
+    if callable(body):
+        body = body()
+    if attachment_type not in TEXT_TYPES:
+        allure.attach(body, name=name, attachment_type=attachment_type, extension=extension)
+        return
+
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    if policy.dedup:
+        digest = hashlib.sha256(data).hexdigest()
+        with state.lock:
+            first = state.seen_digests.get(digest)
+            if first is None:
+                state.seen_digests[digest] = name
+        if first is not None:
+            allure.attach(
+                f"Содержимое совпадает с вложением '{first}' (sha256 {digest[:12]})",
+                name=name,
+                attachment_type=AttachmentType.TEXT
+            )
+            return
+
+    if policy.max_bytes and len(data) > policy.max_bytes:
+        data = _truncate(data, policy.max_bytes)
+
+    if policy.gzip_over and len(data) > policy.gzip_over:
+        allure.attach(
+            gzip.compress(data),
+            name=f"{name}.gz",
+            attachment_type="application/gzip",
+            extension=f"{(extension or attachment_type.extension).lstrip('.')}.gz"
+        )
+        return
+
+    allure.attach(data, name=name, attachment_type=attachment_type, extension=extension)
+
+
+def _truncate(data: bytes, max_bytes: int) -> bytes:
+    """Оставляет начало и конец содержимого, середина заменяется пометкой (пометка входит в лимит)"""
+    # Число в пометке не длиннее len(data), поэтому оценка пометки сверху
+    half = (max_bytes - len(_truncation_marker(len(data)))) // 2
+    if half <= 0:
+        return data[:max_bytes]  # пометка не помещается, data[-0:] вернул бы содержимое целиком
+    return data[:half] + _truncation_marker(len(data) - 2 * half) + data[-half:]
+
+
+def _truncation_marker(skipped: int) -> bytes:
+    return f"\n\n... [обрезано {skipped} байт] ...\n\n".encode("utf-8")
 
 
 def add_video(video_url):
@@ -47,9 +271,195 @@ def add_video(video_url):
     )
 
 
-def attach_all_artifacts(browser):
-    """Добавляет все артефакты тестирования в отчет."""
-    add_screenshot(browser)
-    add_logs(browser)
-    add_html(browser) 
-    add_video(browser)
\ No newline at end of file
+def attach_all_artifacts(browser, video_url: Optional[str] = None):
+    """
+    Добавляет все артефакты тестирования в отчет
+
+    Из браузера синхронно забираются только сырые данные: скриншот (уменьшенный
+    JPEG через CDP), записи лога и HTML страницы. Декодирование и сжатие выполняются
+    в фоновых потоках, пока идет остаток teardown (закрытие браузера), а в отчет
+    готовые вложения попадают по результату teardown (on_phase_report).
+    Повторяющиеся артефакты браузера не дедуплицируются.
+
+    Args:
+        browser: Браузер Selene
+        video_url: Ссылка на запись теста (например, из Selenoid), без нее видео не прикладывается
+    """
+    if not should_capture():
+        return
+    driver = browser.driver
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    screenshot, screenshot_type = _grab_screenshot(driver)
+    _submit(
+        lambda: base64.b64decode(screenshot) if isinstance(screenshot, str) else screenshot,
+        name=f"screenshot_{stamp}",
+        attachment_type=screenshot_type,
+    )
+
+    entries = driver.get_log(log_type='browser')
+    if entries:
+        _submit_text(
+            lambda: _log_lines(entries),
+            size=sum(len(entry["message"]) for entry in entries),
+            name="browser_logs",
+            attachment_type=AttachmentType.TEXT,
+        )
+
+    source = driver.page_source
+    _submit_text(lambda: [source], size=len(source), name="page_source", attachment_type=AttachmentType.HTML)
+
+    if video_url:
+        add_video(video_url)
+
+
+def flush_artifacts():
+    """Остановка фоновых потоков подготовки артефактов (конец прогона)"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+class ArtifactWriter:
+    """
+    Пул потоков, готовящих содержимое артефактов браузера
+
+    Очередь ограничена queue_size: если потоки не успевают, submit ждет
+    свободное место, поэтому в памяти одновременно не больше queue_size артефактов.
+
+    Args:
+        workers: Количество потоков
+        queue_size: Размер очереди
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 16):
+        self.errors = 0
+        self._queue: "queue.Queue[Optional[Tuple[Future, Callable[[], bytes]]]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._threads = [
+            threading.Thread(target=self._run, name=f"artifact-writer-{number}", daemon=True)
+            for number in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, produce: Callable[[], bytes]) -> "Future[bytes]":
+        future: "Future[bytes]" = Future()
+        self._queue.put((future, produce))
+        return future
+
+    def close(self):
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                future, produce = job
+                try:
+                    body = produce()
+                except Exception as error:
+                    # Вложение с ошибкой в отчете полезнее, чем пропавший артефакт
+                    self.errors += 1
+                    body = f"Не удалось подготовить артефакт: {error!r}".encode("utf-8")
+                future.set_result(body)
+            finally:
+                self._queue.task_done()
+
+
+def _get_writer() -> ArtifactWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ArtifactWriter(workers=policy.workers, queue_size=policy.queue_size)
+        return _writer
+
+
+def _submit(produce: Callable[[], bytes], name: str, attachment_type, extension: Optional[str] = None):
+    state = _current
+    future = _get_writer().submit(produce)
+    with state.lock:
+        state.artifacts.append((future, name, attachment_type, extension))
+
+
+def _attach_artifacts(state: AttachmentState):
+    """Дожидается артефактов теста из фоновых потоков и прикладывает их к тесту"""
+    with state.lock:
+        artifacts, state.artifacts = state.artifacts, []
+    for future, name, attachment_type, extension in artifacts:
+        allure.attach(future.result(), name=name, attachment_type=attachment_type, extension=extension)
+
+
+def _submit_text(lines: Callable[[], Iterable[str]], size: int, name: str, attachment_type):
+    """
+    Текстовый артефакт: строки пишутся потоком, при необходимости сразу в gzip
+
+    Решение о сжатии принимается по размеру заранее, чтобы сразу знать
+    тип вложения. Лимит policy.max_bytes обрезает хвост (вместе с пометкой).
+    """
+    compress = bool(policy.gzip_over and size > policy.gzip_over)
+    if compress:
+        _submit(lambda: _encode_lines(lines(), compress=True), name=f"{name}.gz",
+                attachment_type="application/gzip", extension=f"{attachment_type.extension}.gz")
+    else:
+        _submit(lambda: _encode_lines(lines(), compress=False), name=name, attachment_type=attachment_type)
+
+
+def _encode_lines(lines: Iterable[str], compress: bool) -> bytes:
+    buffer = io.BytesIO()
+    stream = gzip.GzipFile(fileobj=buffer, mode="wb") if compress else buffer
+    written = 0
+    # Пометка об обрезке входит в лимит, ее длина оценивается сверху (written не больше max_bytes)
+    budget = policy.max_bytes - len(_tail_marker(policy.max_bytes)) if policy.max_bytes else None
+    for line in lines:
+        data = line.encode("utf-8")
+        if budget is not None and written + len(data) > budget:
+            if budget > 0:
+                stream.write(_tail_marker(written))
+            break
+        stream.write(data)
+        written += len(data)
+    if compress:
+        stream.close()
+    return buffer.getvalue()
+
+
+def _tail_marker(written: int) -> bytes:
+    return f"\n... [обрезано после {written} байт] ...\n".encode("utf-8")
+
+
+def _log_lines(entries) -> Iterable[str]:
+    return (f'{entry["level"]}: {entry["message"]}\n' for entry in entries)
+
+
+def _grab_screenshot(driver) -> Tuple[Union[str, bytes], AttachmentType]:
+    """
+    Скриншот видимой области
+
+    В Chrome снимается уменьшенный JPEG через DevTools (base64, декодируется
+    в фоновом потоке), в остальных браузерах - обычный PNG.
+    """
+    execute_cdp = getattr(driver, "execute_cdp_cmd", None)
+    if execute_cdp is not None:
+        try:
+            params = {"format": "jpeg", "quality": policy.screenshot_quality}
+            if policy.screenshot_scale < 1:
+                viewport = execute_cdp("Page.getLayoutMetrics", {})["cssLayoutViewport"]
+                params["clip"] = {
+                    "x": viewport["pageX"],
+                    "y": viewport["pageY"],
+                    "width": viewport["clientWidth"],
+                    "height": viewport["clientHeight"],
+                    "scale": policy.screenshot_scale,
+                }
+            return execute_cdp("Page.captureScreenshot", params)["data"], AttachmentType.JPG
+        except Exception:
+            pass  # DevTools недоступен (удаленный драйвер и т.п.)
+    return driver.get_screenshot_as_png(), AttachmentType.PNG
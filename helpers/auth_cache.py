@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import allure
+
+from helpers.api_helpers import DemoWebShopAPI, AUTH_COOKIE_NAMES
+
+try:
+    import fcntl
+except ImportError:  # Windows: файл кэша используется без межпроцессной блокировки
+    fcntl = None
+
+
+class LoginCache:
+    """
+    Кэш авторизованных сессий DemoWebShop
+
+    Хранит куки авторизованной сессии (NOPCOMMERCE.AUTH и соседние)
+    по ключу из адреса магазина и учетных данных. Тест получает клиент
+    с уже подставленными куками и не выполняет вход повторно.
+
+    Вход выполняется под блокировкой своего ключа: параллельные тесты одного
+    пользователя входят один раз, а тесты разных пользователей друг друга не ждут.
+    Проверка сессии запросом к /customer/info выполняется не чаще раза
+    в probe_interval: запись, только что полученная входом, уже проверена.
+
+    Args:
+        ttl: Время жизни записи в секундах
+        store_path: Путь к JSON-файлу, общему для xdist-воркеров (опционально)
+        probe: Проверять ли сессию запросом к /customer/info перед выдачей
+        probe_interval: Как часто проверять одну запись, с (по умолчанию раз за ttl)
+    """
+
+    def __init__(self, ttl: float = 1800, store_path: Optional[str] = None, probe: bool = True,
+                 probe_interval: Optional[float] = None):
+        self.ttl = ttl
+        self.store_path = store_path
+        self.probe = probe
+        self.probe_interval = ttl if probe_interval is None else probe_interval
+        self._entries: Dict[str, dict] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(base_url: str, email: str, password: str) -> str:
+        """Ключ записи: пароль в открытом виде в кэше не хранится"""
+        return hashlib.sha256(f"{base_url}\n{email}\n{password}".encode()).hexdigest()
+
+    def get_api(self, email: str, password: str) -> DemoWebShopAPI:
+        """
+        Получение авторизованного клиента
+
+        Сначала ищет запись в памяти, затем в файловом хранилище.
+        Если запись устарела или не прошла проверку, выполняет вход
+        и сохраняет новые куки.
+
+        Args:
+            email: Email пользователя
+            password: Пароль пользователя
+
+        Returns:
+            DemoWebShopAPI: Клиент с куками авторизованной сессии
+        """
+        api = DemoWebShopAPI()
+        key = self.make_key(api.base_url, email, password)
+
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key) or self._read_store().get(key)
+            if entry and self._is_fresh(entry):
+                _load_cookies(api, entry["cookies"])
+                if self._probe_due(entry):
+                    entry = {**entry, "checked": time.time()} if is_authenticated(api) else None
+                if entry is not None:
+                    with self._lock:
+                        self._entries[key] = entry
+                    return api
+                api.session.cookies.clear()
+
+            api.login(email=email, password=password)
+            if api.get_auth_token() is None:
+                # Неудачный вход не кэшируем, тест сам увидит отсутствие авторизации
+                return api
+
+            now = time.time()
+            entry = {"created": now, "checked": now, "cookies": _dump_cookies(api)}
+            with self._lock:
+                self._entries[key] = entry
+                self._write_store(key, entry)
+            return api
+
+    def invalidate(self, email: str, password: str, base_url: Optional[str] = None):
+        """Удаление записи, например после смены пароля"""
+        key = self.make_key(base_url or DemoWebShopAPI().base_url, email, password)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._write_store(key, None)
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["created"] < self.ttl
+
+    def _probe_due(self, entry: dict) -> bool:
+        """Пора ли проверить сессию: запись без отметки проверки (из старого хранилища) проверяется сразу"""
+        if not self.probe:
+            return False
+        checked = entry.get("checked")
+        return checked is None or time.time() - checked >= self.probe_interval
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _read_store(self) -> Dict[str, dict]:
+        if not self.store_path or not os.path.exists(self.store_path):
+            return {}
+        with _locked(self.store_path, shared=True):
+            try:
+                with open(self.store_path, encoding="utf-8") as f:
+                    return json.load(f)
+            except ValueError:
+                return {}
+
+    def _write_store(self, key: str, entry: Optional[dict]):
+        if not self.store_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.store_path)), exist_ok=True)
+        with _locked(self.store_path, shared=False):
+            store = {}
+            if os.path.exists(self.store_path):
+                try:
+                    with open(self.store_path, encoding="utf-8") as f:
+                        store = json.load(f)
+                except ValueError:
+                    store = {}
+            if entry is None:
+                store.pop(key, None)
+            else:
+                store[key] = entry
+            # Устаревшие записи других воркеров заодно вычищаем
+            store = {k: v for k, v in store.items() if self._is_fresh(v)}
+            tmp_path = f"{self.store_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(store, f)
+            os.replace(tmp_path, self.store_path)
+
+
+@allure.step("Проверка действительности сессии")
+def is_authenticated(api: DemoWebShopAPI) -> bool:
+    """
+    Проверка, что куки сессии все еще авторизуют пользователя
+
+    Неавторизованного пользователя /customer/info перенаправляет на /login,
+    поэтому достаточно запроса без следования за редиректом.
+    """
+    if not any(api.session.cookies.get(name) for name in AUTH_COOKIE_NAMES):
+        return False
+    response = api.session.get(f"{api.base_url}/customer/info", allow_redirects=False)
+    return response.status_code == 200
+
+
+def _dump_cookies(api: DemoWebShopAPI) -> List[dict]:
+    return [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "secure": cookie.secure,
+            "expires": cookie.expires,
+        }
+        for cookie in api.session.cookies
+    ]
+
+
+def _load_cookies(api: DemoWebShopAPI, cookies: List[dict]):
+    for cookie in cookies:
+        api.session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie["domain"],
+            path=cookie["path"],
+            secure=cookie["secure"],
+            expires=cookie["expires"],
+        )
+
+
+@contextmanager
+def _locked(path: str, shared: bool):
+    """Межпроцессная блокировка файла кэша через соседний .lock-файл"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
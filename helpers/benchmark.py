@@ -0,0 +1,307 @@
+"""
+Бенчмарки горячих путей с базовой линией и порогом регрессии
+
+Группы:
+- api: вызовы DemoWebShopAPI против локального заменителя (и "сырой" GET
+  для сравнения - разница показывает накладные расходы помощника);
+- catalog: поиск в каталоге тест-кейсов на синтетических каталогах разного размера;
+- fixtures: подготовка и очистка фикстур conftest.py в отдельном прогоне pytest.
+
+Результаты сохраняются базовой линией (--save), следующий запуск сравнивается
+с ней (--compare): если медиана вызова выросла больше порога, код выхода 1.
+
+    python -m helpers.benchmark --stub --save benchmarks/baseline.json
+    python -m helpers.benchmark --stub --compare benchmarks/baseline.json --threshold 0.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from data.case_query import parse_query, select
+from data.test_cases import TestCase, TestCaseRegistry
+from helpers.api_helpers import BASE_URL_ENV, DemoWebShopAPI
+from helpers.stub_server import DemoWebShopStub, StubConfig
+from helpers.test_accounts import derive_user, ensure_registered
+
+GROUPS = ("api", "catalog", "fixtures")
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+CATALOG_SIZES = (100, 1000, 10000)
+# Фикстуры conftest.py, которые не требуют браузера
+DEFAULT_FIXTURES = ("login_cache", "authenticated_api", "pooled_account")
+
+Results = Dict[str, Dict[str, float]]
+
+
+def measure(func: Callable[[], object], number: int = 20, rounds: int = 7, warmup: int = 1) -> Dict[str, float]:
+    """
+    Время одного вызова func
+
+    Каждый раунд - number вызовов подряд, результат раунда делится на number.
+    Медиана раундов устойчива к единичным выбросам (GC, планировщик ОС).
+
+    Returns:
+        dict: p50, min и mean по раундам (секунды на вызов) и число раундов
+    """
+    for _ in range(warmup):
+        func()
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - started) / number)
+    return _stats(per_call)
+
+
+def _stats(values: Sequence[float]) -> Dict[str, float]:
+    return {
+        "p50": statistics.median(values),
+        "min": min(values),
+        "mean": statistics.mean(values),
+        "rounds": len(values),
+    }
+
+
+def bench_api(rounds: int) -> Results:
+    """Вызовы помощника против уже запущенного магазина (адрес из DEMOWEBSHOP_BASE_URL)"""
+    api = ensure_registered(derive_user("bench"))
+    api.clear_cart()
+    raw_url = f"{api.base_url}/cart"
+    results = {
+        "api.raw_get_cart": measure(lambda: api.session.get(raw_url).text, rounds=rounds),
+        "api.get_cart": measure(lambda: api.get_cart().page, rounds=rounds),
+        "api.get_category_products": measure(lambda: api.get_category_products("books").page, rounds=rounds),
+        "api.search_products": measure(lambda: api.search_products("computer").page, rounds=rounds),
+        "api.add_to_cart": measure(lambda: api.add_to_cart(product_id=13).page, rounds=rounds),
+    }
+    api.clear_cart()
+    api.session.close()
+    return results
+
+
+def synthetic_registry(size: int) -> TestCaseRegistry:
+    """Каталог из size кейсов с повторяющимися тегами, слоями и разделами"""
+    registry = TestCaseRegistry()
+    severities = ("blocker", "critical", "normal", "minor")
+    for number in range(size):
+        feature = f"Feature{number % 20}"
+        case = TestCase(
+            id=f"SYN-{number:05d}",
+            title=f"Синтетический кейс {number}",
+            description="",
+            preconditions=(),
+            steps=("шаг",),
+            expected_result="",
+            severity=severities[number % len(severities)],
+            layer="API" if number % 3 else "UI",
+            feature=feature,
+            tags=("smoke",) if number % 10 == 0 else ("regression", f"tag{number % 50}"),
+            automated=number % 4 != 0,
+        )
+        registry.add(f"test_synthetic_{number}", case, feature)
+    return registry
+
+
+def bench_catalog(rounds: int, sizes: Sequence[int] = CATALOG_SIZES) -> Results:
+    """Построение каталога и поиск в нем"""
+    results = {}
+    query_text = "smoke and layer=API and severity in (blocker, critical) and not tag=tag7"
+    for size in sizes:
+        registry = synthetic_registry(size)
+        middle = size // 2
+        query = parse_query(query_text)
+        results[f"catalog.{size}.build"] = measure(lambda: synthetic_registry(size), number=1, rounds=rounds)
+        results[f"catalog.{size}.get_by_id"] = measure(lambda: registry.get(f"SYN-{middle:05d}"), number=1000, rounds=rounds)
+        results[f"catalog.{size}.for_test"] = measure(lambda: registry.for_test(f"test_synthetic_{middle}"), number=1000, rounds=rounds)
+        results[f"catalog.{size}.by_tag"] = measure(lambda: registry.by_tag("smoke"), number=1000, rounds=rounds)
+        results[f"catalog.{size}.query_mask"] = measure(lambda: query.mask(registry), number=100, rounds=rounds)
+        results[f"catalog.{size}.select"] = measure(lambda: select(query_text, registry), number=20, rounds=rounds)
+    return results
+
+
+class _PhaseRecorder:
+    """Плагин для прогона бенчмарка фикстур: длительности setup/teardown по тестам"""
+
+    def __init__(self):
+        self.phases: Dict[str, Dict[str, List[float]]] = {}
+
+    def pytest_runtest_logreport(self, report):
+        if report.when in ("setup", "teardown"):
+            fixture = report.nodeid.rsplit("::test_", 1)[-1].split("[", 1)[0]
+            self.phases.setdefault(fixture, {"setup": [], "teardown": []})[report.when].append(report.duration)
+
+
+def bench_fixtures(rounds: int, fixtures: Sequence[str] = DEFAULT_FIXTURES, stub: bool = True) -> Results:
+    """
+    Подготовка и очистка фикстур conftest.py
+
+    Для каждой фикстуры генерируется тест, который ее запрашивает, и повторяется
+    rounds раз. Первый тест прогона включает подготовку сессионных фикстур
+    (заменитель магазина, аккаунт воркера) и учитывается отдельно как fixtures.session_setup.
+    """
+    import pytest
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    recorder = _PhaseRecorder()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "test_fixture_bench.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("import pytest\n")
+            for fixture in fixtures:
+                f.write(
+                    f"\n@pytest.mark.parametrize('round_', range({rounds + 1}))\n"
+                    f"def test_{fixture}(round_, {fixture}):\n    pass\n"
+                )
+        args = [path, "-q", "-p", "no:cacheprovider", "-p", "conftest", f"--rootdir={root}"]
+        if stub:
+            args.append("--stub-server")
+        with contextlib.redirect_stdout(io.StringIO()):
+            exit_code = pytest.main(args, plugins=[recorder])
+    if exit_code != 0:
+        raise RuntimeError(f"Прогон бенчмарка фикстур завершился с кодом {exit_code}")
+
+    results = {}
+    first = fixtures[0]
+    results["fixtures.session_setup"] = _stats(recorder.phases[first]["setup"][:1])
+    for fixture in fixtures:
+        phases = recorder.phases[fixture]
+        # Первый раунд каждой фикстуры - холодный (сессионные зависимости, первые соединения)
+        results[f"fixtures.{fixture}.setup"] = _stats(phases["setup"][1:])
+        results[f"fixtures.{fixture}.teardown"] = _stats(phases["teardown"][1:])
+    return results
+
+
+def compare(current: Results, baseline: Results, threshold: float, min_delta: float) -> List[str]:
+    """
+    Регрессии относительно базовой линии
+
+    Args:
+        threshold: Допустимый относительный рост медианы (0.2 - на 20%)
+        min_delta: Рост меньше этого значения (секунды) не считается регрессией - шум измерения
+
+    Returns:
+        List[str]: Описание каждой регрессии
+    """
+    regressions = []
+    for name, stats in sorted(current.items()):
+        base = baseline.get(name)
+        if not base:
+            continue
+        delta = stats["p50"] - base["p50"]
+        if delta > min_delta and stats["p50"] > base["p50"] * (1 + threshold):
+            regressions.append(
+                f"{name}: {_format_time(base['p50'])} -> {_format_time(stats['p50'])} "
+                f"(+{100 * delta / base['p50']:.0f}%)"
+            )
+    return regressions
+
+
+def load_baseline(path: str) -> Results:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path: str, results: Results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    payload = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def _format_time(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.2f} µs"
+
+
+def format_results(results: Results, baseline: Optional[Results] = None) -> str:
+    lines = [f"{'бенчмарк':<44}{'p50':>12}{'min':>12}{'база p50':>12}"]
+    for name, stats in sorted(results.items()):
+        base = (baseline or {}).get(name)
+        lines.append(
+            f"{name:<44}{_format_time(stats['p50']):>12}{_format_time(stats['min']):>12}"
+            f"{(_format_time(base['p50']) if base else '-'):>12}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки DemoWebShopAPI, каталога тест-кейсов и фикстур")
+    parser.add_argument("--group", action="append", choices=GROUPS, default=None,
+                        help="Группа бенчмарков (можно повторять, по умолчанию все)")
+    parser.add_argument("--stub", action="store_true", help="Запустить локальный заменитель магазина")
+    parser.add_argument("--base-url", default=None, help="Адрес магазина (без --stub)")
+    parser.add_argument("--rounds", type=int, default=7, help="Количество раундов измерения")
+    parser.add_argument("--fixture", action="append", default=None,
+                        help=f"Фикстура conftest.py для группы fixtures (по умолчанию {', '.join(DEFAULT_FIXTURES)})")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="PATH",
+                        help=f"Сохранить результаты базовой линией (по умолчанию {DEFAULT_BASELINE})")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="PATH",
+                        help="Сравнить с базовой линией: при регрессии код выхода 1, без базовой линии - 2")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Допустимый рост медианы относительно базовой линии (0.2 - 20%%)")
+    parser.add_argument("--min-delta", type=float, default=5e-6,
+                        help="Абсолютный рост в секундах, ниже которого изменение считается шумом")
+    args = parser.parse_args(argv)
+    groups = args.group or list(GROUPS)
+    if args.compare and not os.path.exists(args.compare):
+        parser.error(f"базовая линия {args.compare} не найдена, сначала сохраните ее через --save")
+
+    stub = None
+    previous_url = os.environ.get(BASE_URL_ENV)
+    if args.stub:
+        stub = DemoWebShopStub(config=StubConfig()).start()
+        os.environ[BASE_URL_ENV] = stub.base_url
+    elif args.base_url:
+        os.environ[BASE_URL_ENV] = args.base_url
+
+    results: Results = {}
+    try:
+        if "api" in groups:
+            results.update(bench_api(args.rounds))
+        if "catalog" in groups:
+            results.update(bench_catalog(args.rounds))
+    finally:
+        if stub:
+            stub.stop()
+        if previous_url is None:
+            os.environ.pop(BASE_URL_ENV, None)
+        else:
+            os.environ[BASE_URL_ENV] = previous_url
+    if "fixtures" in groups:
+        results.update(bench_fixtures(args.rounds, args.fixture or DEFAULT_FIXTURES, stub=args.stub))
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    print(format_results(results, baseline))
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"Базовая линия сохранена: {args.save}")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"Регрессии (порог +{args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"Регрессий нет (порог +{args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Вход в браузер через API
+
+Форма входа в Selene стоит несколько секунд на тест. Вместо нее тест
+авторизуется через DemoWebShopAPI (или берет сессию из LoginCache),
+а куки сессии, включая NOPCOMMERCE.AUTH, переносятся в браузер.
+Корзину при необходимости наполняет тот же клиент API, поэтому тест
+начинается на уже подготовленной странице и проверяет только свой сценарий.
+"""
+
+from typing import Iterable, List, Tuple, Union
+
+import allure
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from helpers.api_helpers import AUTH_COOKIE_NAMES, DemoWebShopAPI
+from helpers.page_models import CartBatchResult
+
+CartItem = Union[int, Tuple[int, int]]
+
+
+@allure.step("Перенос авторизации из API в браузер")
+def transfer_session(api: DemoWebShopAPI, driver: WebDriver) -> List[str]:
+    """
+    Копирует куки сессии клиента API в браузер
+
+    Браузер должен уже находиться на странице магазина: WebDriver
+    добавляет куки только для домена текущей страницы. Домен куки
+    не передается, поэтому перенос работает и для локального заменителя.
+
+    Args:
+        api: Авторизованный клиент
+        driver: WebDriver браузера
+
+    Returns:
+        List[str]: Имена перенесенных куки
+    """
+    if api.get_auth_token() is None:
+        raise RuntimeError(f"Клиент API не авторизован, ожидалась одна из куки {', '.join(AUTH_COOKIE_NAMES)}")
+    transferred = []
+    for cookie in api.session.cookies:
+        browser_cookie = {
+            "name": cookie.name,
+            "value": cookie.value,
+            "path": cookie.path or "/",
+            "secure": bool(cookie.secure),
+        }
+        if cookie.expires:
+            browser_cookie["expiry"] = int(cookie.expires)
+        driver.add_cookie(browser_cookie)
+        transferred.append(cookie.name)
+    return transferred
+
+
+def seed_cart(api: DemoWebShopAPI, items: Iterable[CartItem]) -> CartBatchResult:
+    """
+    Наполнение корзины через API перед UI-тестом
+
+    Args:
+        api: Авторизованный клиент
+        items: id товаров или пары (id, количество)
+
+    Returns:
+        CartBatchResult: Результат добавления и итоговая корзина
+    """
+    pairs = [item if isinstance(item, tuple) else (item, 1) for item in items]
+    result = api.add_many_to_cart(pairs)
+    if not result.ok:
+        raise RuntimeError(f"Не удалось подготовить корзину: {result.failed}")
+    return result
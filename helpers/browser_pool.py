@@ -0,0 +1,132 @@
+import threading
+from typing import Callable, Iterable, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import JavascriptException, WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+class BrowserPool:
+    """
+    Пул "прогретых" экземпляров браузера
+
+    Вместо закрытия браузера после каждого теста экземпляр возвращается
+    в пул, у него очищаются куки и хранилища, и следующий тест получает
+    уже запущенный браузер. Пул создается на процесс (воркер xdist).
+
+    Args:
+        size: Максимальное количество экземпляров браузера
+        factory: Функция, которая запускает новый WebDriver
+        origins: Адреса, чьи куки и хранилища очищаются при возврате браузера
+            (кроме адреса открытой страницы, он очищается всегда)
+    """
+
+    def __init__(self, size: int, factory: Callable[[], WebDriver], origins: Sequence[str] = ()):
+        self.size = size
+        self.factory = factory
+        self.origins = tuple(origins)
+        self._idle: List[WebDriver] = []
+        self._all: List[WebDriver] = []
+        self._condition = threading.Condition()
+
+    def acquire(self) -> WebDriver:
+        """
+        Получение браузера из пула
+
+        Свободный экземпляр выдается сразу, новый запускается только
+        если пул еще не заполнен. Иначе ожидаем освобождения.
+        """
+        with self._condition:
+            while not self._idle and len(self._all) >= self.size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            driver = self.factory()
+            self._all.append(driver)
+            return driver
+
+    def release(self, driver: WebDriver):
+        """
+        Возврат браузера в пул после теста
+
+        Браузер, который не удалось очистить, закрывается и убирается
+        из пула, вместо него при необходимости будет запущен новый.
+        """
+        try:
+            reset_browser_state(driver, self.origins)
+        except WebDriverException:
+            self._discard(driver)
+            return
+        with self._condition:
+            self._idle.append(driver)
+            self._condition.notify()
+
+    def close(self):
+        """Закрытие всех браузеров пула"""
+        with self._condition:
+            drivers, self._all, self._idle = self._all, [], []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+
+    def _discard(self, driver: WebDriver):
+        with self._condition:
+            if driver in self._all:
+                self._all.remove(driver)
+            self._condition.notify()
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
+def reset_browser_state(driver: WebDriver, origins: Iterable[str] = ()):
+    """
+    Очистка состояния браузера между тестами: вкладки, куки, хранилища
+
+    WebDriver видит только документ открытой страницы: delete_all_cookies
+    и localStorage.clear() очищают лишь ее origin. Поэтому:
+    - вместо всех вкладок открывается новая (sessionStorage принадлежит вкладке);
+    - в Chrome куки всех доменов и хранилища перечисленных origin очищаются через DevTools;
+    - в остальных браузерах каждый origin открывается и очищается по очереди.
+
+    Args:
+        driver: Браузер
+        origins: Адреса, чьи хранилища нужно очистить, кроме адреса открытой страницы
+    """
+    targets = {_origin(url) for url in (driver.current_url, *origins)} - {None}
+
+    old_handles = driver.window_handles
+    driver.switch_to.new_window("tab")
+    fresh = driver.current_window_handle
+    for handle in old_handles:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(fresh)
+
+    if hasattr(driver, "execute_cdp_cmd"):
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in sorted(targets):
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                "origin": origin,
+                "storageTypes": "local_storage,indexeddb,websql,cache_storage,service_workers",
+            })
+        return
+
+    for origin in sorted(targets):
+        driver.get(origin)
+        driver.delete_all_cookies()
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except JavascriptException:
+            pass  # Страница без доступа к хранилищам (например, ошибка сети)
+    driver.get("about:blank")
+
+
+def _origin(url: str) -> Optional[str]:
+    parts = urlsplit(url or "")
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None  # about:blank, data: и т.п. - хранилищ нет
+    return f"{parts.scheme}://{parts.netloc}"
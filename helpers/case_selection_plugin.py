@@ -0,0 +1,133 @@
+"""
+Pytest-плагин: связь тестов с каталогом тест-кейсов и выбор тестов по нему
+
+Тест связывается с кейсом маркером @pytest.mark.case("CART-001"), а без маркера -
+по имени тестовой функции (ключ кейса в data/cases/*.yaml).
+
+    pytest --case-tag smoke --case-severity blocker --case-severity critical
+    pytest --case-id REG-001 --case-id LOGIN-001
+    pytest --case-query "smoke and layer=API and not negative"
+
+Значения одной опции объединяются через ИЛИ, разные опции - через И.
+Тесты, не подходящие под отбор (и не связанные ни с одним кейсом),
+снимаются при сборке, до подготовки фикстур.
+
+Связь тест -> кейс (id, теги, критичность, слой) кэшируется в .pytest_cache
+и пересчитывается, только если изменились файлы каталога, поэтому повторные
+прогоны с --case-tag/--case-id/--case-severity не загружают каталог.
+"""
+
+from typing import Dict, Optional
+
+import pytest
+
+from data.case_query import QuerySyntaxError, select
+from data.test_cases import all_test_cases, get_registry
+
+
+CACHE_KEY = "demowebshop/case_map"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("demowebshop")
+    group.addoption("--case-tag", action="append", default=[], metavar="TAG",
+                    help="Запускать только тесты, чьи кейсы отмечены тегом (можно повторять)")
+    group.addoption("--case-id", action="append", default=[], metavar="ID",
+                    help="Запускать только тесты указанных кейсов, например REG-001 (можно повторять)")
+    group.addoption("--case-severity", action="append", default=[], metavar="SEVERITY",
+                    help="Запускать только тесты кейсов указанной критичности (можно повторять)")
+    group.addoption("--case-query", default=None, metavar="QUERY",
+                    help='Составной запрос к каталогу, например "smoke and layer=API and not negative"')
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "case(id): связь теста с тест-кейсом каталога по id")
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    # Регистр значений не учитывается, как и в --case-query
+    tags = {tag.casefold() for tag in config.getoption("case_tag")}
+    ids = {test_id.casefold() for test_id in config.getoption("case_id")}
+    severities = {severity.casefold() for severity in config.getoption("case_severity")}
+    query = config.getoption("case_query")
+    if not (tags or ids or severities or query):
+        return
+
+    mapping = CaseMap(config)
+    query_ids = None
+    if query:
+        try:
+            query_ids = {case.id for case in select(query)}
+        except QuerySyntaxError as error:
+            raise pytest.UsageError(f"--case-query: {error}")
+
+    selected, deselected = [], []
+    for item in items:
+        case = mapping.resolve(item)
+        matched = (
+            case is not None
+            and (not tags or bool(tags.intersection(tag.casefold() for tag in case["tags"])))
+            and (not ids or case["id"].casefold() in ids)
+            and (not severities or case["severity"].casefold() in severities)
+            and (query_ids is None or case["id"] in query_ids)
+        )
+        (selected if matched else deselected).append(item)
+    mapping.save()
+
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def case_key(item) -> str:
+    """Ключ поиска кейса для теста: явный id из маркера или имя функции"""
+    marker = item.get_closest_marker("case")
+    if marker and marker.args:
+        return f"id:{marker.args[0]}"
+    return f"name:{getattr(item, 'originalname', item.name)}"
+
+
+class CaseMap:
+    """
+    Кэш 'ключ теста -> атрибуты кейса' между прогонами
+
+    Каталог загружается только при промахе кэша. Кэш сбрасывается целиком,
+    если изменились файлы каталога.
+    """
+
+    def __init__(self, config):
+        self.cache = config.cache if hasattr(config, "cache") else None
+        self.signature = all_test_cases.signature()
+        self.entries: Dict[str, Optional[dict]] = {}
+        self._dirty = False
+        stored = self.cache.get(CACHE_KEY, None) if self.cache is not None else None
+        if stored and stored.get("signature") == self.signature:
+            self.entries = stored.get("entries", {})
+
+    def resolve(self, item) -> Optional[dict]:
+        key = case_key(item)
+        if key not in self.entries:
+            self.entries[key] = self._lookup(key)
+            self._dirty = True
+        return self.entries[key]
+
+    def save(self):
+        if self._dirty and self.cache is not None:
+            self.cache.set(CACHE_KEY, {"signature": self.signature, "entries": self.entries})
+            self._dirty = False
+
+    @staticmethod
+    def _lookup(key: str) -> Optional[dict]:
+        registry = get_registry()
+        kind, value = key.split(":", 1)
+        case = registry.get(value) if kind == "id" else registry.for_test(value)
+        if case is None:
+            return None
+        return {
+            "id": case.id,
+            "tags": list(case.tags),
+            "severity": case.severity,
+            "layer": case.layer,
+        }
+
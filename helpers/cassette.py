@@ -0,0 +1,468 @@
+"""
+Запись и воспроизведение HTTP-ответов на уровне транспорта requests и httpx
+
+Ответы хранятся в одном файле, куда записи только дописываются:
+строка-заголовок в JSON и следом тело ответа. При открытии файла
+строится индекс "ключ запроса -> смещения записей", тела читаются
+через mmap, так что воспроизведение одного запроса - O(1).
+
+Ключ не содержит схему и адрес сервера: кассета, записанная на заглушке
+со случайным портом, воспроизводится на любом другом адресе магазина.
+
+Тело ответа при записи не читается заранее: оно копируется по мере того,
+как его читает вызывающий код, поэтому потоковый разбор (stream=True)
+останавливается так же рано, как без кассеты. Если ответ закрыли,
+не дочитав, запись помечается неполной и воспроизводится только
+потоковым запросам.
+"""
+
+import hashlib
+import io
+import json
+import mmap
+import os
+import threading
+import zlib
+from email.message import Message
+from http.client import HTTPMessage
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: запись без межпроцессной блокировки
+    fcntl = None
+
+
+CASSETTE_ENV = "DEMOWEBSHOP_CASSETTE"
+CASSETTE_MODE_ENV = "DEMOWEBSHOP_CASSETTE_MODE"
+CASSETTE_MODES = ("record", "replay", "auto")
+
+# Заголовки, которые теряют смысл после того, как тело сохранено уже раскодированным
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """В режиме replay для запроса нет записанного ответа"""
+
+
+def request_key(request: Union[requests.PreparedRequest, httpx.Request]) -> str:
+    """
+    Нормализованный ключ запроса requests или httpx
+
+    Учитываются метод, путь с отсортированными параметрами и тело формы
+    с отсортированными полями, поэтому порядок ключей в словарях data/params
+    на ключ не влияет. Схема и адрес сервера в ключ не входят.
+    """
+    if isinstance(request, httpx.Request):
+        body = request.content
+    else:
+        body = request.body or b""
+    parts = urlsplit(str(request.url))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    url = urlunsplit(("", "", parts.path or "/", query, ""))
+
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    content_type = request.headers.get("Content-Type", "")
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        body = urlencode(sorted(parse_qsl(body.decode("utf-8"), keep_blank_values=True))).encode("utf-8")
+
+    raw = json.dumps([request.method.upper(), url, hashlib.sha256(body).hexdigest()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Файл записанных ответов с индексом по смещениям
+
+    Один и тот же запрос может встречаться несколько раз с разными
+    ответами (например, корзина до и после добавления товара), поэтому
+    по ключу хранится список записей, и воспроизводятся они по порядку.
+    После последней записи повторяется последняя.
+
+    Запись помнит тест, во время которого сделана (PYTEST_CURRENT_TEST),
+    и порядок воспроизведения ведется отдельно для каждого теста: тест
+    получает свои ответы независимо от того, какие тесты шли до него
+    и в каком порядке. Ответы, записанные вне тестов или другим тестом,
+    используются, только если у теста своих записей для ключа нет.
+
+    Args:
+        path: Путь к файлу кассеты
+        mode: record - всегда в сеть с записью, replay - только из кассеты,
+              auto - из кассеты, а недостающее записать
+    """
+
+    _opened: Dict[Tuple[str, str], "Cassette"] = {}
+    _opened_lock = threading.Lock()
+
+    def __init__(self, path: str, mode: str = "auto"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Неизвестный режим кассеты: {mode}")
+        self.path = path
+        self.mode = mode
+        self._index: Dict[str, List[Tuple[dict, int, int]]] = {}
+        self._played: Dict[Tuple[Optional[str], str], int] = {}
+        self._lock = threading.Lock()
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._build_index()
+
+    @classmethod
+    def open(cls, path: str, mode: str = "auto") -> "Cassette":
+        """Одна кассета на файл в пределах процесса: общий индекс и счетчики воспроизведения"""
+        key = (os.path.abspath(path), mode)
+        with cls._opened_lock:
+            if key not in cls._opened:
+                cls._opened[key] = cls(path, mode)
+            return cls._opened[key]
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        path = os.environ.get(CASSETTE_ENV)
+        if not path:
+            return None
+        return cls.open(path, os.environ.get(CASSETTE_MODE_ENV, "auto"))
+
+    @classmethod
+    def close_all(cls):
+        with cls._opened_lock:
+            for cassette in cls._opened.values():
+                cassette.close()
+            cls._opened.clear()
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._index.values())
+
+    def play(self, key: str, stream: bool = False) -> Optional[Tuple[dict, bytes]]:
+        """
+        Очередной записанный ответ для ключа в текущем тесте или None
+
+        Args:
+            key: Ключ запроса (request_key)
+            stream: Потоковый запрос, ему подходят и неполные записи
+        """
+        test = current_test()
+        with self._lock:
+            records = self._test_records(key, test)
+            if not records:
+                return None
+            position = min(self._played.get((test, key), 0), len(records) - 1)
+            header, offset, length = records[position]
+            if header.get("partial") and not stream:
+                return None  # тело записано не целиком, нужен полный ответ
+            self._played[(test, key)] = position + 1
+            return header, self._read(offset, length)
+
+    def record(self, key: str, status: int, reason: str, header_items, body: bytes, partial: bool = False):
+        """
+        Дописывает ответ в конец файла и в индекс
+
+        Args:
+            body: Уже раскодированное тело
+            partial: Тело прочитано не до конца
+        """
+        test = current_test()
+        header = {
+            "key": key,
+            "test": test,
+            "status": status,
+            "reason": reason,
+            "headers": [[name, value] for name, value in header_items if name.lower() not in _DROPPED_HEADERS],
+            "length": len(body),
+        }
+        if partial:
+            header["partial"] = True
+        line = json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "ab") as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0, os.SEEK_END)
+                    offset = f.tell() + len(line)
+                    f.write(line + body)
+                finally:
+                    if fcntl:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            self._index.setdefault(key, []).append((header, offset, len(body)))
+            # Записанный сейчас ответ уже "проигран", иначе повтор запроса вернул бы его же
+            self._played[(test, key)] = len(self._test_records(key, test))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped_size = 0
+
+    def _build_index(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    break  # Недописанная запись в конце файла
+                header = json.loads(line)
+                offset = f.tell()
+                f.seek(header["length"], os.SEEK_CUR)
+                self._index.setdefault(header["key"], []).append((header, offset, header["length"]))
+
+    def _test_records(self, key: str, test: Optional[str]) -> List[Tuple[dict, int, int]]:
+        records = self._index.get(key, [])
+        own = [record for record in records if record[0].get("test") == test]
+        return own or records
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if length == 0:
+            return b""
+        if self._map is None or offset + length > self._mapped_size:
+            # Файл дописан после отображения в память - переоткрываем mmap
+            self.close()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+        return self._map[offset:offset + length]
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    Транспортный адаптер requests поверх кассеты
+
+    Запросы, которых нет в кассете, уходят во внутренний адаптер
+    (в режиме replay вместо этого поднимается CassetteMissError).
+    """
+
+    def __init__(self, cassette: Cassette, inner: Optional[HTTPAdapter] = None):
+        super().__init__()
+        self.cassette = cassette
+        self.inner = inner or HTTPAdapter()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request)
+        if self.cassette.mode != "record":
+            record = self.cassette.play(key, stream=stream)
+            if record:
+                return self._replay(request, *record)
+            if self.cassette.mode == "replay":
+                raise CassetteMissError(f"Нет записи для {request.method} {request.url}", request=request)
+
+        response = self.inner.send(request, stream=stream, timeout=timeout,
+                                   verify=verify, cert=cert, proxies=proxies)
+        # Тело не читается здесь: без stream его дочитает requests, со stream - вызывающий код
+        recording = _Recording(self.cassette, key, response.status_code, response.reason,
+                               _raw_header_items(response))
+        response.raw = _TeeRaw(response.raw, recording)
+        return response
+
+    def close(self):
+        self.inner.close()
+
+    def _replay(self, request, header: dict, body: bytes) -> requests.Response:
+        return build_response(self.inner, request, header["status"], header["reason"], header["headers"], body)
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx поверх той же кассеты, что и CassetteAdapter
+
+    Асинхронный клиент пишет и воспроизводит ответы в общий файл,
+    поэтому в режиме replay тесты с AsyncDemoWebShopAPI тоже не ходят в сеть.
+    """
+
+    def __init__(self, cassette: Cassette, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.cassette = cassette
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = request_key(request)
+        if self.cassette.mode != "record":
+            record = self.cassette.play(key)
+            if record:
+                header, body = record
+                return httpx.Response(header["status"], headers=header["headers"], content=body,
+                                      request=request, extensions={"reason_phrase": header["reason"].encode()})
+            if self.cassette.mode == "replay":
+                raise CassetteMissError(f"Нет записи для {request.method} {request.url}")
+
+        response = await self.inner.handle_async_request(request)
+        recording = _Recording(self.cassette, key, response.status_code, response.reason_phrase,
+                               response.headers.multi_items(), encoding=response.headers.get("Content-Encoding"))
+        return httpx.Response(response.status_code, headers=response.headers, stream=_TeeStream(response.stream, recording),
+                              request=request, extensions=response.extensions)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class _Recording:
+    """
+    Тело ответа, которое копится по мере чтения и попадает в кассету один раз
+
+    Args:
+        encoding: Content-Encoding копящихся кусков (httpx отдает тело еще не раскодированным)
+    """
+
+    def __init__(self, cassette: Cassette, key: str, status: int, reason: str, header_items,
+                 encoding: Optional[str] = None):
+        self.cassette = cassette
+        self.key = key
+        self.status = status
+        self.reason = reason
+        self.header_items = list(header_items)
+        self.encoding = encoding
+        self._chunks: List[bytes] = []
+        self._finished = False
+
+    def feed(self, chunk: bytes):
+        self._chunks.append(chunk)
+
+    def finish(self, complete: bool):
+        if self._finished:
+            return
+        self._finished = True
+        body = b"".join(self._chunks)
+        if self.encoding:
+            try:
+                body = _decode(body, self.encoding)
+            except Exception:
+                return  # неполное сжатое тело не раскодировать: пусть останется промахом
+        self.cassette.record(self.key, self.status, self.reason, self.header_items, body, partial=not complete)
+
+    def abandon(self):
+        self._finished = True
+
+
+class _TeeRaw:
+    """Обертка над urllib3-ответом: куски, которые requests читает через stream, копятся для кассеты"""
+
+    def __init__(self, raw, recording: _Recording):
+        self._raw = raw
+        self._recording = recording
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None) -> Iterator[bytes]:
+        if not decode_content:
+            self._recording.abandon()  # сжатое тело в кассету не пишется
+            yield from self._raw.stream(amt, decode_content=decode_content)
+            return
+        for chunk in self._raw.stream(amt, decode_content=True):
+            self._recording.feed(chunk)
+            yield chunk
+        self._recording.finish(complete=True)
+
+    def read(self, *args, **kwargs) -> bytes:
+        # Прямое чтение response.raw в обход iter_content: кодировку тела не проверить
+        self._recording.abandon()
+        return self._raw.read(*args, **kwargs)
+
+    def close(self):
+        self._recording.finish(complete=False)
+        self._raw.close()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class _TeeStream(httpx.AsyncByteStream):
+    """Поток тела httpx: прочитанные куски копятся для кассеты"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, recording: _Recording):
+        self._stream = stream
+        self._recording = recording
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._recording.feed(chunk)
+            yield chunk
+        self._recording.finish(complete=True)
+
+    async def aclose(self):
+        self._recording.finish(complete=False)
+        await self._stream.aclose()
+
+
+def _decode(body: bytes, encoding: str) -> bytes:
+    """Раскодирование тела по Content-Encoding (gzip, deflate, identity)"""
+    for coding in reversed([part.strip().lower() for part in encoding.split(",")]):
+        if coding in ("gzip", "x-gzip"):
+            body = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body)
+        elif coding == "deflate":
+            body = zlib.decompress(body)
+        elif coding not in ("", "identity"):
+            raise ValueError(f"Неподдерживаемый Content-Encoding: {coding}")
+    return body
+
+
+def current_test() -> Optional[str]:
+    """nodeid выполняемого теста pytest или None вне тестов"""
+    current = os.environ.get("PYTEST_CURRENT_TEST")
+    return current.rsplit(" ", 1)[0] if current else None
+
+
+def build_response(adapter: HTTPAdapter, request, status: int, reason: str,
+                   header_items, body: bytes) -> requests.Response:
+    """
+    Ответ requests из сохраненных статуса, заголовков и тела (без обращения к сети)
+
+    Args:
+        adapter: Адаптер, который соберет requests.Response (куки, кодировка, url)
+        request: Исходный запрос
+        header_items: Пары (имя, значение), повторы заголовков сохраняются
+    """
+    headers = HTTPHeaderDict()
+    message = HTTPMessage()
+    for name, value in header_items:
+        headers.add(name, value)
+        message[name] = value
+    headers["Content-Length"] = str(len(body))
+    raw = HTTPResponse(
+        body=io.BytesIO(body),
+        headers=headers,
+        status=status,
+        reason=reason,
+        preload_content=False,
+        decode_content=False,
+        # requests достает Set-Cookie из исходного http.client-ответа
+        original_response=_RecordedOriginal(message),
+    )
+    return adapter.build_response(request, raw)
+
+
+class _RecordedOriginal:
+    """Минимальная замена http.client.HTTPResponse, которую ожидают urllib3 и cookiejar"""
+
+    def __init__(self, msg: HTTPMessage):
+        self.msg = msg
+        self._closed = False
+
+    def isclosed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+
+def _raw_header_items(response: requests.Response):
+    """Заголовки ответа с повторами (несколько Set-Cookie не склеиваются)"""
+    original = getattr(response.raw, "_original_response", None)
+    msg: Optional[Message] = getattr(original, "msg", None)
+    if msg is not None:
+        return msg.items()
+    return response.headers.items()
+
+
+def mount_cassette(session: requests.Session, cassette: Cassette, inner: Optional[HTTPAdapter] = None):
+    """Подключает кассету к сессии для http и https поверх внутреннего адаптера"""
+    adapter = CassetteAdapter(cassette, inner)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
@@ -0,0 +1,116 @@
+"""
+Pytest-плагин: история длительностей тестов и распределение по воркерам xdist
+
+Каждый прогон сохраняет длительности тестов в .pytest_cache/d/demowebshop/durations.json.
+С опцией --duration-schedule тесты раздаются воркерам от самых долгих к коротким:
+освободившийся воркер получает самый долгий из оставшихся тестов, поэтому
+медленные тесты (браузер, регистрация, корзина из нескольких товаров) не
+остаются в конце прогона на одном воркере.
+
+    pytest -n 4 --duration-schedule
+"""
+
+from collections import defaultdict
+from typing import Dict
+
+import pytest
+
+from helpers.durations import DurationStore
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("demowebshop")
+    group.addoption("--duration-schedule", action="store_true", default=False,
+                    help="Раздавать тесты воркерам xdist от долгих к коротким по истории длительностей")
+    group.addoption("--no-duration-history", action="store_true", default=False,
+                    help="Не сохранять длительности тестов этого прогона")
+
+
+def pytest_configure(config):
+    # На воркерах xdist история не нужна: отчеты с длительностями приходят контроллеру
+    if hasattr(config, "workerinput"):
+        return
+    config.pluginmanager.register(DurationRecorder(config), "demowebshop-durations")
+
+
+class DurationRecorder:
+    """Сбор длительностей фаз тестов на контроллере и сохранение истории"""
+
+    def __init__(self, config):
+        self.config = config
+        path = None
+        if getattr(config, "cache", None) is not None:
+            path = str(config.cache.mkdir("demowebshop") / "durations.json")
+        self.store = DurationStore(path)
+        self.measured: Dict[str, float] = defaultdict(float)
+
+    def pytest_runtest_logreport(self, report):
+        self.measured[report.nodeid] += report.duration
+
+    def pytest_sessionfinish(self, session):
+        if self.config.getoption("no_duration_history") or not self.measured:
+            return
+        self.store.update(self.measured)
+        self.store.prune_missing(str(self.config.rootpath))
+        self.store.save()
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_make_scheduler(self, config, log):
+        if not config.getoption("duration_schedule"):
+            return None
+        from xdist.scheduler import LoadScheduling
+
+        store = self.store
+
+        class DurationScheduling(LoadScheduling):
+            """
+            Раздача тестов по убыванию ожидаемой длительности (жадный LPT)
+
+            У каждого воркера в очереди не больше двух тестов: xdist начинает тест,
+            только когда знает следующий. Как только воркер завершает тест, ему
+            отправляется самый долгий из еще не розданных.
+            """
+
+            def schedule(self):
+                assert self.collection_is_completed
+                if self.collection is not None:
+                    for node in self.nodes:
+                        self.check_schedule(node)
+                    return
+                if not self._check_nodes_have_same_collection():
+                    self.log("**Different tests collected, aborting run**")
+                    return
+
+                self.collection = next(iter(self.node2collection.values()))
+                estimates = [store.estimate(nodeid) for nodeid in self.collection]
+                self.pending[:] = sorted(range(len(self.collection)), key=lambda i: -estimates[i])
+                self.log(
+                    "ожидаемая длительность:", round(sum(estimates), 1), "с,",
+                    "идеально на воркер:", round(_ideal_makespan(estimates, len(self.nodes)), 1), "с"
+                )
+                # Первая раздача по кругу: каждому воркеру по одному из самых долгих тестов
+                for _ in range(2):
+                    for node in self.nodes:
+                        self._send_tests(node, 1)
+                if not self.pending:
+                    for node in self.nodes:
+                        node.shutdown()
+
+            def check_schedule(self, node, duration: float = 0):
+                if node.shutting_down:
+                    return
+                if self.pending:
+                    missing = 2 - len(self.node2pending[node])
+                    if missing > 0:
+                        self._send_tests(node, missing)
+                else:
+                    node.shutdown()
+
+        return DurationScheduling(config, log)
+
+
+def _ideal_makespan(estimates, workers: int) -> float:
+    """Нижняя граница времени прогона: равномерная загрузка, но не меньше самого долгого теста"""
+    if not estimates or not workers:
+        return 0.0
+    return max(sum(estimates) / workers, max(estimates))
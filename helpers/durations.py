@@ -0,0 +1,94 @@
+"""
+История длительностей тестов
+
+Для каждого теста (nodeid) хранится сглаженная длительность всех фаз
+(setup + call + teardown) по прошлым прогонам. Хранилище - компактный JSON
+в .pytest_cache, значения округлены до миллисекунд.
+"""
+
+import json
+import os
+import statistics
+from typing import Dict, Optional
+
+# Вес нового замера в сглаженной длительности
+SMOOTHING = 0.5
+# Оценка для теста, у которого нет истории ни у него, ни у соседей по файлу
+DEFAULT_ESTIMATE = 1.0
+
+
+class DurationStore:
+    """
+    Длительности тестов между прогонами
+
+    Args:
+        path: JSON-файл хранилища (None - только в памяти)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.durations: Dict[str, float] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.durations = {k: float(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError, AttributeError):
+                self.durations = {}
+        self._by_file: Optional[Dict[str, float]] = None
+        self._median: Optional[float] = None
+
+    def update(self, measured: Dict[str, float]):
+        """Учет длительностей текущего прогона"""
+        for nodeid, duration in measured.items():
+            previous = self.durations.get(nodeid)
+            value = duration if previous is None else previous + SMOOTHING * (duration - previous)
+            self.durations[nodeid] = round(value, 3)
+        self._by_file = None
+        self._median = None
+
+    def estimate(self, nodeid: str) -> float:
+        """
+        Ожидаемая длительность теста
+
+        Новый тест оценивается медианой тестов того же файла,
+        а если их тоже нет - медианой всех известных тестов.
+        """
+        known = self.durations.get(nodeid)
+        if known is not None:
+            return known
+        if self._by_file is None:
+            self._by_file = self._file_medians()
+        file_estimate = self._by_file.get(_file_of(nodeid))
+        if file_estimate is not None:
+            return file_estimate
+        if self._median is None:
+            self._median = statistics.median(self.durations.values()) if self.durations else DEFAULT_ESTIMATE
+        return self._median
+
+    def prune_missing(self, rootdir: str):
+        """Удаление тестов из файлов, которых больше нет"""
+        self.durations = {
+            k: v for k, v in self.durations.items()
+            if os.path.exists(os.path.join(rootdir, _file_of(k)))
+        }
+        self._by_file = None
+        self._median = None
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.durations, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _file_medians(self) -> Dict[str, float]:
+        grouped: Dict[str, list] = {}
+        for nodeid, duration in self.durations.items():
+            grouped.setdefault(_file_of(nodeid), []).append(duration)
+        return {path: statistics.median(values) for path, values in grouped.items()}
+
+
+def _file_of(nodeid: str) -> str:
+    return nodeid.split("::", 1)[0]
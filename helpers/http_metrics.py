@@ -0,0 +1,185 @@
+"""
+Замеры HTTP-запросов DemoWebShopAPI
+
+Каждый логический запрос (вместе с редиректами) превращается в RequestRecord:
+метод помощника, эндпоинт, статус, размер тела, время до первого байта
+и полное время. Записи уходят в обработчики сессии (request_hooks),
+по умолчанию - в общий на процесс MetricsCollector.
+"""
+
+import functools
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from helpers.stats import summarize
+
+
+# Границы корзин гистограммы в миллисекундах, последняя корзина - "больше"
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_ADD_TO_CART_PATH = re.compile(r"^/addproducttocart/(\w+)/\d+/(\d+)$")
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+_operation: ContextVar[Optional[str]] = ContextVar("demowebshop_operation", default=None)
+_in_send: ContextVar[bool] = ContextVar("demowebshop_in_send", default=False)
+
+
+@dataclass
+class RequestRecord:
+    operation: str
+    method: str
+    endpoint: str
+    status: int
+    bytes: int
+    ttfb: float
+    total: float
+    redirects: int = 0
+    test: Optional[str] = None
+
+
+def tracked(func):
+    """Декоратор метода помощника: запросы внутри вызова помечаются именем метода"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _operation.set(func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _operation.reset(token)
+    return wrapper
+
+
+def normalize_endpoint(method: str, url: str) -> str:
+    """Эндпоинт без параметров и с обобщенными id: 'POST /addproducttocart/catalog/{id}/1'"""
+    path = urlsplit(url).path or "/"
+    # Последний сегмент у addproducttocart - тип корзины (1 - корзина, 2 - список желаний), а не id
+    cart_path = _ADD_TO_CART_PATH.sub(r"/addproducttocart/\1/{id}/\2", path)
+    if cart_path == path:
+        path = _ID_SEGMENT.sub("/{id}", path)
+    else:
+        path = cart_path
+    return f"{method.upper()} {path}"
+
+
+class MetricsCollector:
+    """Накопитель записей о запросах с агрегацией по эндпоинтам"""
+
+    def __init__(self):
+        self.records: List[RequestRecord] = []
+        self.current_test: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def add(self, record: RequestRecord):
+        if record.test is None:
+            record.test = self.current_test
+        with self._lock:
+            self.records.append(record)
+
+    def extend(self, records: List[dict]):
+        """Добавление записей, полученных от воркеров xdist"""
+        with self._lock:
+            self.records.extend(RequestRecord(**record) for record in records)
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+    def for_test(self, nodeid: str) -> List[RequestRecord]:
+        with self._lock:
+            return [r for r in self.records if r.test == nodeid]
+
+    def by_endpoint(self) -> Dict[str, dict]:
+        grouped: Dict[str, List[RequestRecord]] = defaultdict(list)
+        with self._lock:
+            for record in self.records:
+                grouped[record.endpoint].append(record)
+        return {endpoint: _aggregate(records) for endpoint, records in grouped.items()}
+
+    def slowest(self, limit: int = 5, key: str = "p95") -> List[tuple]:
+        stats = self.by_endpoint()
+        return sorted(stats.items(), key=lambda item: item[1]["total"][key], reverse=True)[:limit]
+
+    def to_json(self) -> dict:
+        with self._lock:
+            requests_count = len(self.records)
+            total_time = sum(r.total for r in self.records)
+        return {
+            "requests": requests_count,
+            "total_time": total_time,
+            "histogram_bounds_ms": list(HISTOGRAM_BOUNDS_MS),
+            "endpoints": self.by_endpoint(),
+        }
+
+    def export_records(self) -> List[dict]:
+        with self._lock:
+            return [asdict(record) for record in self.records]
+
+
+collector = MetricsCollector()
+
+
+class InstrumentedSession(requests.Session):
+    """
+    requests.Session с замером каждого логического запроса
+
+    Обработчики из request_hooks получают RequestRecord после того, как
+    тело ответа прочитано. Переходы по редиректам входят в запись
+    исходного запроса и отдельно не учитываются.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.request_hooks: List[Callable[[RequestRecord], None]] = [collector.add]
+
+    def send(self, request, **kwargs):
+        if _in_send.get():
+            return super().send(request, **kwargs)
+
+        token = _in_send.set(True)
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            _in_send.reset(token)
+        total = time.perf_counter() - start
+
+        first = response.history[0] if response.history else response
+        streamed = kwargs.get("stream", False)
+        record = RequestRecord(
+            operation=_operation.get() or "session",
+            method=request.method,
+            endpoint=normalize_endpoint(request.method, request.url),
+            status=response.status_code,
+            bytes=0 if streamed else len(response.content),
+            ttfb=first.elapsed.total_seconds(),
+            total=total,
+            redirects=len(response.history),
+        )
+        for hook in self.request_hooks:
+            hook(record)
+        return response
+
+
+def _aggregate(records: List[RequestRecord]) -> dict:
+    histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for record in records:
+        ms = record.total * 1000
+        bucket = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS_MS) if ms <= bound), len(HISTOGRAM_BOUNDS_MS))
+        histogram[bucket] += 1
+    return {
+        "operations": sorted({r.operation for r in records}),
+        "count": len(records),
+        "bytes": sum(r.bytes for r in records),
+        "statuses": dict(Counter(str(r.status) for r in records)),
+        "ttfb": summarize(r.ttfb for r in records),
+        "total": summarize(r.total for r in records),
+        "histogram": histogram,
+    }
@@ -0,0 +1,91 @@
+"""
+Pytest-плагин: метрики HTTP-запросов DemoWebShopAPI за прогон
+
+- к каждому тесту с запросами прикладывается компактная таблица запросов;
+- --http-metrics=PATH сохраняет JSON-сводку по эндпоинтам с гистограммами;
+- в конце прогона печатаются самые медленные эндпоинты.
+
+Под xdist воркеры передают записи контроллеру через workeroutput.
+"""
+
+import json
+import os
+
+import pytest
+from allure_commons.types import AttachmentType
+
+from helpers import attachments
+from helpers.http_metrics import collector
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("demowebshop")
+    group.addoption("--http-metrics", default=None, metavar="PATH",
+                    help="Сохранить JSON-сводку по HTTP-запросам DemoWebShopAPI")
+    group.addoption("--http-metrics-top", type=int, default=5,
+                    help="Сколько самых медленных эндпоинтов показать в конце прогона (0 - не показывать)")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    collector.current_test = item.nodeid
+    item.stash[_start_key] = len(collector.records)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    yield
+    if call.when != "call":
+        return
+    records = [r for r in collector.records[item.stash.get(_start_key, 0):] if r.test == item.nodeid]
+    if records:
+        attachments.attach(lambda: _format_records(records), "http_requests.txt", AttachmentType.TEXT)
+
+
+def pytest_runtest_teardown(item):
+    collector.current_test = None
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    workeroutput = getattr(config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["http_metrics"] = collector.export_records()
+        return
+    path = config.getoption("http_metrics")
+    if path and collector.records:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(collector.to_json(), f, ensure_ascii=False, indent=2)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    collector.extend(getattr(node, "workeroutput", {}).get("http_metrics", []))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    top = config.getoption("http_metrics_top")
+    if not top or not collector.records or hasattr(config, "workeroutput"):
+        return
+    terminalreporter.section("HTTP: самые медленные эндпоинты")
+    terminalreporter.write_line(f"{'эндпоинт':<44}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'ttfb p95':>10}")
+    for endpoint, stats in collector.slowest(top):
+        terminalreporter.write_line(
+            f"{endpoint:<44}{stats['count']:>7}"
+            f"{stats['total']['p50'] * 1000:>9.1f}{stats['total']['p95'] * 1000:>9.1f}"
+            f"{stats['ttfb']['p95'] * 1000:>10.1f}"
+        )
+
+
+_start_key = pytest.StashKey[int]()
+
+
+def _format_records(records) -> str:
+    lines = [f"{'метод':<22}{'эндпоинт':<42}{'код':>5}{'байт':>9}{'ttfb ms':>9}{'всего ms':>10}"]
+    for r in records:
+        lines.append(
+            f"{r.operation:<22}{r.endpoint:<42}{r.status:>5}{r.bytes:>9}"
+            f"{r.ttfb * 1000:>9.1f}{r.total * 1000:>10.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,344 @@
+"""
+Нагрузочный прогон сценариев на методах DemoWebShopAPI
+
+Каждый виртуальный пользователь - отдельный поток со своим клиентом
+и своей сессией. Время и ошибки собираются по каждому методу помощника.
+Ошибка - это не только статус 4xx/5xx или исключение: неудачный вход
+(200 со страницей "Login was unsuccessful") и отказ добавления в корзину
+(success=false) тоже считаются ошибками. Лимит --rate действует на каждый
+HTTP-запрос (включая редиректы), а не на вызов метода помощника.
+
+Пример запуска против локального заменителя магазина:
+    python -m helpers.load_runner --stub --users 20 --ramp-up 5 --duration 30 --rate 50
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from requests.adapters import BaseAdapter
+
+from data.test_data import TestData
+from helpers import attachments
+from helpers.api_helpers import DemoWebShopAPI
+from helpers.stats import summarize
+from helpers.test_accounts import derive_user
+
+
+Scenario = Callable[[DemoWebShopAPI, dict], None]
+
+# Страница входа с этим текстом приходит со статусом 200, но вход не выполнен
+LOGIN_FAILED_MARKER = "Login was unsuccessful"
+
+# Проверки результата по методам помощника: статус ответа успешный, а операция - нет
+OUTCOME_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "login": lambda response: LOGIN_FAILED_MARKER not in response.text,
+    "add_to_cart": lambda response: response.page.success,
+}
+
+
+def checkout_scenario(api: DemoWebShopAPI, user: dict):
+    """Сценарий по умолчанию: регистрация -> вход -> корзина -> оформление заказа"""
+    product = TestData.PRODUCTS["simple_computer"]
+    api.register(
+        email=user["email"],
+        password=user["password"],
+        first_name=user["first_name"],
+        last_name=user["last_name"]
+    )
+    api.login(email=user["email"], password=user["password"])
+    api.add_to_cart(product_id=product["id"], quantity=1)
+    api.get_cart()
+    api.checkout({"termsofservice": "on"})
+
+
+def make_virtual_user(run_id: str, number: int, iteration: int = 0) -> dict:
+    """Уникальный пользователь на основе TestData.TEST_USER"""
+    return derive_user(f"load-{run_id}-{number}-{iteration}")
+
+
+@dataclass
+class LoadProfile:
+    """
+    Профиль нагрузки
+
+    Attributes:
+        users: Количество виртуальных пользователей
+        ramp_up: За сколько секунд запускаются все пользователи (равномерно)
+        duration: Длительность прогона в секундах
+        rate: Целевое число запросов в секунду на весь прогон (None - без ограничения)
+        iterations: Сколько раз каждый пользователь проходит сценарий (None - до конца duration)
+    """
+    users: int = 10
+    ramp_up: float = 0.0
+    duration: float = 30.0
+    rate: Optional[float] = None
+    iterations: Optional[int] = None
+
+
+class _RateLimiter:
+    """Общий на всех пользователей ограничитель: HTTP-запросы выдаются с равным интервалом"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._next = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.perf_counter()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class _ThrottledAdapter(BaseAdapter):
+    """Транспортный адаптер requests: каждый запрос сессии ждет слот ограничителя"""
+
+    def __init__(self, limiter: _RateLimiter, inner: BaseAdapter):
+        super().__init__()
+        self.limiter = limiter
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        return self.inner.send(request, **kwargs)
+
+    def close(self):
+        self.inner.close()
+
+
+def _throttle(client: DemoWebShopAPI, limiter: _RateLimiter):
+    adapter = _ThrottledAdapter(limiter, inner=client.session.get_adapter(client.base_url))
+    client.session.mount("http://", adapter)
+    client.session.mount("https://", adapter)
+
+
+def outcome_ok(method: str, result) -> bool:
+    """
+    Успешен ли вызов метода помощника
+
+    Args:
+        method: Имя метода DemoWebShopAPI
+        result: Что вернул метод (ответ requests, PageResponse или модель)
+    """
+    status = getattr(result, "status_code", None)
+    if status is not None and status >= 400:
+        return False
+    check = OUTCOME_CHECKS.get(method)
+    if check is None:
+        return True
+    try:
+        return bool(check(result))
+    except Exception:
+        return False  # ответ не разобрать - считаем операцию неудачной
+
+
+@dataclass
+class _Sample:
+    method: str
+    duration: float
+    ok: bool
+
+
+@dataclass
+class LoadReport:
+    """Результаты прогона по методам помощника"""
+    elapsed: float
+    samples: List[_Sample] = field(default_factory=list)
+    iterations: int = 0
+    failed_iterations: int = 0
+
+    def by_method(self) -> Dict[str, dict]:
+        grouped: Dict[str, List[_Sample]] = defaultdict(list)
+        for sample in self.samples:
+            grouped[sample.method].append(sample)
+        result = {}
+        for method, samples in grouped.items():
+            errors = sum(1 for s in samples if not s.ok)
+            result[method] = {
+                **summarize(s.duration for s in samples),
+                "errors": errors,
+                "error_rate": errors / len(samples),
+                "throughput": len(samples) / self.elapsed if self.elapsed else 0.0,
+            }
+        return result
+
+    def to_dict(self) -> dict:
+        errors = sum(1 for s in self.samples if not s.ok)
+        return {
+            "elapsed": self.elapsed,
+            "iterations": self.iterations,
+            "failed_iterations": self.failed_iterations,
+            "requests": len(self.samples),
+            "throughput": len(self.samples) / self.elapsed if self.elapsed else 0.0,
+            "error_rate": errors / len(self.samples) if self.samples else 0.0,
+            "methods": self.by_method(),
+        }
+
+    def format(self) -> str:
+        data = self.to_dict()
+        lines = [
+            f"Длительность: {data['elapsed']:.1f} c, итераций: {data['iterations']} "
+            f"(с ошибкой: {data['failed_iterations']}), запросов: {data['requests']}, "
+            f"{data['throughput']:.1f} req/s, ошибок: {data['error_rate']:.1%}",
+            f"{'метод':<24}{'count':>8}{'req/s':>9}{'err':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}",
+        ]
+        for method, stats in sorted(data["methods"].items()):
+            lines.append(
+                f"{method:<24}{stats['count']:>8}{stats['throughput']:>9.1f}{stats['error_rate']:>8.1%}"
+                f"{stats['p50'] * 1000:>9.1f}{stats['p95'] * 1000:>9.1f}{stats['p99'] * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+class _TimedAPI:
+    """
+    Обертка над DemoWebShopAPI: замеряет каждый вызов метода и проверяет его результат
+
+    Attributes:
+        failed: Хотя бы один вызов через обертку закончился ошибкой
+    """
+
+    def __init__(self, api: DemoWebShopAPI, record: Callable[[_Sample], None]):
+        self._api = api
+        self._record = record
+        self.failed = False
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception:
+                self._finish(name, time.perf_counter() - start, ok=False)
+                raise
+            # Проверка результата (разбор страницы) в замер времени не входит
+            self._finish(name, time.perf_counter() - start, ok=outcome_ok(name, result))
+            return result
+        return timed
+
+    def _finish(self, method: str, duration: float, ok: bool):
+        self.failed = self.failed or not ok
+        self._record(_Sample(method, duration, ok))
+
+
+class LoadRunner:
+    """
+    Запуск сценария заданным числом виртуальных пользователей
+
+    Args:
+        scenario: Функция (api, user) -> None на методах DemoWebShopAPI
+        profile: Профиль нагрузки
+        base_url: Адрес магазина (по умолчанию как у DemoWebShopAPI)
+    """
+
+    def __init__(self, scenario: Scenario = checkout_scenario, profile: Optional[LoadProfile] = None,
+                 base_url: Optional[str] = None):
+        self.scenario = scenario
+        self.profile = profile or LoadProfile()
+        self.base_url = base_url
+        self._lock = threading.Lock()
+
+    def run(self) -> LoadReport:
+        # Вложения Allure под нагрузкой не нужны и только копят память
+        previous_mode = attachments.policy.mode
+        attachments.configure(mode="never")
+        try:
+            return self._run()
+        finally:
+            attachments.configure(mode=previous_mode)
+
+    def _run(self) -> LoadReport:
+        profile = self.profile
+        run_id = uuid.uuid4().hex[:8]
+        limiter = _RateLimiter(profile.rate) if profile.rate else None
+        report = LoadReport(elapsed=0.0)
+        started = time.perf_counter()
+        deadline = started + profile.duration
+
+        def record(sample: _Sample):
+            with self._lock:
+                report.samples.append(sample)
+
+        def virtual_user(number: int):
+            delay = profile.ramp_up * number / profile.users if profile.users else 0
+            time.sleep(delay)
+            iteration = 0
+            while time.perf_counter() < deadline:
+                if profile.iterations is not None and iteration >= profile.iterations:
+                    break
+                client = DemoWebShopAPI(base_url=self.base_url)
+                # Замеры ведет сам прогон, общий накопитель метрик под нагрузкой не нужен
+                client.session.request_hooks.clear()
+                if limiter:
+                    _throttle(client, limiter)
+                api = _TimedAPI(client, record)
+                user = make_virtual_user(run_id, number, iteration)
+                try:
+                    self.scenario(api, user)
+                    failed = api.failed
+                except Exception:
+                    failed = True
+                with self._lock:
+                    report.iterations += 1
+                    report.failed_iterations += failed
+                iteration += 1
+
+        threads = [
+            threading.Thread(target=virtual_user, args=(n,), name=f"vu-{n}", daemon=True)
+            for n in range(profile.users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон сценария DemoWebShopAPI")
+    parser.add_argument("--users", type=int, default=10, help="Количество виртуальных пользователей")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Время запуска всех пользователей, с")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность прогона, с")
+    parser.add_argument("--rate", type=float, default=None, help="Целевое число запросов в секунду")
+    parser.add_argument("--iterations", type=int, default=None, help="Итераций сценария на пользователя")
+    parser.add_argument("--base-url", default=None, help="Адрес магазина")
+    parser.add_argument("--stub", action="store_true", help="Поднять локальный заменитель магазина")
+    parser.add_argument("--json", default=None, help="Сохранить отчет в JSON-файл")
+    args = parser.parse_args()
+
+    profile = LoadProfile(users=args.users, ramp_up=args.ramp_up, duration=args.duration,
+                          rate=args.rate, iterations=args.iterations)
+    stub = None
+    base_url = args.base_url
+    if args.stub:
+        from helpers.stub_server import DemoWebShopStub
+        stub = DemoWebShopStub().start()
+        base_url = stub.base_url
+    try:
+        report = LoadRunner(checkout_scenario, profile, base_url).run()
+    finally:
+        if stub:
+            stub.stop()
+
+    print(report.format())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Модели страниц DemoWebShop, разбираемые один раз при первом обращении
+
+Методы DemoWebShopAPI возвращают PageResponse: это обычный ответ
+(status_code, text и т.д. доступны как раньше) плюс свойство page
+с типизированной моделью страницы. HTML разбирается только при первом
+обращении к page, результат кэшируется.
+
+Example:
+    >>> cart = api.get_cart().page
+    >>> assert cart.has("Simple Computer")
+    >>> assert cart.quantity_of("14.1-inch Laptop") == 2
+"""
+
+import json
+import re
+from functools import cached_property
+from html.parser import HTMLParser
+from typing import Callable, Generic, Iterator, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+
+# --- модели ---
+
+class CartLine(BaseModel):
+    item_id: Optional[int] = None
+    name: str
+    unit_price: Optional[float] = None
+    quantity: int = 1
+    subtotal: Optional[float] = None
+
+
+class CartPage(BaseModel):
+    title: str = ""
+    lines: List[CartLine] = []
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.lines
+
+    @property
+    def names(self) -> List[str]:
+        return [line.name for line in self.lines]
+
+    @property
+    def total_quantity(self) -> int:
+        return sum(line.quantity for line in self.lines)
+
+    def has(self, name: str) -> bool:
+        return any(line.name == name for line in self.lines)
+
+    def quantity_of(self, name: str) -> int:
+        return sum(line.quantity for line in self.lines if line.name == name)
+
+
+class WishlistPage(CartPage):
+    pass
+
+
+class CustomerProfile(BaseModel):
+    title: str = ""
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    gender: Optional[str] = None
+
+    @property
+    def is_authenticated(self) -> bool:
+        return self.email is not None
+
+
+class ProductHit(BaseModel):
+    product_id: Optional[int] = None
+    name: str
+    price: Optional[float] = None
+
+
+class ProductList(BaseModel):
+    title: str = ""
+    hits: List[ProductHit] = []
+
+    @property
+    def names(self) -> List[str]:
+        return [hit.name for hit in self.hits]
+
+    def has(self, name: str) -> bool:
+        return any(hit.name == name for hit in self.hits)
+
+
+class AddToCartResult(BaseModel):
+    success: bool
+    message: str = ""
+    summary: Optional[str] = None
+
+
+class CartAddOutcome(BaseModel):
+    product_id: int
+    quantity: int
+    status_code: int
+    success: bool
+    message: str = ""
+
+
+class CartBatchResult(BaseModel):
+    """Итог пакетного добавления: результат по каждому товару и корзина после всех добавлений"""
+    outcomes: List[CartAddOutcome] = []
+    cart: Optional[CartPage] = None
+
+    @property
+    def failed(self) -> List[CartAddOutcome]:
+        return [outcome for outcome in self.outcomes if not outcome.success]
+
+    @property
+    def requested_quantity(self) -> int:
+        return sum(outcome.quantity for outcome in self.outcomes)
+
+    @property
+    def ok(self) -> bool:
+        """Все добавления успешны, и в корзине не меньше товаров, чем добавлено"""
+        if self.failed:
+            return False
+        return self.cart is None or self.cart.total_quantity >= self.requested_quantity
+
+
+# --- ответ с моделью ---
+
+M = TypeVar("M")
+
+
+class PageResponse(Generic[M]):
+    """
+    HTTP-ответ с лениво разобранной моделью страницы
+
+    Все атрибуты исходного ответа (requests или httpx) доступны напрямую.
+    """
+
+    def __init__(self, response, parser: Callable[[str], M]):
+        self.response = response
+        self._parser = parser
+
+    @cached_property
+    def page(self) -> M:
+        return self._parser(self.response.text)
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+    def __bool__(self) -> bool:
+        return bool(self.response)
+
+    def __repr__(self) -> str:
+        return f"<PageResponse {self.response!r}>"
+
+
+# --- разбор HTML ---
+
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+
+
+class _Node:
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag: str, attrs: dict, parent: Optional["_Node"]):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: list = []
+        self.parent = parent
+
+    @property
+    def classes(self) -> List[str]:
+        return (self.attrs.get("class") or "").split()
+
+    def iter(self) -> Iterator["_Node"]:
+        for child in self.children:
+            if isinstance(child, _Node):
+                yield child
+                yield from child.iter()
+
+    def find_all(self, tag: Optional[str] = None, cls: Optional[str] = None, **attrs) -> List["_Node"]:
+        return [
+            node for node in self.iter()
+            if (tag is None or node.tag == tag)
+            and (cls is None or cls in node.classes)
+            and all(node.attrs.get(key) == value for key, value in attrs.items())
+        ]
+
+    def find(self, tag: Optional[str] = None, cls: Optional[str] = None, **attrs) -> Optional["_Node"]:
+        found = self.find_all(tag, cls, **attrs)
+        return found[0] if found else None
+
+    @property
+    def text(self) -> str:
+        parts = []
+        for child in self.children:
+            parts.append(child.text if isinstance(child, _Node) else child)
+        return " ".join("".join(parts).split())
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("#root", {}, None)
+        self._current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, {k: (v or "") for k, v in attrs}, self._current)
+        self._current.children.append(node)
+        if tag not in _VOID_TAGS:
+            self._current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self._current.children.append(_Node(tag, {k: (v or "") for k, v in attrs}, self._current))
+
+    def handle_endtag(self, tag):
+        node = self._current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self._current = node.parent
+
+    def handle_data(self, data):
+        self._current.children.append(data)
+
+
+def _parse_html(html: str) -> _Node:
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", value)
+    return float(match.group().replace(",", "")) if match else None
+
+
+def _title(root: _Node) -> str:
+    heading = root.find(cls="page-title")
+    if heading:
+        return heading.text
+    title = root.find("title")
+    return title.text if title else ""
+
+
+def _cart_lines(root: _Node) -> List[CartLine]:
+    lines = []
+    for row in root.find_all("tr", cls="cart-item-row"):
+        name = row.find("a", cls="product-name")
+        if name is None:
+            continue
+        remove = row.find("input", name="removefromcart")
+        quantity = row.find("input", cls="qty-input")
+        unit_price = row.find("span", cls="product-unit-price")
+        subtotal = row.find("span", cls="product-subtotal")
+        lines.append(CartLine(
+            item_id=int(remove.attrs["value"]) if remove and remove.attrs.get("value", "").isdigit() else None,
+            name=name.text,
+            unit_price=_number(unit_price.text) if unit_price else None,
+            quantity=int(_number(quantity.attrs.get("value")) or 0) if quantity else 1,
+            subtotal=_number(subtotal.text) if subtotal else None,
+        ))
+    return lines
+
+
+def parse_cart(html: str) -> CartPage:
+    root = _parse_html(html)
+    return CartPage(title=_title(root), lines=_cart_lines(root))
+
+
+def parse_wishlist(html: str) -> WishlistPage:
+    root = _parse_html(html)
+    return WishlistPage(title=_title(root), lines=_cart_lines(root))
+
+
+def parse_profile(html: str) -> CustomerProfile:
+    root = _parse_html(html)
+
+    def value(field_id: str) -> Optional[str]:
+        node = root.find("input", id=field_id)
+        return node.attrs.get("value") if node else None
+
+    gender = next(
+        (node.attrs.get("value") for node in root.find_all("input", name="Gender") if "checked" in node.attrs),
+        None,
+    )
+    return CustomerProfile(
+        title=_title(root),
+        first_name=value("FirstName"),
+        last_name=value("LastName"),
+        email=value("Email"),
+        gender=gender,
+    )
+
+
+def parse_product_list(html: str) -> ProductList:
+    root = _parse_html(html)
+    hits = []
+    for item in root.find_all(cls="product-item"):
+        title = item.find(cls="product-title")
+        if title is None:
+            continue
+        price = item.find(cls="actual-price")
+        product_id = item.attrs.get("data-productid", "")
+        hits.append(ProductHit(
+            product_id=int(product_id) if product_id.isdigit() else None,
+            name=title.text,
+            price=_number(price.text) if price else None,
+        ))
+    return ProductList(title=_title(root), hits=hits)
+
+
+def parse_add_to_cart(body: str) -> AddToCartResult:
+    """
+    Результат добавления в корзину или список желаний
+
+    Обычно сервер отвечает JSON с полями success/message. Если пришел HTML
+    (например, страница товара, когда нужно выбрать атрибуты) или JSON
+    другого вида (строка, список, null), успех определяется по тексту ответа.
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        return AddToCartResult(success="has been added" in body, message=_parse_html(body).text[:500])
+    message = payload.get("message") or ""
+    if isinstance(message, list):
+        message = " ".join(message)
+    summary = payload.get("updatetopcartsectionhtml") or payload.get("updatetopwishlistsectionhtml")
+    return AddToCartResult(
+        success=bool(payload.get("success")),
+        message=_parse_html(message).text,
+        summary=summary,
+    )
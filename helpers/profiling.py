@@ -0,0 +1,178 @@
+"""
+Профиль прогона: время фаз тестов, фикстур и отмеченных участков кода
+
+Данные собирает плагин helpers/profiling_plugin.py. Участок кода внутри
+фикстуры (например, browser.open('') в browser_management) отмечается
+контекстным менеджером section и попадает в отчет отдельной строкой:
+
+    with section("browser.open"):
+        browser.open('')
+
+Без --profile section ничего не измеряет.
+"""
+
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Вклад пути в стек меньше этого (секунды) в flamegraph не попадает
+MIN_STACK_TIME = 1e-5
+MAX_STACK_DEPTH = 60
+
+
+class Timings:
+    """
+    Накопленные длительности по именам: количество, сумма и максимум
+
+    Хранится как dict name -> [count, total, max], чтобы передаваться
+    с воркеров xdist через workeroutput без преобразований.
+    """
+
+    def __init__(self, data: Optional[Dict[str, List[float]]] = None):
+        self.data: Dict[str, List[float]] = data if data is not None else {}
+
+    def add(self, name: str, duration: float):
+        entry = self.data.get(name)
+        if entry is None:
+            self.data[name] = [1, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+
+    def merge(self, other: Dict[str, List[float]]):
+        for name, (count, total, longest) in other.items():
+            entry = self.data.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += total
+            entry[2] = max(entry[2], longest)
+
+    def top(self, limit: int) -> List[Tuple[str, List[float]]]:
+        return sorted(self.data.items(), key=lambda item: -item[1][1])[:limit]
+
+    def to_json(self) -> Dict[str, dict]:
+        return {
+            name: {"count": count, "total": round(total, 6), "max": round(longest, 6),
+                   "mean": round(total / count, 6) if count else 0.0}
+            for name, (count, total, longest) in sorted(self.data.items())
+        }
+
+
+class RunProfile:
+    """Профиль процесса (контроллера или воркера xdist)"""
+
+    def __init__(self):
+        self.active = False
+        self.phases = Timings()
+        self.fixture_setup = Timings()
+        self.fixture_teardown = Timings()
+        self.sections = Timings()
+        self.tests: Dict[str, Dict[str, float]] = {}
+        self.stacks: Dict[str, float] = {}
+        self.profiles: List[str] = []
+
+    def export(self) -> dict:
+        """Данные воркера для передачи контроллеру (фазы контроллер видит сам по отчетам)"""
+        return {
+            "fixture_setup": self.fixture_setup.data,
+            "fixture_teardown": self.fixture_teardown.data,
+            "sections": self.sections.data,
+            "stacks": self.stacks,
+            "profiles": self.profiles,
+        }
+
+    def merge(self, exported: dict):
+        self.fixture_setup.merge(exported.get("fixture_setup", {}))
+        self.fixture_teardown.merge(exported.get("fixture_teardown", {}))
+        self.sections.merge(exported.get("sections", {}))
+        for stack, seconds in exported.get("stacks", {}).items():
+            self.stacks[stack] = self.stacks.get(stack, 0.0) + seconds
+        self.profiles.extend(exported.get("profiles", []))
+
+    def to_json(self) -> dict:
+        return {
+            "phases": self.phases.to_json(),
+            "fixtures": {
+                "setup": self.fixture_setup.to_json(),
+                "teardown": self.fixture_teardown.to_json(),
+            },
+            "sections": self.sections.to_json(),
+            "tests": self.tests,
+            "profiles": self.profiles,
+        }
+
+    def write_folded(self, path: str):
+        """Стеки в свернутом формате flamegraph.pl / speedscope: 'a;b;c <микросекунды>'"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                micros = int(seconds * 1e6)
+                if micros:
+                    f.write(f"{stack} {micros}\n")
+
+
+profile = RunProfile()
+
+
+@contextmanager
+def section(name: str) -> Iterator[None]:
+    """Отдельная строка отчета профиля для участка кода"""
+    if not profile.active:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.sections.add(name, time.perf_counter() - started)
+
+
+def folded_stacks(stats: pstats.Stats, root: str) -> Dict[str, float]:
+    """
+    Стеки вызовов из статистики cProfile
+
+    cProfile хранит только пары вызывающий -> вызываемый, поэтому время
+    функции делится между путями к ней пропорционально времени вызовов
+    по каждому ребру (так же строят flamegraph утилиты вроде flameprof).
+
+    Args:
+        stats: Статистика cProfile
+        root: Имя корневого кадра (обычно nodeid теста)
+
+    Returns:
+        dict: 'root;f1;f2' -> собственное время последней функции стека, с
+    """
+    raw = stats.stats
+    callees: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    roots = []
+    for func, (_, _, _, _, callers) in raw.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    stacks: Dict[str, float] = {}
+
+    def walk(func: tuple, path: List[tuple], scale: float):
+        own_time, total_time = raw[func][2], raw[func][3]
+        if total_time * scale < MIN_STACK_TIME or len(path) > MAX_STACK_DEPTH:
+            return
+        key = ";".join([root] + [_frame_name(frame) for frame in path])
+        stacks[key] = stacks.get(key, 0.0) + own_time * scale
+        for callee, edge_time in callees.get(func, ()):
+            callee_total = raw[callee][3]
+            if callee in path or not callee_total:
+                continue  # рекурсия: время уже учтено в текущем пути
+            walk(callee, path + [callee], min(1.0, edge_time * scale / callee_total))
+
+    for func in roots:
+        walk(func, [func], 1.0)
+    return stacks
+
+
+def _frame_name(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name.replace(";", ",")  # встроенные функции: "<built-in method ...>"
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
@@ -0,0 +1,161 @@
+"""
+Pytest-плагин: куда уходит время прогона
+
+С --profile для каждого теста измеряются фазы setup/call/teardown, для каждой
+фикстуры - собственное время подготовки (без зависимых фикстур) и очистки,
+а также участки, отмеченные helpers.profiling.section (browser.open,
+attach_all_artifacts и т.п.). --profile-test включает cProfile для выбранных
+тестов: статистика сохраняется в .prof (pstats, snakeviz), стеки - в profile.folded
+для flamegraph.pl или speedscope.
+
+    pytest --profile
+    pytest --profile-test "*test_add_multiple_products*" --profile-out=profile
+
+В конце прогона печатаются самые дорогие фикстуры, фазы и участки,
+а полный профиль сохраняется в profile.json.
+"""
+
+import cProfile
+import fnmatch
+import json
+import os
+import pstats
+import re
+import time
+from typing import Dict, List
+
+import pytest
+
+from helpers.profiling import folded_stacks, profile
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("demowebshop")
+    group.addoption("--profile", action="store_true", default=False,
+                    help="Измерять фазы тестов, фикстуры и отмеченные участки кода")
+    group.addoption("--profile-test", action="append", default=[], metavar="PATTERN",
+                    help="Запускать cProfile для тестов, чей nodeid подходит под шаблон (можно повторять)")
+    group.addoption("--profile-out", default=None, metavar="DIR",
+                    help="Каталог для profile.json, profile.folded и .prof (по умолчанию в .pytest_cache)")
+    group.addoption("--profile-top", type=int, default=10,
+                    help="Сколько самых дорогих фикстур и участков показать в конце прогона")
+
+
+def pytest_configure(config):
+    if config.getoption("profile") or config.getoption("profile_test"):
+        config.pluginmanager.register(Profiler(config), "demowebshop-profiler")
+
+
+class Profiler:
+    """Сбор профиля; регистрируется только с --profile или --profile-test"""
+
+    def __init__(self, config):
+        self.config = config
+        self.patterns: List[str] = config.getoption("profile_test")
+        self.out_dir = _out_dir(config)
+        # Стек измеряемых фикстур: время вложенных вычитается из времени родителя
+        self._nested: List[float] = []
+        self._teardown_started: Dict[int, float] = {}
+        profile.active = True
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        name = f"{fixturedef.argname} ({fixturedef.scope})"
+        self._nested.append(0.0)
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        nested = self._nested.pop()
+        if self._nested:
+            self._nested[-1] += elapsed
+        profile.fixture_setup.add(name, elapsed - nested)
+        # Финализаторы выполняются в обратном порядке: этот - перед кодом после yield фикстуры,
+        # а pytest_fixture_post_finalizer - последним
+        fixturedef.addfinalizer(lambda: self._teardown_started.__setitem__(id(fixturedef), time.perf_counter()))
+
+    def pytest_fixture_post_finalizer(self, fixturedef, request):
+        started = self._teardown_started.pop(id(fixturedef), None)
+        if started is None:
+            return
+        profile.fixture_teardown.add(f"{fixturedef.argname} ({fixturedef.scope})", time.perf_counter() - started)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if not self._selected(item.nodeid):
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._save_profile(item.nodeid, profiler)
+
+    def pytest_runtest_logreport(self, report):
+        if hasattr(self.config, "workerinput"):
+            return  # фазы учитывает контроллер по пересланным отчетам
+        profile.phases.add(report.when, report.duration)
+        profile.tests.setdefault(report.nodeid, {})[report.when] = round(report.duration, 6)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        profile.merge(getattr(node, "workeroutput", {}).get("profile", {}))
+
+    def pytest_sessionfinish(self, session):
+        workeroutput = getattr(self.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput["profile"] = profile.export()
+            return
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(os.path.join(self.out_dir, "profile.json"), "w", encoding="utf-8") as f:
+            json.dump(profile.to_json(), f, ensure_ascii=False, indent=2)
+        if profile.stacks:
+            profile.write_folded(os.path.join(self.out_dir, "profile.folded"))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if hasattr(self.config, "workerinput"):
+            return
+        top = self.config.getoption("profile_top")
+        terminalreporter.section("Профиль: фазы тестов")
+        _write_rows(terminalreporter, profile.phases.top(3))
+        terminalreporter.section("Профиль: самые дорогие фикстуры")
+        costs = {}
+        for name, (count, total, _) in profile.fixture_setup.data.items():
+            costs[name] = [count, total, profile.fixture_teardown.data.get(name, [0, 0.0, 0.0])[1]]
+        terminalreporter.write_line(f"{'фикстура':<48}{'раз':>6}{'setup, с':>11}{'teardown, с':>13}")
+        for name, (count, setup, teardown) in sorted(costs.items(), key=lambda c: -(c[1][1] + c[1][2]))[:top]:
+            terminalreporter.write_line(f"{name:<48}{count:>6}{setup:>11.3f}{teardown:>13.3f}")
+        if profile.sections.data:
+            terminalreporter.section("Профиль: отмеченные участки")
+            _write_rows(terminalreporter, profile.sections.top(top))
+        terminalreporter.write_line(f"Профиль сохранен: {os.path.join(self.out_dir, 'profile.json')}")
+
+    def _selected(self, nodeid: str) -> bool:
+        return any(
+            fnmatch.fnmatchcase(nodeid, pattern) if any(ch in pattern for ch in "*?[") else pattern in nodeid
+            for pattern in self.patterns
+        )
+
+    def _save_profile(self, nodeid: str, profiler: cProfile.Profile):
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', nodeid)}.prof")
+        profiler.dump_stats(path)
+        profile.profiles.append(path)
+        for stack, seconds in folded_stacks(pstats.Stats(profiler), root=nodeid.replace(";", ",")).items():
+            profile.stacks[stack] = profile.stacks.get(stack, 0.0) + seconds
+
+
+def _write_rows(terminalreporter, rows):
+    terminalreporter.write_line(f"{'имя':<48}{'раз':>6}{'всего, с':>11}{'макс, с':>10}")
+    for name, (count, total, longest) in rows:
+        terminalreporter.write_line(f"{name:<48}{count:>6}{total:>11.3f}{longest:>10.3f}")
+
+
+def _out_dir(config) -> str:
+    path = config.getoption("profile_out")
+    if path:
+        return path
+    if getattr(config, "cache", None) is not None:
+        return str(config.cache.mkdir("demowebshop") / "profile")
+    return os.path.join(str(config.rootpath), "profile")
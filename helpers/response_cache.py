@@ -0,0 +1,318 @@
+"""
+Кэш ответов на GET-запросы каталога и поиска
+
+Тесты запрашивают одни и те же страницы категорий и поиска снова и снова.
+Кэш общий для всех клиентов процесса:
+- свежий ответ (моложе TTL маршрута и max-age ответа) отдается без обращения к сети;
+- устаревший ответ с ETag/Last-Modified перепроверяется условным
+  запросом, на 304 отдается сохраненное тело; max-age=0 и no-cache
+  означают перепроверку при каждом запросе;
+- вытеснение LRU с ограничением по числу записей и суммарному размеру.
+
+Страницы каталога зависят от авторизации: в шапке email пользователя.
+Поэтому ключ записи включает куку авторизации - клиенты разных пользователей
+(и анонимный клиент) никогда не получают ответы друг друга, а все гости и
+все клиенты одного пользователя делят записи между тестами. Прочие куки
+(гостевой идентификатор, служебные) в ключ не входят: иначе каждый новый
+клиент начинал бы с пустого кэша. Счетчик корзины в шапке страницы из кэша
+может быть устаревшим - состояние корзины проверяется через /cart.
+Маршруты корзины, списка желаний, профиля, входа и оформления заказа
+не кэшируются вовсе. Set-Cookie в кэш не сохраняется, поэтому ответ
+из кэша не меняет куки клиента.
+
+Кэш выключен по умолчанию и включается опцией --response-cache
+(или переменной окружения DEMOWEBSHOP_RESPONSE_CACHE=1).
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from helpers.cassette import build_response, request_key
+from helpers.transport import AUTH_COOKIE_NAMES, get_shared_adapter
+
+RESPONSE_CACHE_ENV = "DEMOWEBSHOP_RESPONSE_CACHE"
+
+# Маршруты, которые никогда не кэшируются: это и есть состояние сессии
+SESSION_ROUTES = re.compile(
+    r"/(cart|wishlist|customer|login|logout|register|registerresult|checkout|order|"
+    r"addproducttocart|subscribenewsletter)(/.*)?"
+)
+
+# TTL по маршрутам (секунды), проверяются по порядку
+DEFAULT_ROUTE_TTLS: Tuple[Tuple[str, float], ...] = (
+    (r"/search", 60),
+    (r"/[a-z0-9-]+", 300),  # категории и карточки товаров
+)
+
+# Заголовки, которые не сохраняются: куки принадлежат сессии, а длину и кодировку задает тело в кэше
+_SKIPPED_HEADERS = {"set-cookie", "content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+@dataclass
+class CacheEntry:
+    status: int
+    reason: str
+    headers: List[Tuple[str, str]]
+    body: bytes
+    stored_at: float
+    ttl: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.stored_at < self.ttl
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля кэшируемых запросов, тело которых отдано из кэша (включая подтвержденные 304)"""
+        served = self.hits + self.revalidated
+        total = served + self.misses
+        return served / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+    def __add__(self, other: "CacheStats") -> "CacheStats":
+        """Сумма статистики (например, по воркерам xdist)"""
+        return CacheStats(**{name: value + getattr(other, name) for name, value in self.as_dict().items()})
+
+
+@dataclass
+class ResponseCache:
+    """
+    LRU-кэш ответов с TTL по маршрутам
+
+    Attributes:
+        max_entries: Предельное число записей
+        max_bytes: Предельный суммарный размер тел ответов
+        route_ttls: Пары (регулярка пути, TTL в секундах); путь без совпадения не кэшируется
+    """
+    max_entries: int = 256
+    max_bytes: int = 32 * 1024 * 1024
+    route_ttls: Tuple[Tuple[str, float], ...] = DEFAULT_ROUTE_TTLS
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    def __post_init__(self):
+        self._routes: List[Tuple[Pattern, float]] = [(re.compile(p), ttl) for p, ttl in self.route_ttls]
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def ttl_for(self, request: requests.PreparedRequest) -> Optional[float]:
+        """TTL запроса или None, если запрос не кэшируется"""
+        if request.method != "GET":
+            return None
+        path = urlsplit(request.url).path.rstrip("/") or "/"
+        if SESSION_ROUTES.fullmatch(path):
+            return None
+        for pattern, ttl in self._routes:
+            if pattern.fullmatch(path):
+                return ttl
+        return None
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats.evictions += 1
+
+    def record(self, stat: str):
+        """Увеличение счетчика статистики (адаптеры работают из разных потоков)"""
+        with self._lock:
+            setattr(self.stats, stat, getattr(self.stats, stat) + 1)
+
+    def touch(self, key: str, entry: CacheEntry, now: float):
+        """Ответ подтвержден сервером (304): запись снова свежая"""
+        with self._lock:
+            entry.stored_at = now
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class CachingAdapter(BaseAdapter):
+    """
+    Транспортный адаптер requests с кэшем ответов поверх внутреннего адаптера
+
+    Потоковые запросы (stream=True) получают ответ из кэша, но при промахе
+    не сохраняются: тело читает вызывающий код, и часто не до конца.
+    """
+
+    def __init__(self, cache: ResponseCache, inner: BaseAdapter, builder: Optional[HTTPAdapter] = None):
+        super().__init__()
+        self.cache = cache
+        self.inner = inner
+        self.builder = builder or get_shared_adapter()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        options = dict(stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        ttl = self.cache.ttl_for(request)
+        if ttl is None:
+            self.cache.record("bypassed")
+            return self.inner.send(request, **options)
+
+        key = cache_key(request)
+        entry = self.cache.get(key)
+        now = time.monotonic()
+        if entry is not None and entry.is_fresh(now):
+            self.cache.record("hits")
+            return self._from_entry(request, entry)
+
+        if entry is not None and (entry.etag or entry.last_modified):
+            conditional = request.copy()
+            if entry.etag:
+                conditional.headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                conditional.headers["If-Modified-Since"] = entry.last_modified
+            response = self.inner.send(conditional, **options)
+            if response.status_code == 304:
+                response.close()
+                self.cache.touch(key, entry, now)
+                self.cache.record("revalidated")
+                return self._from_entry(request, entry)
+        else:
+            response = self.inner.send(request, **options)
+
+        self.cache.record("misses")
+        max_age = _max_age(response)
+        if response.status_code == 200 and not stream and max_age is not None:
+            self.cache.put(key, CacheEntry(
+                status=response.status_code,
+                reason=response.reason,
+                headers=[(k, v) for k, v in response.headers.items() if k.lower() not in _SKIPPED_HEADERS],
+                body=response.content,
+                stored_at=now,
+                ttl=min(ttl, max_age),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            ))
+        return response
+
+    def close(self):
+        self.inner.close()
+
+    def _from_entry(self, request, entry: CacheEntry) -> requests.Response:
+        response = build_response(self.builder, request, entry.status, entry.reason, entry.headers, entry.body)
+        response.from_cache = True
+        return response
+
+
+def cache_key(request: requests.PreparedRequest) -> str:
+    """
+    Ключ записи: адрес магазина, нормализованный запрос и кука авторизации
+
+    Ответ для одного пользователя не выдается другому, а все гости
+    делят одну группу записей ("guest").
+    """
+    origin = urlsplit(request.url).netloc.lower()
+    return f"{origin}|{_auth_bucket(request.headers.get('Cookie', ''))}|{request_key(request)}"
+
+
+def _auth_bucket(cookie_header: str) -> str:
+    """Хэш куки авторизации из заголовка Cookie или 'guest' без нее"""
+    auth = sorted(
+        part.strip() for part in cookie_header.split(";")
+        if part.strip().partition("=")[0] in AUTH_COOKIE_NAMES and part.strip().partition("=")[2]
+    )
+    if not auth:
+        return "guest"
+    return hashlib.sha256("; ".join(auth).encode("utf-8")).hexdigest()
+
+
+def _max_age(response: requests.Response) -> Optional[float]:
+    """
+    Сколько ответ можно отдавать без перепроверки; None - не сохранять вовсе
+
+    no-store запрещает хранение, no-cache и max-age=0 требуют перепроверки
+    при каждом запросе. Без max-age действует только TTL маршрута.
+    """
+    directives = {}
+    for part in response.headers.get("Cache-Control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    try:
+        return float(directives["max-age"])
+    except (KeyError, ValueError):
+        return float("inf")
+
+
+def mount_response_cache(session: requests.Session, cache: ResponseCache, base_url: str) -> CachingAdapter:
+    """Подключает кэш к сессии поверх адаптера, который сейчас обслуживает base_url"""
+    adapter = CachingAdapter(cache, inner=session.get_adapter(base_url))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
+
+
+_cache: Optional[ResponseCache] = None
+_lock = threading.Lock()
+
+
+def configure_response_cache(cache: Optional[ResponseCache]):
+    """Включение (экземпляр ResponseCache) или выключение (None) кэша для новых клиентов"""
+    global _cache
+    with _lock:
+        _cache = cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Общий кэш процесса; без явной настройки включается переменной DEMOWEBSHOP_RESPONSE_CACHE"""
+    global _cache
+    with _lock:
+        if _cache is None and os.environ.get(RESPONSE_CACHE_ENV, "0") not in ("0", "false", "no", ""):
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,207 @@
+"""
+Сводка прогона по allure-results и история прогонов в SQLite
+
+Файлы *-result.json читаются по одному, в памяти остаются только счетчики,
+упавшие тесты и самые долгие тесты. История (итоги прогонов и статус с
+длительностью каждого теста) хранится в небольшой базе SQLite, старые
+прогоны удаляются, поэтому база не растет без ограничений.
+
+    python -m helpers.run_report allure-results --db .pytest_cache/d/demowebshop/trends.sqlite
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional
+
+STATUSES = ("passed", "failed", "broken", "skipped", "unknown")
+# Сколько последних прогонов хранить в истории
+DEFAULT_KEEP_RUNS = 50
+# Длина сообщения об ошибке в сводке
+MESSAGE_LIMIT = 300
+
+
+def iter_results(results_dir: str, since_ms: Optional[int] = None) -> Iterator[dict]:
+    """
+    Результаты тестов из allure-results по одному файлу
+
+    Args:
+        results_dir: Каталог allure-results
+        since_ms: Пропускать результаты, начатые раньше (остатки прошлых прогонов)
+    """
+    if not os.path.isdir(results_dir):
+        return
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith("-result.json"):
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if since_ms is not None and result.get("start", 0) < since_ms:
+                continue
+            yield result
+
+
+def summarize(results: Iterator[dict], slowest: int = 10) -> dict:
+    """
+    Компактная сводка прогона
+
+    Returns:
+        dict: counts по статусам, total, duration (сумма длительностей тестов, с),
+              failures (упавшие и сломанные тесты), slowest (самые долгие тесты)
+              и tests (test_id -> [status, duration]) для истории
+    """
+    counts = dict.fromkeys(STATUSES, 0)
+    failures: List[dict] = []
+    slowest_heap: list = []
+    tests: Dict[str, list] = {}
+    total_duration = 0.0
+    for result in results:
+        status = result.get("status", "unknown")
+        if status not in counts:
+            status = "unknown"
+        counts[status] += 1
+        duration = max(0, result.get("stop", 0) - result.get("start", 0)) / 1000
+        total_duration += duration
+        test_id = result.get("fullName") or result.get("historyId") or result.get("name", "")
+        tests[test_id] = [status, round(duration, 3)]
+        if status in ("failed", "broken"):
+            message = (result.get("statusDetails") or {}).get("message") or ""
+            failures.append({"test": test_id, "status": status, "message": message[:MESSAGE_LIMIT]})
+        item = (duration, test_id)
+        if len(slowest_heap) < slowest:
+            heapq.heappush(slowest_heap, item)
+        else:
+            heapq.heappushpop(slowest_heap, item)
+    return {
+        "counts": counts,
+        "total": sum(counts.values()),
+        "duration": round(total_duration, 3),
+        "failures": failures,
+        "slowest": [{"test": test, "duration": round(duration, 3)}
+                    for duration, test in sorted(slowest_heap, reverse=True)],
+        "tests": tests,
+    }
+
+
+class TrendStore:
+    """
+    История прогонов в SQLite
+
+    Args:
+        path: Файл базы
+        keep_runs: Сколько последних прогонов хранить
+    """
+
+    def __init__(self, path: str, keep_runs: int = DEFAULT_KEEP_RUNS):
+        self.path = path
+        self.keep_runs = keep_runs
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                finished REAL NOT NULL,
+                total INTEGER NOT NULL,
+                passed INTEGER NOT NULL,
+                failed INTEGER NOT NULL,
+                broken INTEGER NOT NULL,
+                skipped INTEGER NOT NULL,
+                duration REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+                test TEXT NOT NULL,
+                status TEXT NOT NULL,
+                duration REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_test ON results(test, run_id);
+        """)
+
+    def record(self, summary: dict) -> int:
+        """Сохранение прогона, удаление прогонов сверх keep_runs; возвращает id прогона"""
+        counts = summary["counts"]
+        with self._db:
+            cursor = self._db.execute(
+                "INSERT INTO runs (finished, total, passed, failed, broken, skipped, duration)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), summary["total"], counts["passed"], counts["failed"],
+                 counts["broken"], counts["skipped"], summary["duration"])
+            )
+            run_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO results (run_id, test, status, duration) VALUES (?, ?, ?, ?)",
+                ((run_id, test, status, duration) for test, (status, duration) in summary["tests"].items())
+            )
+            stale = "SELECT id FROM runs ORDER BY id DESC LIMIT -1 OFFSET ?"
+            self._db.execute(f"DELETE FROM results WHERE run_id IN ({stale})", (self.keep_runs,))
+            self._db.execute(f"DELETE FROM runs WHERE id IN ({stale})", (self.keep_runs,))
+        return run_id
+
+    def trend(self, last: int = 10) -> List[dict]:
+        """Итоги последних прогонов, от старых к новым"""
+        rows = self._db.execute(
+            "SELECT id, finished, total, passed, failed, broken, skipped, duration"
+            " FROM runs ORDER BY id DESC LIMIT ?", (last,)
+        ).fetchall()
+        keys = ("id", "finished", "total", "passed", "failed", "broken", "skipped", "duration")
+        return [dict(zip(keys, row)) for row in reversed(rows)]
+
+    def flaky(self, last: int = 10) -> List[dict]:
+        """Тесты, которые за последние прогоны и проходили, и падали"""
+        rows = self._db.execute(
+            """
+            SELECT test,
+                   SUM(status = 'passed') AS passed,
+                   SUM(status IN ('failed', 'broken')) AS failed
+            FROM results
+            WHERE run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)
+            GROUP BY test
+            HAVING passed > 0 AND failed > 0
+            ORDER BY failed DESC, test
+            """, (last,)
+        ).fetchall()
+        return [{"test": test, "passed": passed, "failed": failed} for test, passed, failed in rows]
+
+    def close(self):
+        self._db.close()
+
+
+def format_trend(runs: List[dict]) -> str:
+    """Строка тренда: доля прошедших и длительность по прогонам"""
+    parts = []
+    for run in runs:
+        rate = 100 * run["passed"] / run["total"] if run["total"] else 0
+        parts.append(f"{rate:.0f}% / {run['duration']:.1f}с")
+    return " -> ".join(parts)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Сводка allure-results и тренд прогонов")
+    parser.add_argument("results_dir", help="Каталог allure-results")
+    parser.add_argument("--db", default=None, help="База истории SQLite (без нее только сводка)")
+    parser.add_argument("--record", action="store_true", help="Сохранить прогон в историю")
+    parser.add_argument("--last", type=int, default=10, help="Сколько прогонов показать в тренде")
+    args = parser.parse_args(argv)
+
+    summary = summarize(iter_results(args.results_dir))
+    print(json.dumps({key: value for key, value in summary.items() if key != "tests"},
+                     ensure_ascii=False, indent=2))
+    if args.db:
+        store = TrendStore(args.db)
+        if args.record:
+            store.record(summary)
+        print("Тренд:", format_trend(store.trend(args.last)))
+        for test in store.flaky(args.last):
+            print(f"Нестабильный: {test['test']} (прошел {test['passed']}, упал {test['failed']})")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
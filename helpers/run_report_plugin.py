@@ -0,0 +1,87 @@
+"""
+Pytest-плагин: сводка прогона вместо вложения отчета в каждый тест
+
+В конце прогона (на контроллере xdist) результаты текущего прогона из
+--alluredir сводятся в run-summary.json, сводка один раз прикладывается
+к отчету как глобальное вложение, а итоги сохраняются в историю SQLite.
+В терминале печатается тренд последних прогонов и нестабильные тесты.
+
+    pytest --alluredir=allure-results --trend-db=trends.sqlite
+"""
+
+import json
+import os
+import time
+
+import pytest
+from allure_commons import plugin_manager
+from allure_commons.types import AttachmentType
+
+from helpers.run_report import TrendStore, format_trend, iter_results, summarize
+
+SUMMARY_FILE = "run-summary.json"
+
+_started_key = pytest.StashKey[int]()
+_summary_key = pytest.StashKey[dict]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("demowebshop")
+    group.addoption("--trend-db", default=None, metavar="PATH",
+                    help="База истории прогонов SQLite (по умолчанию в .pytest_cache)")
+    group.addoption("--trend-keep", type=int, default=50,
+                    help="Сколько последних прогонов хранить в истории")
+    group.addoption("--no-trends", action="store_true", default=False,
+                    help="Не сохранять этот прогон в историю")
+
+
+def pytest_sessionstart(session):
+    session.config.stash[_started_key] = int(time.time() * 1000)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    config = session.config
+    results_dir = getattr(config.option, "allure_report_dir", None)
+    if hasattr(config, "workerinput") or not results_dir:
+        return
+    summary = summarize(iter_results(results_dir, since_ms=config.stash.get(_started_key, None)))
+    if not summary["total"]:
+        return
+    compact = {key: value for key, value in summary.items() if key != "tests"}
+    with open(os.path.join(results_dir, SUMMARY_FILE), "w", encoding="utf-8") as f:
+        json.dump(compact, f, ensure_ascii=False, indent=2)
+    plugin_manager.hook.global_attach_data(
+        body=json.dumps(compact, ensure_ascii=False, indent=2),
+        name="Сводка прогона",
+        attachment_type=AttachmentType.JSON,
+        extension=None,
+    )
+
+    if config.getoption("no_trends"):
+        return
+    store = TrendStore(_trend_db_path(config), keep_runs=config.getoption("trend_keep"))
+    try:
+        store.record(summary)
+        config.stash[_summary_key] = {"trend": store.trend(), "flaky": store.flaky()}
+    finally:
+        store.close()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    history = config.stash.get(_summary_key, None)
+    if not history:
+        return
+    terminalreporter.section("Тренд прогонов (прошло % / длительность)")
+    terminalreporter.write_line(format_trend(history["trend"]))
+    for test in history["flaky"]:
+        terminalreporter.write_line(f"нестабильный: {test['test']} (прошел {test['passed']}, упал {test['failed']})")
+
+
+def _trend_db_path(config) -> str:
+    path = config.getoption("trend_db")
+    if path:
+        return path
+    if getattr(config, "cache", None) is not None:
+        return str(config.cache.mkdir("demowebshop") / "trends.sqlite")
+    return os.path.join(str(config.rootpath), ".pytest_cache", "trends.sqlite")
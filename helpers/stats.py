@@ -0,0 +1,38 @@
+import math
+from typing import Dict, Iterable, Sequence
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """
+    Перцентиль по отсортированной выборке (метод ближайшего ранга)
+
+    Args:
+        sorted_values: Значения, отсортированные по возрастанию
+        p: Перцентиль от 0 до 100
+
+    Returns:
+        float: Значение перцентиля или 0.0 для пустой выборки
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values: Iterable[float], percentiles: Sequence[float] = (50, 95, 99)) -> Dict[str, float]:
+    """
+    Сводка по выборке длительностей: количество, среднее, максимум и перцентили
+
+    Example:
+        >>> summarize([0.1, 0.2, 0.3])
+        {'count': 3, 'mean': 0.2, 'max': 0.3, 'p50': 0.2, 'p95': 0.3, 'p99': 0.3}
+    """
+    ordered = sorted(values)
+    summary = {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "max": ordered[-1] if ordered else 0.0,
+    }
+    for p in percentiles:
+        summary[f"p{p:g}"] = percentile(ordered, p)
+    return summary
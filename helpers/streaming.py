@@ -0,0 +1,166 @@
+"""
+Потоковый разбор ответа: поиск маркеров без загрузки всей страницы
+
+Тело читается порциями, в каждой порции ищутся ожидаемые строки
+(название товара, текст успеха или ошибки). Чтение прекращается, как только
+ответ известен, а в памяти остается только хвост тела ограниченного размера.
+
+Example:
+    >>> scan = api.scan_search_results("computer", ["Simple Computer", "No products were found"])
+    >>> assert scan.found["Simple Computer"]
+"""
+
+import html
+from collections import deque
+from typing import Dict, List, Sequence
+
+STOP_MODES = ("any", "all", "never")
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+DEFAULT_WINDOW = 64 * 1024
+
+
+class MarkerScanner:
+    """
+    Инкрементальный поиск строк в потоке байтов
+
+    Между порциями сохраняется перекрытие длиной в самый длинный маркер
+    без одного байта, поэтому маркер, разрезанный границей порции, тоже находится.
+    Маркер ищется как есть и в HTML-экранированном виде.
+
+    Args:
+        markers: Искомые строки
+        stop: Когда прекращать чтение: "any" - найден хотя бы один маркер,
+            "all" - найдены все, "never" - дочитать тело до конца
+        window: Сколько последних байтов тела хранить (для вложений и отладки)
+    """
+
+    def __init__(self, markers: Sequence[str], stop: str = "any", window: int = DEFAULT_WINDOW):
+        if stop not in STOP_MODES:
+            raise ValueError(f"stop должен быть одним из {STOP_MODES}, получено {stop!r}")
+        self.markers: List[str] = list(dict.fromkeys(markers))
+        self.stop = stop
+        self.found: Dict[str, bool] = {marker: False for marker in self.markers}
+        self.bytes_read = 0
+        self._variants = {
+            marker: {marker.encode("utf-8"), html.escape(marker, quote=False).encode("utf-8")}
+            for marker in self.markers
+        }
+        longest = max((len(v) for variants in self._variants.values() for v in variants), default=1)
+        self._overlap = longest - 1
+        self._carry = b""
+        self._window = window
+        self._tail: deque = deque()
+        self._tail_size = 0
+
+    @property
+    def done(self) -> bool:
+        if self.stop == "any":
+            return any(self.found.values())
+        if self.stop == "all":
+            return all(self.found.values())
+        return False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Обработка очередной порции, True - дальше читать не нужно"""
+        if not chunk:
+            return self.done
+        self.bytes_read += len(chunk)
+        self._remember(chunk)
+        buffer = self._carry + chunk
+        for marker, variants in self._variants.items():
+            if not self.found[marker] and any(variant in buffer for variant in variants):
+                self.found[marker] = True
+        self._carry = buffer[-self._overlap:] if self._overlap else b""
+        return self.done
+
+    @property
+    def tail(self) -> bytes:
+        return b"".join(self._tail)[-self._window:] if self._window else b""
+
+    def _remember(self, chunk: bytes):
+        if not self._window:
+            return
+        self._tail.append(chunk)
+        self._tail_size += len(chunk)
+        while self._tail_size - len(self._tail[0]) >= self._window:
+            self._tail_size -= len(self._tail.popleft())
+
+
+class MarkerScan:
+    """
+    Результат потокового чтения ответа
+
+    Статус, заголовки и куки доступны как у обычного ответа, вместо полного
+    тела - только его хвост (text), ограниченный размером окна.
+
+    Attributes:
+        response: Исходный ответ (requests или httpx), тело уже закрыто
+        found: Маркер -> найден ли он в прочитанной части тела
+        bytes_read: Сколько байтов тела прочитано
+        complete: Тело прочитано до конца (False - чтение остановлено досрочно)
+    """
+
+    def __init__(self, response, scanner: MarkerScanner, complete: bool):
+        self.response = response
+        self.found = dict(scanner.found)
+        self.bytes_read = scanner.bytes_read
+        self.complete = complete
+        self._tail = scanner.tail
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def text(self) -> str:
+        return self._tail.decode(self.response.encoding or "utf-8", errors="replace")
+
+    @property
+    def matched(self) -> List[str]:
+        return [marker for marker, found in self.found.items() if found]
+
+    def __contains__(self, marker: str) -> bool:
+        return self.found.get(marker, False)
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+    def __repr__(self) -> str:
+        return f"<MarkerScan {self.status_code} matched={self.matched} bytes_read={self.bytes_read}>"
+
+
+def scan_response(response, markers: Sequence[str], stop: str = "any",
+                  window: int = DEFAULT_WINDOW, chunk_size: int = DEFAULT_CHUNK_SIZE) -> MarkerScan:
+    """
+    Поиск маркеров в ответе requests, запрошенном с stream=True
+
+    Если ответ стал известен до конца тела, соединение закрывается
+    без дочитывания остатка.
+    """
+    scanner = MarkerScanner(markers, stop, window)
+    complete = True
+    try:
+        for chunk in response.iter_content(chunk_size):
+            if scanner.feed(chunk):
+                complete = False
+                break
+    finally:
+        response.close()
+    return MarkerScan(response, scanner, complete)
+
+
+async def scan_response_async(response, markers: Sequence[str], stop: str = "any",
+                              window: int = DEFAULT_WINDOW, chunk_size: int = DEFAULT_CHUNK_SIZE) -> MarkerScan:
+    """То же для потокового ответа httpx (client.stream(...))"""
+    scanner = MarkerScanner(markers, stop, window)
+    complete = True
+    try:
+        async for chunk in response.aiter_bytes(chunk_size):
+            if scanner.feed(chunk):
+                complete = False
+                break
+    finally:
+        await response.aclose()
+    return MarkerScan(response, scanner, complete)
+
@@ -0,0 +1,542 @@
+"""
+Локальный заменитель DemoWebShop для запуска тестов без сети
+
+Реализует маршруты, которые использует DemoWebShopAPI, с разметкой,
+повторяющей nopCommerce в объеме, нужном тестам. Поддерживает
+искусственную задержку и внедрение ошибок.
+
+Запуск отдельно (например, для нагрузочных прогонов):
+    python -m helpers.stub_server --port 8080 --latency 0.05
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+from data.test_data import TestData
+
+
+AUTH_COOKIE = "NOPCOMMERCE.AUTH"
+GUEST_COOKIE = "Nop.customer"
+# Каталог заглушки не меняется, время "изменения" - момент импорта модуля
+CATALOG_UPDATED = formatdate(usegmt=True)
+
+# Каталог заглушки: товары из TestData плюс несколько соседей по категориям
+PRODUCTS: Dict[int, dict] = {
+    product["id"]: {**product, "category": category}
+    for category, product in (
+        ("desktops", TestData.PRODUCTS["simple_computer"]),
+        ("notebooks", TestData.PRODUCTS["laptop"]),
+    )
+}
+PRODUCTS.update({
+    72: {"id": 72, "name": "Build your own cheap computer", "price": 800.00, "category": "desktops"},
+    74: {"id": 74, "name": "Build your own expensive computer", "price": 1800.00, "category": "desktops"},
+    13: {"id": 13, "name": "Computing and Internet", "price": 10.00, "category": "books"},
+    45: {"id": 45, "name": "Fiction", "price": 24.00, "category": "books"},
+    43: {"id": 43, "name": "Smartphone", "price": 100.00, "category": "cell-phones"},
+})
+CATEGORIES = {
+    "computers": ("desktops", "notebooks"),
+    "desktops": ("desktops",),
+    "notebooks": ("notebooks",),
+    "books": ("books",),
+    "electronics": ("cell-phones",),
+    "cell-phones": ("cell-phones",),
+}
+
+
+@dataclass
+class StubConfig:
+    """
+    Настройки поведения заглушки
+
+    Attributes:
+        latency: Задержка перед каждым ответом в секундах
+        jitter: Случайная добавка к задержке (0..jitter секунд)
+        error_rate: Доля запросов, на которые отвечаем ошибкой (0..1)
+        error_status: HTTP-статус внедренной ошибки
+        error_paths: Префиксы путей, к которым применяется внедрение ошибок (пусто - ко всем)
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    error_paths: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_env(cls) -> "StubConfig":
+        return cls(
+            latency=float(os.environ.get("DEMOWEBSHOP_STUB_LATENCY", 0)),
+            jitter=float(os.environ.get("DEMOWEBSHOP_STUB_JITTER", 0)),
+            error_rate=float(os.environ.get("DEMOWEBSHOP_STUB_ERROR_RATE", 0)),
+            error_status=int(os.environ.get("DEMOWEBSHOP_STUB_ERROR_STATUS", 500)),
+        )
+
+
+@dataclass
+class ShopState:
+    """Данные магазина в памяти: пользователи, сессии, корзины, списки желаний, заказы"""
+    users: Dict[str, dict] = field(default_factory=dict)
+    sessions: Dict[str, str] = field(default_factory=dict)
+    carts: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    wishlists: Dict[str, Dict[int, int]] = field(default_factory=dict)
+    orders: Dict[str, List[dict]] = field(default_factory=dict)
+    subscribers: set = field(default_factory=set)
+    lock: threading.RLock = field(default_factory=threading.RLock)
+
+
+class DemoWebShopStub:
+    """
+    Заглушка DemoWebShop в отдельном потоке на 127.0.0.1
+
+    Example:
+        >>> with DemoWebShopStub() as stub:
+        >>>     api = DemoWebShopAPI(base_url=stub.base_url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None):
+        self.config = config or StubConfig()
+        self.state = ShopState()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "DemoWebShopStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="demowebshop-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Обслуживание запросов в текущем потоке (для запуска из командной строки)"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "DemoWebShopStub":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def _make_handler(stub: DemoWebShopStub):
+    class Handler(_ShopHandler):
+        pass
+    Handler.stub = stub
+    return Handler
+
+
+class _ShopHandler(BaseHTTPRequestHandler):
+    stub: DemoWebShopStub
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят отдельными пакетами, без TCP_NODELAY keep-alive упирается в delayed ACK
+    disable_nagle_algorithm = True
+
+    # Маршрутизация: (метод, регулярка пути, имя обработчика)
+    routes = (
+        ("GET", r"/", "home"),
+        ("GET", r"/login", "login_page"),
+        ("POST", r"/login", "login"),
+        ("GET", r"/logout", "logout"),
+        ("POST", r"/register", "register"),
+        ("GET", r"/registerresult/\d+", "register_result"),
+        ("POST", r"/addproducttocart/catalog/(\d+)/1", "add_to_cart"),
+        ("POST", r"/addproducttocart/details/(\d+)/2", "add_to_wishlist"),
+        ("GET", r"/cart", "cart"),
+        ("POST", r"/cart", "update_cart"),
+        ("GET", r"/customer/info", "customer_info"),
+        ("POST", r"/checkout", "checkout"),
+        ("GET", r"/checkout/completed/(\d+)", "checkout_completed"),
+        ("GET", r"/search", "search"),
+        ("GET", r"/wishlist", "wishlist"),
+        ("POST", r"/wishlist", "update_wishlist"),
+        ("GET", r"/order/history", "order_history"),
+        ("POST", r"/subscribenewsletter", "subscribe_newsletter"),
+        ("GET", r"/([a-z0-9-]+)", "category"),
+    )
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        pass  # Не засоряем вывод pytest логом каждого запроса
+
+    # --- инфраструктура ---
+
+    def _dispatch(self, method: str):
+        parts = urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        self.form_lists = parse_qs(body)
+        self.form = {k: v[-1] for k, v in self.form_lists.items()}
+        self.cookies = {name: morsel.value for name, morsel in SimpleCookie(self.headers.get("Cookie", "")).items()}
+        self.set_cookies: List[str] = []
+
+        config = self.stub.config
+        if config.latency or config.jitter:
+            time.sleep(config.latency + random.uniform(0, config.jitter))
+        if (config.error_rate and random.random() < config.error_rate
+                and (not config.error_paths or parts.path.startswith(config.error_paths))):
+            self._send(config.error_status, _page("Error", "<p>Injected error</p>"))
+            return
+
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, parts.path.rstrip("/") or "/")
+            if route_method == method and match:
+                with self.stub.state.lock:
+                    getattr(self, f"handle_{handler}")(*match.groups())
+                return
+        self._send(404, _page("Page not found", "<p>The page you requested was not found</p>"))
+
+    def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8",
+              headers: Optional[Dict[str, str]] = None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for cookie in self.set_cookies:
+            self.send_header("Set-Cookie", cookie)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, payload: dict):
+        self._send(200, json.dumps(payload), "application/json; charset=utf-8")
+
+    def _redirect(self, location: str):
+        self._send(302, "", headers={"Location": location})
+
+    @property
+    def state(self) -> ShopState:
+        return self.stub.state
+
+    def _current_email(self) -> Optional[str]:
+        return self.state.sessions.get(self.cookies.get(AUTH_COOKIE, ""))
+
+    def _customer_key(self) -> str:
+        """Корзина и список желаний привязаны к пользователю или к гостевой куке"""
+        email = self._current_email()
+        if email:
+            return email
+        guest = self.cookies.get(GUEST_COOKIE)
+        if not guest:
+            guest = str(uuid.uuid4())
+            self.set_cookies.append(f"{GUEST_COOKIE}={guest}; path=/; HttpOnly")
+        return f"guest:{guest}"
+
+    def _sign_in(self, email: str):
+        token = uuid.uuid4().hex
+        self.state.sessions[token] = email
+        self.set_cookies.append(f"{AUTH_COOKIE}={token}; path=/; HttpOnly")
+
+    def _require_login(self) -> Optional[str]:
+        email = self._current_email()
+        if not email:
+            self._redirect(f"/login?ReturnUrl={quote(self.path, safe='')}")
+        return email
+
+    def _page(self, title: str, content: str) -> str:
+        return _page(title, content, self._current_email())
+
+    # --- обработчики маршрутов ---
+
+    def handle_home(self):
+        self._send(200, self._page("Demo Web Shop", "<div class=\"home-page\">Welcome to our store</div>"))
+
+    def handle_login_page(self, error: str = ""):
+        self._send(200, self._page("Welcome, Please Sign In!", f"""
+            {error}
+            <form method="post" action="/login">
+                <input class="email" id="Email" name="Email" type="text" value="">
+                <input class="password" id="Password" name="Password" type="password">
+                <input class="button-1 login-button" type="submit" value="Log in">
+            </form>"""))
+
+    def handle_login(self):
+        user = self.state.users.get(self.form.get("Email", ""))
+        if not user or user["password"] != self.form.get("Password"):
+            self.handle_login_page(
+                "<div class=\"validation-summary-errors\"><span>Login was unsuccessful. "
+                "Please correct the errors and try again.</span></div>"
+            )
+            return
+        self._sign_in(user["email"])
+        self._redirect("/")
+
+    def handle_logout(self):
+        self.state.sessions.pop(self.cookies.get(AUTH_COOKIE, ""), None)
+        self.set_cookies.append(f"{AUTH_COOKIE}=; expires=Thu, 01 Jan 1970 00:00:00 GMT; path=/")
+        self._redirect("/")
+
+    def handle_register(self):
+        email = self.form.get("Email", "")
+        if email in self.state.users:
+            self._send(200, self._page("Register", (
+                "<div class=\"validation-summary-errors\"><ul>"
+                "<li>The specified email already exists</li></ul></div>"
+            )))
+            return
+        self.state.users[email] = {
+            "email": email,
+            "password": self.form.get("Password", ""),
+            "first_name": self.form.get("FirstName", ""),
+            "last_name": self.form.get("LastName", ""),
+            "gender": self.form.get("Gender", "M"),
+        }
+        self._sign_in(email)
+        self._redirect("/registerresult/1")
+
+    def handle_register_result(self):
+        self._send(200, self._page("Register", "<div class=\"result\">Your registration completed</div>"))
+
+    def handle_add_to_cart(self, product_id: str):
+        product = PRODUCTS.get(int(product_id))
+        if not product:
+            self._json({"success": False, "message": "No product found with the specified ID"})
+            return
+        try:
+            quantity = int(self.form.get("quantity") or 1)
+        except ValueError:
+            quantity = 0
+        if quantity <= 0:
+            self._json({"success": False, "message": "Quantity should be positive"})
+            return
+        cart = self.state.carts.setdefault(self._customer_key(), {})
+        cart[product["id"]] = cart.get(product["id"], 0) + quantity
+        self._json({
+            "success": True,
+            "message": "The product has been added to your <a href=\"/cart\">shopping cart</a>",
+            "updatetopcartsectionhtml": f"({sum(cart.values())})",
+        })
+
+    def handle_add_to_wishlist(self, product_id: str):
+        product = PRODUCTS.get(int(product_id))
+        if not product:
+            self._json({"success": False, "message": "No product found with the specified ID"})
+            return
+        wishlist = self.state.wishlists.setdefault(self._customer_key(), {})
+        wishlist[product["id"]] = wishlist.get(product["id"], 0) + 1
+        self._json({
+            "success": True,
+            "message": "The product has been added to your <a href=\"/wishlist\">wishlist</a>",
+            "updatetopwishlistsectionhtml": f"({sum(wishlist.values())})",
+        })
+
+    def handle_cart(self):
+        cart = self.state.carts.get(self._customer_key(), {})
+        self._send(200, self._page("Shopping cart", _items_table("cart", cart)))
+
+    def handle_update_cart(self):
+        cart = self.state.carts.setdefault(self._customer_key(), {})
+        self._update_items(cart)
+        self.handle_cart()
+
+    def handle_wishlist(self):
+        wishlist = self.state.wishlists.get(self._customer_key(), {})
+        self._send(200, self._page("Wishlist", _items_table("wishlist", wishlist)))
+
+    def handle_update_wishlist(self):
+        wishlist = self.state.wishlists.setdefault(self._customer_key(), {})
+        self._update_items(wishlist)
+        self.handle_wishlist()
+
+    def _update_items(self, items: Dict[int, int]):
+        """Форма корзины: отмеченные removefromcart удаляются, itemquantity<id> меняет количество"""
+        removed = {int(value) for value in self.form_lists.get("removefromcart", []) if value.isdigit()}
+        for pid in list(items):
+            quantity = self.form.get(f"itemquantity{pid}", "")
+            if quantity.isdigit():
+                items[pid] = int(quantity)
+            if pid in removed or items[pid] <= 0:
+                del items[pid]
+
+    def handle_customer_info(self):
+        email = self._require_login()
+        if not email:
+            return
+        user = self.state.users[email]
+        self._send(200, self._page("My account - Customer info", f"""
+            <form method="post" action="/customer/info">
+                <input id="gender-male" name="Gender" type="radio" value="M" {"checked" if user["gender"] == "M" else ""}>
+                <input id="gender-female" name="Gender" type="radio" value="F" {"checked" if user["gender"] == "F" else ""}>
+                <input id="FirstName" name="FirstName" type="text" value="{html.escape(user["first_name"])}">
+                <input id="LastName" name="LastName" type="text" value="{html.escape(user["last_name"])}">
+                <input id="Email" name="Email" type="text" value="{html.escape(email)}">
+            </form>"""))
+
+    def handle_checkout(self):
+        email = self._require_login()
+        if not email:
+            return
+        cart = self.state.carts.get(email)
+        if not cart:
+            self._send(200, self._page("Shopping cart", "<div class=\"order-summary-content\">Your Shopping Cart is empty!</div>"))
+            return
+        order_id = sum(len(orders) for orders in self.state.orders.values()) + 1
+        self.state.orders.setdefault(email, []).append({
+            "id": order_id,
+            "items": dict(cart),
+            "total": sum(PRODUCTS[pid]["price"] * qty for pid, qty in cart.items()),
+        })
+        self.state.carts[email] = {}
+        self._redirect(f"/checkout/completed/{order_id}")
+
+    def handle_checkout_completed(self, order_id: str):
+        self._send(200, self._page("Checkout", (
+            "<div class=\"section order-completed\"><strong>Your order has been successfully processed!</strong>"
+            f"<ul class=\"details\"><li>Order number: {order_id}</li></ul></div>"
+        )))
+
+    def handle_search(self):
+        query = self.query.get("q", "").strip().lower()
+        hits = [p for p in PRODUCTS.values() if query and query in p["name"].lower()]
+        content = _product_grid(hits) if hits else "<div class=\"no-result\">No products were found that matched your criteria.</div>"
+        self._send_catalog("Search", content)
+
+    def handle_order_history(self):
+        email = self._require_login()
+        if not email:
+            return
+        rows = "".join(
+            f"<div class=\"section order-item\"><div class=\"title\"><strong>Order Number: {order['id']}</strong></div>"
+            f"<ul class=\"info\"><li>Order Total: <span class=\"order-total\">{order['total']:.2f}</span></li></ul></div>"
+            for order in self.state.orders.get(email, [])
+        ) or "<div class=\"no-data\">No orders</div>"
+        self._send(200, self._page("My account - Orders", f"<div class=\"order-list\">{rows}</div>"))
+
+    def handle_subscribe_newsletter(self):
+        self.state.subscribers.add(self.form.get("email", ""))
+        self._json({
+            "Success": True,
+            "Result": "Thank you for signing up! A verification email has been sent. We appreciate your interest.",
+        })
+
+    def handle_category(self, slug: str):
+        categories = CATEGORIES.get(slug)
+        if categories is None:
+            self._send(404, self._page("Page not found", "<p>The page you requested was not found</p>"))
+            return
+        products = [p for p in PRODUCTS.values() if p["category"] in categories]
+        self._send_catalog(slug.replace("-", " ").title(), _product_grid(products))
+
+    def _send_catalog(self, title: str, content: str):
+        """
+        Страница каталога с ETag и Last-Modified; на совпадающий валидатор - 304 без тела
+
+        ETag считается по всей странице вместе с шапкой (email),
+        поэтому 304 подтверждает только страницу того же пользователя.
+        Каталог меняется редко: минуту страницу можно отдавать без перепроверки.
+        """
+        page = self._page(title, content)
+        etag = '"' + hashlib.sha1(page.encode("utf-8")).hexdigest()[:16] + '"'
+        headers = {"ETag": etag, "Last-Modified": CATALOG_UPDATED, "Cache-Control": "private, max-age=60"}
+        if_none_match = self.headers.get("If-None-Match")
+        if (if_none_match == etag if if_none_match is not None
+                else self.headers.get("If-Modified-Since") == CATALOG_UPDATED):
+            self._send(304, "", headers=headers)
+            return
+        self._send(200, page, headers=headers)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def _page(title: str, content: str, email: Optional[str] = None) -> str:
+    account = (
+        f"<a href=\"/customer/info\" class=\"account\">{html.escape(email)}</a>"
+        "<a href=\"/logout\" class=\"ico-logout\">Log out</a>"
+        if email else
+        "<a href=\"/register\" class=\"ico-register\">Register</a><a href=\"/login\" class=\"ico-login\">Log in</a>"
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Demo Web Shop. " + html.escape(title) + "</title></head><body>"
+        f"<div class=\"header-links\">{account}</div>"
+        f"<div class=\"page-title\"><h1>{html.escape(title)}</h1></div>"
+        f"<div class=\"page-body\">{content}</div>"
+        "</body></html>"
+    )
+
+
+def _product_grid(products: List[dict]) -> str:
+    items = "".join(
+        f"<div class=\"item-box\"><div class=\"product-item\" data-productid=\"{p['id']}\">"
+        f"<h2 class=\"product-title\"><a href=\"/{_slug(p['name'])}\">{html.escape(p['name'])}</a></h2>"
+        f"<div class=\"prices\"><span class=\"price actual-price\">{p['price']:.2f}</span></div>"
+        "</div></div>"
+        for p in products
+    )
+    return f"<div class=\"product-grid\">{items}</div>"
+
+
+def _items_table(kind: str, items: Dict[int, int]) -> str:
+    if not items:
+        empty = "Your Shopping Cart is empty!" if kind == "cart" else "The wishlist is empty!"
+        return f"<div class=\"order-summary-content\">{empty}</div>"
+    rows = "".join(
+        f"<tr class=\"cart-item-row\">"
+        f"<td class=\"remove-from-cart\"><input type=\"checkbox\" name=\"removefromcart\" value=\"{pid}\"></td>"
+        f"<td class=\"product\"><a href=\"/{_slug(PRODUCTS[pid]['name'])}\" class=\"product-name\">"
+        f"{html.escape(PRODUCTS[pid]['name'])}</a></td>"
+        f"<td class=\"unit-price\"><span class=\"product-unit-price\">{PRODUCTS[pid]['price']:.2f}</span></td>"
+        f"<td class=\"qty\"><input name=\"itemquantity{pid}\" type=\"text\" value=\"{qty}\" class=\"qty-input\"></td>"
+        f"<td class=\"subtotal\"><span class=\"product-subtotal\">{PRODUCTS[pid]['price'] * qty:.2f}</span></td>"
+        "</tr>"
+        for pid, qty in items.items()
+    )
+    return f"<form method=\"post\" action=\"/{kind}\"><table class=\"cart\"><tbody>{rows}</tbody></table></form>"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный заменитель DemoWebShop")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа в секундах")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Случайная добавка к задержке в секундах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой (0..1)")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP-статус внедренной ошибки")
+    args = parser.parse_args()
+
+    config = StubConfig(latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, error_status=args.error_status)
+    stub = DemoWebShopStub(args.host, args.port, config)
+    print(f"DemoWebShop stub: {stub.base_url}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Отдельные тестовые аккаунты для параллельных прогонов
+
+Все учетные записи строятся из TestData.TEST_USER: к локальной части email
+добавляется суффикс через "+" (test_user+gw0@example.com). У каждого воркера
+xdist свой аккаунт, а значит, своя корзина и свой список желаний.
+"""
+
+import hashlib
+import os
+import uuid
+from typing import Optional
+
+import allure
+
+from data.test_data import TestData
+from helpers.api_helpers import DemoWebShopAPI
+
+WORKER_ENV = "PYTEST_XDIST_WORKER"
+# Префикс прогона, чтобы аккаунты разных CI-запусков против живого сайта не пересекались
+RUN_ENV = "DEMOWEBSHOP_RUN_ID"
+
+
+def worker_name() -> str:
+    """Имя воркера xdist (gw0, gw1, ...) или "main" без xdist"""
+    return os.environ.get(WORKER_ENV, "main")
+
+
+def derive_user(suffix: str, base: Optional[dict] = None) -> dict:
+    """Копия TestData.TEST_USER с email local+suffix@domain"""
+    base = base or TestData.TEST_USER
+    local, domain = base["email"].split("@")
+    return {**base, "email": f"{local}+{suffix}@{domain}"}
+
+
+def worker_user(worker: Optional[str] = None) -> dict:
+    """Постоянный аккаунт воркера"""
+    return derive_user(_with_run_id(worker or worker_name()))
+
+
+def pool_user(number: int) -> dict:
+    """n-й аккаунт пула текущего воркера (helpers/account_pool.py)"""
+    return derive_user(_with_run_id(f"pool{number}-{worker_name()}"))
+
+
+def _with_run_id(suffix: str) -> str:
+    run_id = os.environ.get(RUN_ENV)
+    return f"{run_id}-{suffix}" if run_id else suffix
+
+
+def unique_user(prefix: str = "new", seed: Optional[str] = None) -> dict:
+    """
+    Аккаунт, которого еще нет в магазине (для проверки регистрации)
+
+    Args:
+        prefix: Начало суффикса email
+        seed: Основа детерминированного суффикса (например, nodeid теста). Нужна
+              при записи и воспроизведении кассеты: тело запроса регистрации должно
+              совпадать между прогонами. Без seed суффикс случайный - повторный
+              прогон против живого сайта не наткнется на уже созданный аккаунт.
+    """
+    if seed is None:
+        token = uuid.uuid4().hex[:12]
+    else:
+        token = hashlib.sha256(f"{_with_run_id(worker_name())}:{seed}".encode("utf-8")).hexdigest()[:12]
+    return derive_user(f"{prefix}-{worker_name()}-{token}")
+
+
+@allure.step("Подготовка тестового аккаунта")
+def ensure_registered(user: dict, api: Optional[DemoWebShopAPI] = None) -> DemoWebShopAPI:
+    """
+    Регистрация аккаунта, если его еще нет, и вход под ним
+
+    Returns:
+        DemoWebShopAPI: Клиент, авторизованный под этим аккаунтом
+    """
+    api = api or DemoWebShopAPI()
+    response = api.register(
+        email=user["email"],
+        password=user["password"],
+        first_name=user["first_name"],
+        last_name=user["last_name"]
+    )
+    if "The specified email already exists" in response.text or api.get_auth_token() is None:
+        api.login(email=user["email"], password=user["password"])
+    if api.get_auth_token() is None:
+        raise RuntimeError(f"Не удалось авторизоваться под тестовым аккаунтом {user['email']}")
+    return api
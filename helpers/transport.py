@@ -0,0 +1,118 @@
+"""
+Общий HTTP-транспорт для всех экземпляров DemoWebShopAPI
+
+Каждый клиент создает свою requests.Session (свои куки), но все сессии
+монтируют один и тот же адаптер, а значит, один пул соединений urllib3.
+TCP- и TLS-соединения переиспользуются между тестами, а не открываются
+заново для каждого нового DemoWebShopAPI().
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Варианты имени куки авторизации, которые встречаются у nopCommerce
+AUTH_COOKIE_NAMES = ("NOPCOMMERCE.AUTH", ".NOPCOMMERCE.AUTH", "Authentication")
+
+
+@dataclass
+class TransportConfig:
+    """
+    Настройки общего транспорта
+
+    Attributes:
+        pool_connections: Сколько пулов по хостам держать одновременно
+        pool_maxsize: Сколько соединений держать в пуле одного хоста
+        keep_alive: Переиспользовать соединения (False - заголовок Connection: close)
+        get_retries: Повторы для идемпотентных запросов (GET/HEAD) при сбоях и 502/503/504
+        backoff_factor: Множитель экспоненциальной паузы между повторами, с
+    """
+    pool_connections: int = 4
+    pool_maxsize: int = 16
+    keep_alive: bool = True
+    get_retries: int = 2
+    backoff_factor: float = 0.3
+    retry_statuses: Tuple[int, ...] = (502, 503, 504)
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        return cls(
+            pool_connections=int(os.environ.get("DEMOWEBSHOP_POOL_HOSTS", cls.pool_connections)),
+            pool_maxsize=int(os.environ.get("DEMOWEBSHOP_POOL_SIZE", cls.pool_maxsize)),
+            keep_alive=os.environ.get("DEMOWEBSHOP_KEEP_ALIVE", "1") not in ("0", "false", "no"),
+            get_retries=int(os.environ.get("DEMOWEBSHOP_GET_RETRIES", cls.get_retries)),
+            backoff_factor=float(os.environ.get("DEMOWEBSHOP_RETRY_BACKOFF", cls.backoff_factor)),
+        )
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """
+    Адаптер, который живет дольше отдельных сессий
+
+    Session.close() закрывает все смонтированные адаптеры, поэтому
+    обычный close() здесь ничего не делает, а пул закрывается только
+    через close_pool().
+    """
+
+    def close(self):
+        pass
+
+    def close_pool(self):
+        super().close()
+
+
+_config = TransportConfig.from_env()
+_adapter: Optional[SharedHTTPAdapter] = None
+_lock = threading.Lock()
+
+
+def configure_transport(config: TransportConfig):
+    """Замена настроек транспорта, старый пул закрывается"""
+    global _config, _adapter
+    with _lock:
+        _config = config
+        if _adapter is not None:
+            _adapter.close_pool()
+            _adapter = None
+
+
+def get_transport_config() -> TransportConfig:
+    return _config
+
+
+def get_shared_adapter() -> SharedHTTPAdapter:
+    """Общий на процесс адаптер, создается при первом обращении"""
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            # Повторы статусов и чтения - только для GET/HEAD. urllib3 повторяет и ошибки
+            # установления соединения для любых методов: запрос тогда до сервера не дошел
+            retries = Retry(
+                total=_config.get_retries,
+                backoff_factor=_config.backoff_factor,
+                status_forcelist=_config.retry_statuses,
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                raise_on_status=False,
+            )
+            _adapter = SharedHTTPAdapter(
+                pool_connections=_config.pool_connections,
+                pool_maxsize=_config.pool_maxsize,
+                max_retries=retries,
+            )
+        return _adapter
+
+
+def mount_shared_transport(session: requests.Session) -> SharedHTTPAdapter:
+    """Подключает общий пул к сессии, куки сессии при этом остаются своими"""
+    adapter = get_shared_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not _config.keep_alive:
+        session.headers["Connection"] = "close"
+    return adapter
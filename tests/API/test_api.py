@@ -1,7 +1,10 @@
+import asyncio
 import requests
 import allure
 import pytest
 from helpers.api_helpers import DemoWebShopAPI
+from helpers.async_api_helpers import AsyncDemoWebShopAPI, gather_step
+from helpers.attachments import attach, attach_response
 from data.test_data import TestData
 
 
@@ -19,22 +22,18 @@ class TestAuth:
     2. Проверяем успешность регистрации
     3. Проверяем отсутствие ошибки о существующем email
     """)
-    def test_successful_registration(self):
+    def test_successful_registration(self, new_user):
         api = DemoWebShopAPI()
         
         with allure.step("Регистрируем нового пользователя"):
             response = api.register(
-                email=TestData.TEST_USER["email"],
-                password=TestData.TEST_USER["password"],
-                first_name=TestData.TEST_USER["first_name"],
-                last_name=TestData.TEST_USER["last_name"]
+                email=new_user["email"],
+                password=new_user["password"],
+                first_name=new_user["first_name"],
+                last_name=new_user["last_name"]
             )
             
-            allure.attach(
-                response.text,
-                "response.html",
-                allure.attachment_type.HTML
-            )
+            attach_response(response, "response.html")
         
         with allure.step("Проверяем успешность регистрации"):
             assert response.status_code == 200
@@ -49,38 +48,30 @@ class TestAuth:
     2. Пытаемся зарегистрировать второго пользователя с тем же email
     3. Проверяем наличие сообщения об ошибке
     """)
-    def test_registration_with_existing_email(self):
+    def test_registration_with_existing_email(self, new_user):
         api = DemoWebShopAPI()
         
         # Сначала регистрируем пользователя
         with allure.step("Регистрируем первого пользователя"):
             first_response = api.register(
-                email=TestData.TEST_USER["email"],
-                password=TestData.TEST_USER["password"],
-                first_name=TestData.TEST_USER["first_name"],
-                last_name=TestData.TEST_USER["last_name"]
+                email=new_user["email"],
+                password=new_user["password"],
+                first_name=new_user["first_name"],
+                last_name=new_user["last_name"]
             )
             
-            allure.attach(
-                first_response.text,
-                "first_registration_response.html",
-                allure.attachment_type.HTML
-            )
+            attach_response(first_response, "first_registration_response.html")
         
         # Пытаемся зарегистрировать второго пользователя с тем же email
         with allure.step("Пытаемся зарегистрировать пользователя с существующим email"):
             second_response = api.register(
-                email=TestData.TEST_USER["email"],  # Тот же email
+                email=new_user["email"],  # Тот же email
                 password="DifferentPassword123",
                 first_name="Another",
                 last_name="User"
             )
             
-            allure.attach(
-                second_response.text,
-                "second_registration_response.html",
-                allure.attachment_type.HTML
-            )
+            attach_response(second_response, "second_registration_response.html")
         
         with allure.step("Проверяем наличие сообщения об ошибке"):
             assert "The specified email already exists" in second_response.text
@@ -94,20 +85,16 @@ class TestAuth:
     2. Проверяем успешность входа
     3. Проверяем наличие токена авторизации
     """)
-    def test_successful_login(self):
+    def test_successful_login(self, test_user):
         api = DemoWebShopAPI()
         
         with allure.step("Выполняем вход в систему"):
             response = api.login(
-                email=TestData.TEST_USER["email"],
-                password=TestData.TEST_USER["password"]
+                email=test_user["email"],
+                password=test_user["password"]
             )
             
-            allure.attach(
-                response.text,
-                "response.html",
-                allure.attachment_type.HTML
-            )
+            attach_response(response, "response.html")
         
         with allure.step("Проверяем успешность входа"):
             assert response.status_code == 200
@@ -115,11 +102,7 @@ class TestAuth:
         with allure.step("Проверяем наличие токена авторизации"):
             token = api.get_auth_token()
             assert token is not None
-            allure.attach(
-                str(token),
-                "auth_token.txt",
-                allure.attachment_type.TEXT
-            )
+            attach(str(token), "auth_token.txt", allure.attachment_type.TEXT)
 
 @allure.epic("DemoWebShop")
 @allure.feature("Корзина")
@@ -128,88 +111,110 @@ class TestCart:
     @allure.story("Работа с корзиной")
     @allure.title("Добавление товара в корзину")
     @allure.severity(allure.severity_level.CRITICAL)
-    def test_add_to_cart(self):
-        api = DemoWebShopAPI()
-        
-        with allure.step("Авторизуемся в системе"):
-            api.login(
-                email=TestData.TEST_USER["email"],
-                password=TestData.TEST_USER["password"]
-            )
+    @pytest.mark.case("CART-001")
+    def test_add_to_cart(self, authenticated_api):
+        api = authenticated_api
         
         with allure.step("Добавляем товар в корзину"):
             product = TestData.PRODUCTS["simple_computer"]
             response = api.add_to_cart(product_id=product["id"], quantity=1)
             
-            allure.attach(
-                response.text,
-                "response.html",
-                allure.attachment_type.HTML
-            )
+            attach_response(response, "response.html")
         
         with allure.step("Проверяем успешность добавления"):
             assert response.status_code == 200
-            assert "The product has been added" in response.text
+            assert response.page.success, response.page.message
     
     @allure.story("Работа с корзиной")
     @allure.title("Просмотр содержимого корзины")
     @allure.severity(allure.severity_level.CRITICAL)
-    def test_view_cart(self):
-        api = DemoWebShopAPI()
-        
-        with allure.step("Авторизуемся в системе"):
-            api.login(
-                email=TestData.TEST_USER["email"],
-                password=TestData.TEST_USER["password"]
-            )
+    def test_view_cart(self, authenticated_api):
+        api = authenticated_api
         
         with allure.step("Получаем содержимое корзины"):
             response = api.get_cart()
             
-            allure.attach(
-                response.text,
-                "cart_content.html",
-                allure.attachment_type.HTML
-            )
+            attach_response(response, "cart_content.html")
         
         with allure.step("Проверяем успешность получения корзины"):
             assert response.status_code == 200
             # Проверяем, что страница корзины загрузилась
-            assert "Shopping cart" in response.text
+            assert response.page.title == "Shopping cart"
     
     @allure.story("Работа с корзиной")
     @allure.title("Добавление нескольких товаров в корзину")
     @allure.severity(allure.severity_level.NORMAL)
-    def test_add_multiple_products(self):
-        api = DemoWebShopAPI()
-        
-        with allure.step("Авторизуемся в системе"):
-            api.login(
-                email=TestData.TEST_USER["email"],
-                password=TestData.TEST_USER["password"]
-            )
+    def test_add_multiple_products(self, pooled_account):
+        # Аккаунт из пула: корзина заведомо пуста, количества можно сверять точно
+        api = pooled_account.api
         
         products = [
             (TestData.PRODUCTS["simple_computer"], 1),
             (TestData.PRODUCTS["laptop"], 2)
         ]
         
-        for product, quantity in products:
-            with allure.step(f"Добавляем товар {product['name']} в количестве {quantity}"):
-                response = api.add_to_cart(product_id=product["id"], quantity=quantity)
-                
-                allure.attach(
-                    response.text,
-                    f"add_{product['name']}_response.html",
-                    allure.attachment_type.HTML
-                )
-                
-                assert response.status_code == 200
-                assert "The product has been added" in response.text
+        with allure.step("Добавляем товары в корзину одним пакетом"):
+            batch = api.add_many_to_cart(
+                [(product["id"], quantity) for product, quantity in products]
+            )
+        
+        with allure.step("Проверяем успешность добавления"):
+            assert not batch.failed, batch.failed
         
         with allure.step("Проверяем содержимое корзины"):
-            cart_response = api.get_cart()
-            assert cart_response.status_code == 200
-            # Проверяем наличие товаров в корзине
-            for product, _ in products:
-                assert product["name"] in cart_response.text
+            # Корзина загружена один раз, после всех добавлений
+            for product, quantity in products:
+                assert batch.cart.quantity_of(product["name"]) == quantity
+
+    @allure.story("Работа с корзиной")
+    @allure.title("Одновременное получение корзины, списка желаний и заказов")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_parallel_account_pages(self, test_user):
+        async def scenario():
+            async with AsyncDemoWebShopAPI() as api:
+                with allure.step("Авторизуемся в системе"):
+                    await api.login(
+                        email=test_user["email"],
+                        password=test_user["password"]
+                    )
+
+                return await gather_step(
+                    "Параллельно запрашиваем корзину, список желаний и заказы",
+                    api.get_cart(),
+                    api.get_wishlist(),
+                    api.get_orders()
+                )
+
+        cart, wishlist, orders = asyncio.run(scenario())
+
+        with allure.step("Проверяем, что все страницы загрузились"):
+            assert cart.status_code == 200
+            assert cart.page.title == "Shopping cart"
+            assert wishlist.status_code == 200
+            assert orders.status_code == 200
+
+
+@allure.epic("DemoWebShop")
+@allure.feature("Каталог")
+class TestCatalog:
+
+    @allure.story("Поиск товаров")
+    @allure.title("Поиск товара по названию")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_search_finds_product(self):
+        api = DemoWebShopAPI()
+        product = TestData.PRODUCTS["simple_computer"]
+
+        with allure.step(f"Ищем товар {product['name']}"):
+            # Страница читается только до первого найденного маркера
+            scan = api.scan_search_results(
+                query=product["name"],
+                markers=[product["name"], "No products were found"]
+            )
+
+            attach_response(scan, "search_tail.html")
+
+        with allure.step("Проверяем, что товар найден"):
+            assert scan.status_code == 200
+            assert product["name"] in scan
+            assert "No products were found" not in scan
@@ -1,6 +1,5 @@
 import allure
-from helpers.api_helpers import DemoWebShopAPI
-from data.test_data import TestData
+from helpers.attachments import attach_response
 
 
 @allure.label("owner", "Yaroslav YAQA")
@@ -13,32 +12,23 @@ class TestUserProfile:
     @allure.severity(allure.severity_level.CRITICAL)
     @allure.description("""
     Тест проверяет получение данных профиля авторизованного пользователя:
-    1. Авторизуемся в системе
+    1. Получаем авторизованную сессию
     2. Отправляем GET запрос на получение профиля
     3. Проверяем корректность полученных данных
     """)
-    def test_get_user_profile(self):
-        api = DemoWebShopAPI()
-        
-        with allure.step("Авторизуемся в системе"):
-            api.login(
-                email=TestData.TEST_USER["email"],
-                password=TestData.TEST_USER["password"]
-            )
+    def test_get_user_profile(self, authenticated_api, test_user):
+        api = authenticated_api
         
         with allure.step("Получаем данные профиля"):
             response = api.get_profile()
             
-            allure.attach(
-                response.text,
-                "profile_response.html",
-                allure.attachment_type.HTML
-            )
+            attach_response(response, "profile_response.html")
         
         with allure.step("Проверяем корректность данных"):
             assert response.status_code == 200
-            # Проверяем наличие email в профиле
-            assert TestData.TEST_USER["email"] in response.text
-            # Проверяем наличие имени пользователя
-            assert TestData.TEST_USER["first_name"] in response.text
-            assert TestData.TEST_USER["last_name"] in response.text 
\ No newline at end of file
+            profile = response.page
+            # Проверяем email в профиле
+            assert profile.email == test_user["email"]
+            # Проверяем имя пользователя
+            assert profile.first_name == test_user["first_name"]
+            assert profile.last_name == test_user["last_name"] 
\ No newline at end of file
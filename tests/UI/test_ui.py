@@ -0,0 +1,68 @@
+import allure
+import pytest
+from selene import browser, have
+
+from data.test_data import TestData
+from helpers.browser_pool import reset_browser_state
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("UI Корзина")
+class TestCartUI:
+
+    @allure.story("Работа с корзиной")
+    @allure.title("Корзина, наполненная через API, видна в браузере")
+    @allure.severity(allure.severity_level.CRITICAL)
+    @allure.description("""
+    Тест проверяет перенос сессии из API в браузер:
+    1. Авторизуемся через API и наполняем корзину (маркер seed_cart)
+    2. Переносим куки сессии в браузер
+    3. Открываем корзину в браузере и проверяем товары и количество
+    """)
+    @pytest.mark.ui
+    @pytest.mark.case("CART-002")
+    @pytest.mark.seed_cart(TestData.PRODUCTS["simple_computer"]["id"], (TestData.PRODUCTS["laptop"]["id"], 2))
+    def test_seeded_cart_in_browser(self, logged_in_browser, test_user):
+        computer = TestData.PRODUCTS["simple_computer"]
+        laptop = TestData.PRODUCTS["laptop"]
+
+        with allure.step("Проверяем, что браузер авторизован"):
+            browser.element(".account").should(have.exact_text(test_user["email"]))
+
+        with allure.step("Открываем корзину"):
+            browser.open("/cart")
+
+        with allure.step("Проверяем товары и количество в корзине"):
+            browser.all(".cart-item-row .product-name").should(
+                have.exact_texts(computer["name"], laptop["name"])
+            )
+            browser.all(".cart-item-row .qty-input").should(have.values("1", "2"))
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("UI Инфраструктура")
+class TestBrowserReset:
+
+    @allure.story("Пул браузеров")
+    @allure.title("Очистка браузера удаляет куки и хранилища магазина, открытого не в текущей вкладке")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.ui
+    def test_reset_clears_other_origins(self, webshop_base_url):
+        driver = browser.driver
+
+        with allure.step("Сохраняем куки и хранилища магазина, затем уходим со страницы"):
+            driver.add_cookie({"name": "pool_marker", "value": "1"})
+            driver.execute_script("localStorage.setItem('pool_marker', '1'); sessionStorage.setItem('pool_marker', '1');")
+            driver.get("about:blank")
+
+        with allure.step("Очищаем браузер, как при возврате в пул"):
+            reset_browser_state(driver, [webshop_base_url])
+
+        with allure.step("Проверяем, что в магазине не осталось данных прошлого теста"):
+            browser.open("")
+            assert driver.get_cookie("pool_marker") is None
+            assert driver.execute_script(
+                "return [localStorage.getItem('pool_marker'), sessionStorage.getItem('pool_marker')];"
+            ) == [None, None]
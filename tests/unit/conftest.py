@@ -0,0 +1,22 @@
+import pytest
+
+from helpers.cassette import CASSETTE_ENV
+from helpers.response_cache import configure_response_cache, get_response_cache
+from helpers.stub_server import DemoWebShopStub
+
+
+@pytest.fixture(scope="module")
+def stub():
+    """Отдельная заглушка магазина на модуль: состояние не пересекается с остальным прогоном"""
+    with DemoWebShopStub() as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def _isolated_clients(monkeypatch):
+    """Клиенты в тестах инфраструктуры не подхватывают кассету и кэш ответов прогона (--cassette, --response-cache)"""
+    monkeypatch.delenv(CASSETTE_ENV, raising=False)
+    previous = get_response_cache()
+    configure_response_cache(None)
+    yield
+    configure_response_cache(previous)
@@ -0,0 +1,69 @@
+import time
+
+import allure
+import pytest
+
+from helpers.account_pool import AccountPool
+from helpers.api_helpers import BASE_URL_ENV
+from helpers.test_accounts import unique_user
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: пул аккаунтов")
+class TestAccountPool:
+
+    @allure.title("Грязный аккаунт очищается перед повторной выдачей")
+    def test_acquire_and_release(self, stub, monkeypatch):
+        monkeypatch.setenv(BASE_URL_ENV, stub.base_url)
+        pool = AccountPool(size=1, user_factory=lambda number: unique_user(f"pool{number}")).fill()
+        try:
+            account = pool.acquire()
+            account.api.add_to_cart(13)
+            assert account.dirty
+            pool.release(account)
+
+            again = pool.acquire()
+            assert again is account
+            assert not again.dirty
+            assert again.api.get_cart().page.is_empty
+        finally:
+            pool.close()
+
+    @allure.title("Ошибка фоновой регистрации поднимается из acquire сразу")
+    def test_registration_error_fails_fast(self):
+        def broken_user(number):
+            raise ValueError("магазин недоступен")
+
+        pool = AccountPool(size=1, user_factory=broken_user, timeout=30).fill()
+        try:
+            started = time.monotonic()
+            with pytest.raises(RuntimeError) as error:
+                pool.acquire()
+            assert time.monotonic() - started < 5
+            assert isinstance(error.value.__cause__, ValueError)
+        finally:
+            pool.close()
+
+    @allure.title("После временного сбоя регистрации следующий acquire выдает аккаунт")
+    def test_registration_recovers_after_error(self, stub, monkeypatch):
+        monkeypatch.setenv(BASE_URL_ENV, stub.base_url)
+        calls = []
+
+        def flaky_user(number):
+            calls.append(number)
+            if len(calls) == 1:
+                raise ValueError("временный сбой")
+            return unique_user(f"flaky{number}")
+
+        pool = AccountPool(size=1, user_factory=flaky_user, timeout=30).fill()
+        try:
+            with pytest.raises(RuntimeError):
+                pool.acquire()
+
+            account = pool.acquire()
+
+            assert account.api.get_cart().page.is_empty
+            assert len(calls) == 2
+        finally:
+            pool.close()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import allure
+import pytest
+
+from helpers import async_api_helpers, attachments
+from helpers.async_api_helpers import async_step, gather_step
+from helpers.cassette import CASSETTE_ENV
+
+ROOT = Path(__file__).resolve().parents[2]
+PARALLEL_TEST = "tests/API/test_api.py::TestCart::test_parallel_account_pages"
+
+
+def step_tree(steps):
+    return [(step["name"], step_tree(step.get("steps", []))) for step in steps]
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: шаги асинхронного клиента")
+class TestAsyncSteps:
+
+    @allure.title("Шаги корутин под gather_step не вкладываются друг в друга")
+    def test_gather_steps_are_siblings(self, tmp_path):
+        env = {key: value for key, value in os.environ.items() if key != CASSETTE_ENV}
+        # Отдельный прогон с собственным --alluredir: отчет текущего прогона не затрагивается
+        subprocess.run(
+            [sys.executable, "-m", "pytest", PARALLEL_TEST, "--stub-server", f"--alluredir={tmp_path}",
+             "-p", "no:cacheprovider", "-p", "no:xdist", "-q"],
+            cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        result = json.loads(next(tmp_path.glob("*-result.json")).read_text(encoding="utf-8"))
+
+        parallel = next(step for step in result["steps"] if step["name"].startswith("Параллельно"))
+
+        assert [name.rsplit(" (", 1)[0] for name, _ in step_tree(parallel["steps"])] == [
+            "Получение содержимого корзины",
+            "Получение списка желаний",
+            "Получение списка заказов",
+        ]
+        assert all(children == [] for _, children in step_tree(parallel["steps"]))
+
+    @allure.title("Вложения и ошибка корутины попадают в ее собственный шаг")
+    def test_gather_step_records_attachments(self, monkeypatch):
+        events = []
+
+        @contextmanager
+        def fake_step(title):
+            events.append(("open", title.rsplit(" (", 1)[0]))
+            try:
+                yield
+            except Exception as error:
+                events.append(("failed", type(error).__name__))
+                raise
+            finally:
+                events.append(("close", title.rsplit(" (", 1)[0]))
+
+        monkeypatch.setattr(async_api_helpers.allure, "step", fake_step)
+        monkeypatch.setattr(attachments.allure, "attach", lambda body, name=None, **kwargs: events.append(("attach", name)))
+        monkeypatch.setattr(attachments.policy, "mode", "always")
+
+        @async_step("A")
+        async def first():
+            await asyncio.sleep(0.01)
+            attachments.attach("a", "a.txt")
+
+        @async_step("B")
+        async def second():
+            attachments.attach("b", "b.txt")
+            await asyncio.sleep(0)
+            raise ValueError("b")
+
+        with pytest.raises(ValueError):
+            asyncio.run(gather_step("gather", first(), second()))
+
+        assert events == [
+            ("open", "gather"),
+            ("open", "A"), ("attach", "a.txt"), ("close", "A"),
+            ("open", "B"), ("attach", "b.txt"), ("failed", "ValueError"), ("close", "B"),
+            ("failed", "ValueError"), ("close", "gather"),
+        ]
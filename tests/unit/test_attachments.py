@@ -0,0 +1,102 @@
+import allure
+import pytest
+
+from helpers import attachments
+from helpers.attachments import _truncate
+
+
+@pytest.fixture
+def attached(monkeypatch):
+    """Вложения, которые ушли бы в Allure: (имя, содержимое)"""
+    calls = []
+    monkeypatch.setattr(attachments.allure, "attach", lambda body, name=None, **kwargs: calls.append((name, body)))
+    monkeypatch.setattr(attachments.policy, "mode", "always")
+    monkeypatch.setattr(attachments.policy, "dedup", True)
+    monkeypatch.setattr(attachments.policy, "max_bytes", None)
+    monkeypatch.setattr(attachments.policy, "gzip_over", None)
+    return calls
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: вложения Allure")
+class TestAttachments:
+
+    @allure.title("Обрезка оставляет начало и конец содержимого")
+    def test_truncate_keeps_head_and_tail(self):
+        data = b"a" * 500 + b"b" * 500
+
+        result = _truncate(data, 200)
+
+        head, marker, tail = result.partition("обрезано".encode("utf-8"))
+        assert head.startswith(b"aaaaa")
+        assert tail.endswith(b"bbbbb")
+        assert marker
+
+    @pytest.mark.parametrize("max_bytes", [0, 1, 40, 50, 200, 999])
+    @allure.title("Обрезанное содержимое вместе с пометкой не превышает лимит")
+    def test_truncate_within_limit(self, max_bytes):
+        data = bytes(range(256)) * 4
+
+        result = _truncate(data, max_bytes)
+
+        assert len(result) <= max_bytes
+
+    @allure.title("Текстовый артефакт браузера вместе с пометкой не превышает лимит")
+    def test_encode_lines_within_limit(self, monkeypatch):
+        monkeypatch.setattr(attachments.policy, "max_bytes", 100)
+
+        result = attachments._encode_lines((f"line {number}\n" for number in range(100)), compress=False)
+
+        assert len(result) <= 100
+        assert result.startswith(b"line 0\n")
+        assert "обрезано".encode("utf-8") in result
+
+    @allure.title("Повтор содержимого внутри теста заменяется ссылкой")
+    def test_dedup_within_test(self, attached):
+        attachments.attach("same body", "first")
+        attachments.attach("same body", "second")
+
+        assert attached[0] == ("first", b"same body")
+        assert attached[1][0] == "second"
+        assert "first" in attached[1][1]
+
+    @allure.title("Повтор содержимого в следующем тесте прикладывается целиком")
+    def test_dedup_reset_between_tests(self, attached):
+        attachments.attach("same body", "first")
+        attachments.start_test()
+
+        attachments.attach("same body", "next test")
+
+        assert attached[1] == ("next test", b"same body")
+
+    @allure.title("Состояние вложений хранится в stash теста и не смешивается между тестами")
+    def test_state_per_item(self, attached, monkeypatch):
+        monkeypatch.setattr(attachments.policy, "mode", "on-failure")
+        first, second = _Item(), _Item()
+
+        attachments.start_test(first)
+        attachments.attach("body", "first pending")
+        attachments.start_test(second)
+        attachments.on_phase_report("call", failed=True, item=first)
+
+        assert attached == [("first pending", b"body")]
+        assert second.stash[attachments.state_key].pending == []
+
+    @allure.title("Артефакты из фоновых потоков прикладываются после teardown")
+    def test_artifacts_attached_on_teardown(self, attached):
+        item = _Item()
+        attachments.start_test(item)
+
+        attachments._submit(lambda: b"png", name="screenshot", attachment_type=allure.attachment_type.PNG)
+        assert attached == []
+        attachments.on_phase_report("teardown", failed=False, item=item)
+
+        assert attached == [("screenshot", b"png")]
+
+
+class _Item:
+    """Минимальная замена pytest.Item: вложениям нужен только stash"""
+
+    def __init__(self):
+        self.stash = pytest.Stash()
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import allure
+import pytest
+
+from helpers import auth_cache
+from helpers.api_helpers import BASE_URL_ENV, DemoWebShopAPI
+from helpers.auth_cache import LoginCache
+from helpers.test_accounts import unique_user
+
+
+@pytest.fixture
+def users(stub, monkeypatch):
+    """Два зарегистрированных на заглушке пользователя; LoginCache берет адрес из окружения"""
+    monkeypatch.setenv(BASE_URL_ENV, stub.base_url)
+    registered = []
+    for name in ("cache-a", "cache-b"):
+        user = unique_user(name)
+        DemoWebShopAPI(base_url=stub.base_url).register(
+            user["email"], user["password"], user["first_name"], user["last_name"])
+        registered.append(user)
+    return registered
+
+
+@pytest.fixture
+def slow_logins(monkeypatch):
+    """Вход длится 0.3 с; возвращает список email, под которыми выполнялся вход"""
+    calls = []
+    login = DemoWebShopAPI.login
+
+    def slow_login(self, email, password):
+        calls.append(email)
+        time.sleep(0.3)
+        return login(self, email, password)
+
+    monkeypatch.setattr(DemoWebShopAPI, "login", slow_login)
+    return calls
+
+
+def in_threads(*calls):
+    threads = [threading.Thread(target=call) for call in calls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: кэш авторизации")
+class TestLoginCache:
+
+    @allure.title("Свежая запись выдается без проверочного запроса /customer/info")
+    def test_no_probe_within_interval(self, users, monkeypatch):
+        probes = []
+        original = auth_cache.is_authenticated
+        monkeypatch.setattr(auth_cache, "is_authenticated", lambda api: probes.append(api) or original(api))
+        cache = LoginCache()
+        user = users[0]
+
+        first = cache.get_api(user["email"], user["password"])
+        second = cache.get_api(user["email"], user["password"])
+
+        assert second.get_auth_token() == first.get_auth_token()
+        assert probes == []
+
+    @allure.title("По истечении probe_interval запись проверяется, мертвая сессия заменяется входом")
+    def test_probe_after_interval(self, users):
+        cache = LoginCache(probe_interval=0)
+        user = users[0]
+        first = cache.get_api(user["email"], user["password"])
+        first.session.get(f"{first.base_url}/logout")
+
+        second = cache.get_api(user["email"], user["password"])
+
+        assert second.get_auth_token() is not None
+        assert second.get_auth_token() != first.get_auth_token()
+
+    @allure.title("Входы разных пользователей не ждут друг друга, один пользователь входит один раз")
+    def test_logins_locked_per_user(self, users, slow_logins):
+        cache = LoginCache()
+        a, b = users
+
+        started = time.monotonic()
+        in_threads(*(lambda user=user: cache.get_api(user["email"], user["password"]) for user in (a, a, b, b)))
+
+        assert time.monotonic() - started < 0.55
+        assert sorted(slow_logins) == sorted([a["email"], b["email"]])
@@ -0,0 +1,90 @@
+import allure
+import pytest
+
+from data.case_query import Q, Query, QuerySyntaxError, parse_query, select
+from data.test_cases import get_registry
+
+
+def ids(cases):
+    return {case.id for case in cases}
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: выборка тест-кейсов")
+class TestCaseQuery:
+
+    @allure.title("Строка запроса и объекты Q дают одинаковую выборку")
+    def test_string_matches_objects(self):
+        query = Q.tag("smoke") & Q.layer("API") & ~Q.tag("negative")
+
+        assert ids(select("smoke and layer=API and not negative")) == ids(select(query))
+
+    @allure.title("Выборка совпадает с перебором каталога")
+    def test_select_matches_scan(self):
+        registry = get_registry()
+        expected = {
+            case.id for case in registry
+            if case.severity in ("blocker", "critical") and ("smoke" in case.tags or case.layer == "UI")
+        }
+
+        assert ids(select("severity in (blocker, critical) and (smoke or layer=UI)")) == expected
+
+    @allure.title("Приоритет операторов: and связывает сильнее or")
+    def test_precedence(self):
+        assert ids(select("api or smoke and negative")) == ids(select("api or (smoke and negative)"))
+
+    @allure.title("Значение в кавычках может содержать пробелы")
+    def test_quoted_value(self):
+        query = parse_query('feature="API" and tag in ("smoke", api)')
+
+        assert ids(select(query)) == ids(select(Q.feature("API") & Q.tag("smoke", "api")))
+
+    @pytest.mark.parametrize("text", ["", "smoke and", "(smoke", "layer=", "color=red", "smoke )"])
+    @allure.title("Ошибка разбора запроса")
+    def test_syntax_errors(self, text):
+        with pytest.raises(QuerySyntaxError):
+            parse_query(text)
+
+    @allure.title("Регистр значений не учитывается")
+    def test_case_insensitive_values(self):
+        assert select("API")
+        assert ids(select("API")) == ids(select("api"))
+        assert ids(select("layer=api and SMOKE")) == ids(select("layer=API and smoke"))
+
+    @allure.title("Query нельзя использовать без реализации mask")
+    def test_query_is_abstract(self):
+        with pytest.raises(TypeError):
+            Query()
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: выборка тест-кейсов")
+class TestCatalogCompatibility:
+
+    @allure.title("Прежние словари разделов доступны по старым именам")
+    def test_feature_aliases(self):
+        from data.test_cases import (
+            api_test_cases, cart_test_cases, get_tests_by_feature, login_test_cases, registration_test_cases,
+        )
+
+        for feature, cases in (("Registration", registration_test_cases), ("Login", login_test_cases),
+                               ("API", api_test_cases), ("Cart", cart_test_cases)):
+            assert list(cases.values()) == get_tests_by_feature(feature)
+        assert cart_test_cases["test_view_cart"].id == "CART-002"
+
+    @allure.title("Тест-кейс неизменяемый, хэшируется и переживает pickle")
+    def test_case_is_frozen_tuple(self):
+        import pickle
+
+        from data.test_cases import TestCase
+
+        case = TestCase("X-001", "Кейс", "", ["предусловие"], ["шаг"], "", "normal", "API", "Feature", ["smoke"])
+
+        assert case.tags == ("smoke",) and case.steps == ("шаг",)
+        assert pickle.loads(pickle.dumps(case)) == case
+        assert {case: 1}[pickle.loads(pickle.dumps(case))] == 1
+        assert not hasattr(case, "__dict__")
+        with pytest.raises(AttributeError):
+            case.id = "X-002"
@@ -0,0 +1,97 @@
+import allure
+import pytest
+import requests
+
+from helpers.api_helpers import DemoWebShopAPI
+from helpers.cassette import Cassette, CassetteMissError, request_key
+from helpers.streaming import scan_response
+
+# Порт, на котором гарантированно никто не слушает: воспроизведение не должно ходить в сеть
+OFFLINE_URL = "http://127.0.0.1:9"
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: кассета HTTP-ответов")
+class TestCassette:
+
+    @allure.title("Записанные ответы воспроизводятся по другому адресу магазина")
+    def test_record_then_replay(self, stub, tmp_path):
+        path = str(tmp_path / "api.cassette")
+        recorder = DemoWebShopAPI(base_url=stub.base_url, cassette=Cassette(path, "record"))
+        recorder.register("tape@example.com", "secret1", "Tape", "User")
+        recorder.login("tape@example.com", "secret1")
+        recorded_cart = [recorder.get_cart().page]
+        recorder.add_to_cart(45)
+        recorded_cart.append(recorder.get_cart().page)
+
+        replayer = DemoWebShopAPI(base_url=OFFLINE_URL, cassette=Cassette(path, "replay"))
+        replayer.register("tape@example.com", "secret1", "Tape", "User")
+        replayer.login("tape@example.com", "secret1")
+
+        assert replayer.get_auth_token() == recorder.get_auth_token()
+        assert replayer.get_cart().page == recorded_cart[0]
+        assert replayer.add_to_cart(45).page.success
+        assert replayer.get_cart().page == recorded_cart[1]
+
+    @allure.title("Запрос без записи в режиме replay - CassetteMissError")
+    def test_replay_miss(self, tmp_path):
+        api = DemoWebShopAPI(base_url=OFFLINE_URL, cassette=Cassette(str(tmp_path / "empty.cassette"), "replay"))
+
+        with pytest.raises(CassetteMissError):
+            api.get_cart()
+
+    @allure.title("Порядок полей формы не влияет на ключ записи")
+    def test_form_field_order(self, stub, tmp_path):
+        path = str(tmp_path / "api.cassette")
+        DemoWebShopAPI(base_url=stub.base_url, cassette=Cassette(path, "record")).session.post(
+            f"{stub.base_url}/login", data={"Email": "a@example.com", "Password": "x"})
+        cassette = Cassette(path, "replay")
+
+        response = DemoWebShopAPI(base_url=OFFLINE_URL, cassette=cassette).session.post(
+            f"{OFFLINE_URL}/login", data={"Password": "x", "Email": "a@example.com"})
+
+        assert response.status_code == 200
+        assert len(cassette) == 1
+
+    @allure.title("Потоковый разбор при записи не дочитывает тело, неполная запись - только для потоковых запросов")
+    def test_record_stream_reads_only_scanned_part(self, stub, tmp_path):
+        path = str(tmp_path / "api.cassette")
+        recorder = DemoWebShopAPI(base_url=stub.base_url, cassette=Cassette(path, "record"))
+        full_length = len(DemoWebShopAPI(base_url=stub.base_url).session.get(f"{stub.base_url}/books").content)
+
+        recorded = scan_response(recorder.session.get(f"{stub.base_url}/books", stream=True),
+                                 ["Demo Web Shop"], chunk_size=64)
+
+        cassette = Cassette(path, "replay")
+        header, body = cassette.play(request_key(requests.Request("GET", f"{OFFLINE_URL}/books").prepare()),
+                                     stream=True)
+        assert recorded.bytes_read < full_length
+        assert header["partial"]
+        assert len(body) == recorded.bytes_read
+        replayer = DemoWebShopAPI(base_url=OFFLINE_URL, cassette=cassette)
+        replayed = scan_response(replayer.session.get(f"{OFFLINE_URL}/books", stream=True),
+                                 ["Demo Web Shop"], chunk_size=64)
+        assert replayed.matched == recorded.matched
+        with pytest.raises(CassetteMissError):
+            replayer.session.get(f"{OFFLINE_URL}/books")
+
+    @allure.title("Тесты получают свои ответы при воспроизведении в обратном порядке")
+    def test_replay_in_reversed_order(self, stub, tmp_path, monkeypatch):
+        path = str(tmp_path / "api.cassette")
+
+        def run_test(name: str, cassette: Cassette, base_url: str) -> list:
+            monkeypatch.setenv("PYTEST_CURRENT_TEST", f"tests/test_shop.py::{name} (call)")
+            api = DemoWebShopAPI(base_url=base_url, cassette=cassette)
+            if name == "test_add":
+                api.add_to_cart(45)
+            return [line.name for line in api.get_cart().page.lines]
+
+        recorder = Cassette(path, "record")
+        recorded = {name: run_test(name, recorder, stub.base_url) for name in ("test_empty", "test_add")}
+        replayer = Cassette(path, "replay")
+        replayed = {name: run_test(name, replayer, OFFLINE_URL) for name in ("test_add", "test_empty")}
+
+        assert recorded["test_empty"] == []
+        assert recorded["test_add"]
+        assert replayed == recorded
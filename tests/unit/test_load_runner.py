@@ -0,0 +1,47 @@
+import allure
+
+from helpers.load_runner import LoadProfile, LoadRunner
+
+
+def run(scenario, base_url: str, **profile) -> dict:
+    profile = LoadProfile(**{"users": 1, "iterations": 1, "duration": 30, **profile})
+    return LoadRunner(scenario, profile, base_url).run().to_dict()
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: нагрузочный прогон")
+class TestLoadRunner:
+
+    @allure.title("Неудачный вход со статусом 200 считается ошибкой")
+    def test_failed_login_is_error(self, stub):
+        def scenario(api, user):
+            api.login(email=user["email"], password="wrong-password")
+
+        report = run(scenario, stub.base_url)
+
+        assert report["methods"]["login"]["errors"] == 1
+        assert report["failed_iterations"] == 1
+
+    @allure.title("Отказ добавления в корзину (success=false) считается ошибкой")
+    def test_rejected_add_to_cart_is_error(self, stub):
+        def scenario(api, user):
+            api.add_to_cart(product_id=13, quantity=1)
+            api.add_to_cart(product_id=13, quantity=0)
+
+        report = run(scenario, stub.base_url)
+
+        assert report["methods"]["add_to_cart"]["count"] == 2
+        assert report["methods"]["add_to_cart"]["errors"] == 1
+
+    @allure.title("Лимит --rate действует на каждый HTTP-запрос, а не на вызов помощника")
+    def test_rate_limits_http_requests(self, stub):
+        def scenario(api, user):
+            for _ in range(5):
+                api.session.get(f"{stub.base_url}/books")
+
+        report = run(scenario, stub.base_url, rate=10)
+
+        # 5 запросов с интервалом 0.1 с, хотя методов помощника не вызывалось
+        assert report["elapsed"] >= 0.4
+        assert report["requests"] == 0
@@ -0,0 +1,35 @@
+import allure
+import pytest
+
+from helpers.page_models import parse_add_to_cart
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: разбор страниц")
+class TestParseAddToCart:
+
+    @allure.title("JSON-ответ магазина")
+    def test_json_payload(self):
+        result = parse_add_to_cart(
+            '{"success": true, "message": "The product has been added to your <a href=\\"/cart\\">shopping cart</a>",'
+            ' "updatetopcartsectionhtml": "(3)"}'
+        )
+
+        assert result.success
+        assert result.message == "The product has been added to your shopping cart"
+        assert result.summary == "(3)"
+
+    @allure.title("HTML вместо JSON")
+    def test_html_page(self):
+        result = parse_add_to_cart("<html><body><p>Please select the required attributes</p></body></html>")
+
+        assert not result.success
+        assert "select the required attributes" in result.message
+
+    @pytest.mark.parametrize("body", ["null", "[]", "[1, 2]", '"has been added"', "42"])
+    @allure.title("JSON, который не является объектом")
+    def test_non_object_json(self, body):
+        result = parse_add_to_cart(body)
+
+        assert result.success == ("has been added" in body)
@@ -0,0 +1,99 @@
+import allure
+import requests
+
+from helpers.api_helpers import DemoWebShopAPI
+from helpers.response_cache import ResponseCache, mount_response_cache
+
+
+def cached_session(cache: ResponseCache, base_url: str) -> requests.Session:
+    session = requests.Session()
+    mount_response_cache(session, cache, base_url)
+    return session
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: кэш ответов")
+class TestResponseCache:
+
+    @allure.title("Свежий ответ (max-age каталога) отдается без обращения к сети")
+    def test_fresh_hit(self, stub):
+        cache = ResponseCache()
+        session = cached_session(cache, stub.base_url)
+
+        first = session.get(f"{stub.base_url}/books")
+        second = session.get(f"{stub.base_url}/books")
+
+        assert second.from_cache
+        assert second.text == first.text
+        assert (cache.stats.misses, cache.stats.revalidated, cache.stats.hits) == (1, 0, 1)
+
+    @allure.title("Устаревший ответ перепроверяется и получает 304")
+    def test_revalidation(self, stub):
+        cache = ResponseCache(route_ttls=((r"/[a-z0-9-]+", 0),))
+        session = cached_session(cache, stub.base_url)
+
+        first = session.get(f"{stub.base_url}/books")
+        second = session.get(f"{stub.base_url}/books")
+
+        assert not getattr(first, "from_cache", False)
+        assert second.from_cache
+        assert second.status_code == 200
+        assert second.text == first.text
+        assert (cache.stats.misses, cache.stats.revalidated, cache.stats.hits) == (1, 1, 0)
+
+    @allure.title("Страница авторизованной сессии не попадает к анонимному клиенту")
+    def test_private_page_not_shared(self, stub):
+        cache = ResponseCache()
+        user = DemoWebShopAPI(base_url=stub.base_url)
+        mount_response_cache(user.session, cache, stub.base_url)
+        user.register("cache@example.com", "secret1", "Cache", "User")
+        user.login("cache@example.com", "secret1")
+        anonymous = cached_session(cache, stub.base_url)
+
+        private_page = user.session.get(f"{stub.base_url}/books")
+        public_page = anonymous.get(f"{stub.base_url}/books")
+
+        assert "cache@example.com" in private_page.text
+        assert "cache@example.com" not in public_page.text
+        assert not getattr(public_page, "from_cache", False)
+
+    @allure.title("Гости делят записи между тестами: доля попаданий по новым клиентам")
+    def test_guests_share_entries(self, stub):
+        cache = ResponseCache()
+        categories = ("books", "desktops", "notebooks")
+        # Каждый клиент - как отдельный тест; у первого есть гостевая кука от корзины
+        shopper = DemoWebShopAPI(base_url=stub.base_url)
+        mount_response_cache(shopper.session, cache, stub.base_url)
+        shopper.add_to_cart(13)
+        clients = [shopper.session] + [cached_session(cache, stub.base_url) for _ in range(3)]
+
+        for session in clients:
+            for category in categories:
+                session.get(f"{stub.base_url}/{category}")
+
+        assert cache.stats.misses == len(categories)
+        assert cache.stats.hit_rate == 0.75
+        assert len(cache) == len(categories)
+
+    @allure.title("Маршруты сессии не кэшируются")
+    def test_session_routes_bypassed(self, stub):
+        cache = ResponseCache()
+        session = cached_session(cache, stub.base_url)
+
+        session.get(f"{stub.base_url}/cart")
+        session.get(f"{stub.base_url}/cart")
+
+        assert cache.stats.bypassed == 2
+        assert len(cache) == 0
+
+    @allure.title("Вытеснение LRU по числу записей")
+    def test_lru_eviction(self, stub):
+        cache = ResponseCache(max_entries=2)
+        session = cached_session(cache, stub.base_url)
+
+        for category in ("books", "desktops", "notebooks"):
+            session.get(f"{stub.base_url}/{category}")
+
+        assert len(cache) == 2
+        assert cache.stats.evictions == 1
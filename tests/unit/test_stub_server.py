@@ -0,0 +1,61 @@
+import allure
+import requests
+
+from helpers.api_helpers import DemoWebShopAPI
+from helpers.stub_server import AUTH_COOKIE
+
+
+@allure.label("owner", "Yaroslav YAQA")
+@allure.epic("DemoWebShop")
+@allure.feature("Инфраструктура: заглушка магазина")
+class TestStubServer:
+
+    @allure.title("Регистрация, вход и корзина на заглушке")
+    def test_register_login_and_cart(self, stub):
+        api = DemoWebShopAPI(base_url=stub.base_url)
+        api.register("stub@example.com", "secret1", "Stub", "User")
+
+        response = api.login("stub@example.com", "secret1")
+
+        assert response.status_code == 200
+        assert api.session.cookies.get(AUTH_COOKIE)
+        assert api.add_to_cart(13, quantity=2).page.success
+        cart = api.get_cart().page
+        assert [(line.item_id, line.quantity) for line in cart.lines] == [(13, 2)]
+
+    @allure.title("Неверный пароль возвращает страницу входа с ошибкой")
+    def test_login_with_wrong_password(self, stub):
+        api = DemoWebShopAPI(base_url=stub.base_url)
+
+        response = api.login("nobody@example.com", "wrong")
+
+        assert "Login was unsuccessful" in response.text
+        assert api.get_auth_token() is None
+
+    @allure.title("Неизвестный товар и неверное количество - JSON с ошибкой")
+    def test_add_to_cart_errors(self, stub):
+        url = f"{stub.base_url}/addproducttocart/catalog"
+
+        unknown = requests.post(f"{url}/999999/1", data={"quantity": 1})
+        bad_quantity = requests.post(f"{url}/13/1", data={"quantity": "abc"})
+        negative = requests.post(f"{url}/13/1", data={"quantity": -1})
+
+        assert unknown.json() == {"success": False, "message": "No product found with the specified ID"}
+        assert bad_quantity.status_code == 200
+        assert bad_quantity.json() == {"success": False, "message": "Quantity should be positive"}
+        assert negative.json()["success"] is False
+
+    @allure.title("Каталог отвечает 304 на совпадающий ETag")
+    def test_catalog_conditional_get(self, stub):
+        first = requests.get(f"{stub.base_url}/books")
+
+        second = requests.get(f"{stub.base_url}/books", headers={"If-None-Match": first.headers["ETag"]})
+
+        assert first.status_code == 200
+        assert "Fiction" in first.text
+        assert second.status_code == 304
+        assert second.content == b""
+
+    @allure.title("Неизвестный адрес - 404")
+    def test_unknown_route(self, stub):
+        assert requests.get(f"{stub.base_url}/no-such-category").status_code == 404